@@ -0,0 +1,242 @@
+"""
+Batch Runner - Run a file of research queries through a phase graph with bounded concurrency
+Goal: Nightly regression runs and demo pre-warming in one command, not a loop of app.invoke()
+
+Reads queries from JSONL - one object per line (or a bare JSON string) - and
+runs them through phase1/2/3 `app` with abatch_as_completed() (or
+batch_as_completed() with --sync), at most --max-concurrency at a time. Each
+run is written to --output as one JSONL line the moment it finishes:
+    {"index", "id", "query", "status", "answer", "error", "seconds", "nodes",
+     "llm_calls", "prompt_tokens", "completion_tokens", "cost_usd"}
+- The query is the first of QUERY_FIELDS present on a line, or --field; with
+  several --field names their values are joined (e.g. --field title body)
+- The id is the line's "id" or "request_id", else its line number
+- A failed run is a line with status "error"; the other runs carry on
+- max_concurrency travels in each run's config, so it also caps the parallel
+  tasks inside one run (e.g. phase 3's parallel searches)
+The agents' step-by-step prints go to stderr, so --output - (stdout, the
+default) stays clean JSONL; a summary is printed to stderr at the end.
+
+Usage:
+    python batch_runner.py queries.jsonl --phase 3 --max-concurrency 8 -o results.jsonl
+    python batch_runner.py requests.jsonl --field title body --limit 5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage
+
+from metrics import estimate_cost
+
+# Load environment variables
+load_dotenv()
+
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+BATCH_RECURSION_LIMIT = int(os.getenv("BATCH_RECURSION_LIMIT", "150"))
+
+# Fields tried, in order, for the query text of an input line
+QUERY_FIELDS = ("query", "question", "input", "prompt", "text")
+ID_FIELDS = ("id", "request_id")
+
+ROOT = Path(__file__).resolve().parent
+
+
+def load_graph(phase: int):
+    """The compiled `app` of phase<N>-agent.py (the scripts are not importable by name)"""
+    spec = importlib.util.spec_from_file_location(
+        f"phase{phase}_agent", ROOT / f"phase{phase}-agent.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def read_queries(path: str, fields=None) -> list:
+    """[(id, query)] from a JSONL file; query is None for a line without one"""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                queries.append((str(number), item))
+                continue
+            run_id = next((str(item[name]) for name in ID_FIELDS if item.get(name)), str(number))
+            if fields:
+                parts = [str(item[name]) for name in fields if item.get(name)]
+            else:
+                parts = [str(item[name]) for name in QUERY_FIELDS if item.get(name)][:1]
+            queries.append((run_id, "\n\n".join(parts) or None))
+    return queries
+
+
+class RunStats(BaseCallbackHandler):
+    """Wall time, graph nodes, model calls, tokens and estimated cost of one graph run"""
+
+    def __init__(self):
+        self.start = None
+        self.end = None
+        self.nodes = 0
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self._lock = threading.Lock()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None,
+                       tags=None, metadata=None, **kwargs):
+        # Queued runs have not started yet; the clock starts with the graph run
+        if parent_run_id is None and self.start is None:
+            self.start = time.perf_counter()
+        node = (metadata or {}).get("langgraph_node")
+        if (node and node != "__start__" and kwargs.get("name") == node
+                and any(tag.startswith("graph:step:") for tag in tags or ())):
+            with self._lock:
+                self.nodes += 1
+
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self.end = time.perf_counter()
+
+    def on_chain_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        if parent_run_id is None:
+            self.end = time.perf_counter()
+
+    def on_llm_end(self, response, **kwargs):
+        model = (response.llm_output or {}).get("model_name", "")
+        with self._lock:
+            self.llm_calls += 1
+            for generations in response.generations:
+                for generation in generations:
+                    message = getattr(generation, "message", None)
+                    usage = getattr(message, "usage_metadata", None) or {}
+                    prompt, completion = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+                    self.prompt_tokens += prompt
+                    self.completion_tokens += completion
+                    self.cost_usd += estimate_cost(
+                        model or (getattr(message, "response_metadata", None) or {}).get(
+                            "model_name", ""), prompt, completion)
+
+    def as_dict(self) -> dict:
+        seconds = (self.end or time.perf_counter()) - (self.start or time.perf_counter())
+        return {"seconds": round(seconds, 3), "nodes": self.nodes, "llm_calls": self.llm_calls,
+                "prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens,
+                "cost_usd": round(self.cost_usd, 6)}
+
+
+def _record(index: int, run_id: str, query: str, result, stats: RunStats) -> dict:
+    record = {"index": index, "id": run_id, "query": query}
+    if isinstance(result, Exception):
+        record.update(status="error", answer=None, error=f"{type(result).__name__}: {result}")
+    else:
+        record.update(status="ok", answer=result["messages"][-1].content, error=None)
+    record.update(stats.as_dict())
+    return record
+
+
+def _prepare(queries: list, max_concurrency: int, recursion_limit: int):
+    """(runnable, inputs, configs, stats) for the queries with text, and error records for the rest"""
+    runnable = [(index, run_id, query) for index, (run_id, query) in enumerate(queries) if query]
+    failed = [{"index": index, "id": run_id, "query": None, "status": "error", "answer": None,
+               "error": "no query field on this line", **RunStats().as_dict()}
+              for index, (run_id, query) in enumerate(queries) if not query]
+    stats = [RunStats() for _ in runnable]
+    inputs = [{"messages": [HumanMessage(content=query)]} for _, _, query in runnable]
+    configs = [{"callbacks": [run_stats], "recursion_limit": recursion_limit,
+                "max_concurrency": max_concurrency, "run_name": f"batch:{run_id}"}
+               for (_, run_id, _), run_stats in zip(runnable, stats)]
+    return runnable, inputs, configs, stats, failed
+
+
+def run_batch(app, queries: list, max_concurrency: int = BATCH_MAX_CONCURRENCY,
+              recursion_limit: int = BATCH_RECURSION_LIMIT):
+    """Yield one record per query as its run finishes (threads, app.batch_as_completed)"""
+    runnable, inputs, configs, stats, failed = _prepare(queries, max_concurrency,
+                                                        recursion_limit)
+    yield from failed
+    for position, result in app.batch_as_completed(inputs, configs, return_exceptions=True):
+        index, run_id, query = runnable[position]
+        yield _record(index, run_id, query, result, stats[position])
+
+
+async def arun_batch(app, queries: list, max_concurrency: int = BATCH_MAX_CONCURRENCY,
+                     recursion_limit: int = BATCH_RECURSION_LIMIT):
+    """Async version of run_batch() (app.abatch_as_completed on the event loop)"""
+    runnable, inputs, configs, stats, failed = _prepare(queries, max_concurrency,
+                                                        recursion_limit)
+    for record in failed:
+        yield record
+    async for position, result in app.abatch_as_completed(inputs, configs,
+                                                          return_exceptions=True):
+        index, run_id, query = runnable[position]
+        yield _record(index, run_id, query, result, stats[position])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("queries", help="JSONL file of queries")
+    parser.add_argument("--phase", type=int, default=3, choices=(1, 2, 3))
+    parser.add_argument("--max-concurrency", type=int, default=BATCH_MAX_CONCURRENCY)
+    parser.add_argument("--recursion-limit", type=int, default=BATCH_RECURSION_LIMIT)
+    parser.add_argument("--field", nargs="+", help="field(s) holding the query text")
+    parser.add_argument("--limit", type=int, help="run only the first N queries")
+    parser.add_argument("-o", "--output", default="-", help="results JSONL (- for stdout)")
+    parser.add_argument("--sync", action="store_true",
+                        help="run with app.batch_as_completed() in threads instead of asyncio")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    queries = read_queries(args.queries, args.field)[:args.limit]
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    totals = {"ok": 0, "error": 0, "llm_calls": 0, "prompt_tokens": 0,
+              "completion_tokens": 0, "cost_usd": 0.0}
+
+    def write(record: dict):
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+        totals[record["status"]] += 1
+        for field in ("llm_calls", "prompt_tokens", "completion_tokens", "cost_usd"):
+            totals[field] += record[field]
+        icon = "✅" if record["status"] == "ok" else "❌"
+        print(f"{icon} [{totals['ok'] + totals['error']}/{len(queries)}] {record['id']} "
+              f"{record['seconds']:.1f}s {record['llm_calls']} calls", file=sys.stderr)
+
+    print(f"🚀 {len(queries)} queries through phase {args.phase}, "
+          f"max concurrency {args.max_concurrency}", file=sys.stderr)
+    start = time.perf_counter()
+    # The agents print every step; keep them off the results stream
+    with contextlib.redirect_stdout(sys.stderr):
+        app = load_graph(args.phase)
+        if args.sync:
+            for record in run_batch(app, queries, args.max_concurrency, args.recursion_limit):
+                write(record)
+        else:
+            async def consume():
+                async for record in arun_batch(app, queries, args.max_concurrency,
+                                               args.recursion_limit):
+                    write(record)
+            asyncio.run(consume())
+
+    if out is not sys.stdout:
+        out.close()
+    print(f"📊 {totals['ok']} ok, {totals['error']} failed in {time.perf_counter() - start:.1f}s; "
+          f"{totals['llm_calls']} model calls, {totals['prompt_tokens']} prompt / "
+          f"{totals['completion_tokens']} completion tokens, ~${totals['cost_usd']:.4f}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
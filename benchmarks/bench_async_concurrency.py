@@ -0,0 +1,106 @@
+"""
+Benchmark - concurrent runs against each graph's `app`
+Starts CONCURRENT_RUNS runs at once against every phase and reports wall time
+and the peak number of live threads for:
+- threads: one thread per run calling app.invoke() (the old sync-only path)
+- async:   asyncio.gather() over app.ainvoke() on a single event loop (what
+           `langgraph dev` does)
+
+Model calls are served by benchmarks/stubs.StubChatModel with MODEL_LATENCY
+seconds of simulated network wait; searches go to a local StubPerplexityServer
+running in a subprocess (with the search cache off) so every run really hits
+the network path and the server's own threads are not counted.
+
+Usage:
+    python benchmarks/bench_async_concurrency.py [runs] [latency]
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+
+from stubs import load_agent, stub_search_server  # noqa: E402
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+CONCURRENT_RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+MODEL_LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+CONFIG = {"recursion_limit": 100}
+
+
+class ThreadSampler:
+    """Background sampler recording the peak threading.active_count()"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Exclude the sampler thread itself
+            self.peak = max(self.peak, threading.active_count() - 1)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def new_input() -> dict:
+    return {"messages": [HumanMessage(content="What is the population density of Orlando?")]}
+
+
+def run_threads(app) -> tuple:
+    with ThreadSampler() as sampler, ThreadPoolExecutor(max_workers=CONCURRENT_RUNS) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: app.invoke(new_input(), CONFIG),
+                                range(CONCURRENT_RUNS)))
+        elapsed = time.perf_counter() - start
+    return results, elapsed, sampler.peak
+
+
+def run_async(app) -> tuple:
+    async def main():
+        return await asyncio.gather(*(app.ainvoke(new_input(), CONFIG)
+                                      for _ in range(CONCURRENT_RUNS)))
+
+    with ThreadSampler() as sampler:
+        start = time.perf_counter()
+        results = asyncio.run(main())
+        elapsed = time.perf_counter() - start
+    return results, elapsed, sampler.peak
+
+
+def main():
+    print(f"🧪 {CONCURRENT_RUNS} concurrent runs per graph, "
+          f"{MODEL_LATENCY * 1000:.0f} ms simulated model latency")
+    print(f"{'graph':<8} {'mode':<8} {'wall s':>8} {'runs/s':>8} {'peak threads':>13}")
+
+    with stub_search_server() as url:
+        os.environ["PERPLEXITY_API_URL"] = url
+        for phase in (1, 2, 3):
+            agent = load_agent(phase, latency=MODEL_LATENCY)
+            for mode, runner in (("threads", run_threads), ("async", run_async)):
+                # The agents print every step; keep the report readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results, elapsed, peak = runner(agent.app)
+                assert len(results) == CONCURRENT_RUNS
+                print(f"phase{phase:<3} {mode:<8} {elapsed:>8.2f} "
+                      f"{CONCURRENT_RUNS / elapsed:>8.1f} {peak:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark - step-by-step calculator vs CALCULATOR_PLANNING
+Solves "What is 2847 * 193^2 + 4521 / 7?" with phase 1 RUNS times in each
+mode and reports, per run:
+- LLM calls and prompt/completion tokens (~4 chars/token stub accounting)
+- wall time with MODEL_LATENCY seconds of simulated latency per call
+- tool node executions and the largest number run in one graph step
+
+Step by step, the scripted model asks for one operation per reasoner/executor
+cycle, as the phase 1 prompts do. In planning mode it returns the plan in
+stubs.PHASE1_PLAN. The mode is switched by patching the module's
+CALCULATOR_PLANNING flag, which is what setting it in .env does at import time.
+
+Usage:
+    python benchmarks/bench_calculator_planning.py [runs] [latency]
+"""
+
+import contextlib
+import io
+import sys
+import time
+from collections import Counter
+
+from stubs import (LLMCallCounter, _tool_call, _transcript, load_agent,
+                   phase1_responder)
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+MODEL_LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+
+QUESTION = "What is 2847 * 193^2 + 4521 / 7?"
+
+# The same operations the plan contains, in the order a step-by-step run makes them
+STEPWISE_CALLS = [
+    ("exponentiation_tool", {"a": 193, "b": 2}),
+    ("division_tool", {"a": 4521, "b": 7}),
+    ("multiplication_tool", {"a": 2847, "b": 37249}),
+    ("addition_tool", {"a": 106047903, "b": 645.8571428571429})
+]
+
+
+def responder(messages):
+    """phase1_responder, but step by step through the benchmark expression"""
+    system = messages[0].content
+    if ("executor part of a mathematician agent" not in system
+            or "📐 Plan complete" in _transcript(messages)):
+        return phase1_responder(messages)
+    done = _transcript(messages).count("The result of ")
+    if done < len(STEPWISE_CALLS):
+        return _tool_call(*STEPWISE_CALLS[done], done)
+    return "The answer is 106048548.857."
+
+
+def measure(agent) -> dict:
+    counter = LLMCallCounter()
+    config = {"callbacks": [counter]}
+    tool_steps = Counter()
+    start = time.perf_counter()
+    for run in range(RUNS):
+        # The agent prints every step; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            for event in agent.app.stream(
+                    {"messages": [HumanMessage(content=QUESTION)]}, config, stream_mode="debug"):
+                if event["type"] == "task" and event["payload"]["name"].endswith("_tool"):
+                    tool_steps[(run, event["step"])] += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "calls": counter.calls / RUNS,
+        "input_tokens": counter.input_tokens / RUNS,
+        "output_tokens": counter.output_tokens / RUNS,
+        "seconds": elapsed / RUNS,
+        "tool_runs": sum(tool_steps.values()) / RUNS,
+        "widest": max(tool_steps.values())
+    }
+
+
+def main():
+    print(f"🧪 {RUNS} runs per mode, {MODEL_LATENCY * 1000:.0f} ms simulated model latency")
+    print(f"{'mode':<13} {'calls':>6} {'in tok':>8} {'out tok':>8} {'sec/run':>8} "
+          f"{'tools':>6} {'widest':>7}")
+
+    agent = load_agent(1, responder=responder, latency=MODEL_LATENCY)
+    results = {}
+    for mode, planning in (("step-by-step", False), ("planning", True)):
+        agent.CALCULATOR_PLANNING = planning
+        results[mode] = r = measure(agent)
+        print(f"{mode:<13} {r['calls']:>6.1f} {r['input_tokens']:>8.0f} {r['output_tokens']:>8.0f} "
+              f"{r['seconds']:>8.2f} {r['tool_runs']:>6.1f} {r['widest']:>7}")
+
+    base, planned = results["step-by-step"], results["planning"]
+    print(f"{'saved':<13} {1 - planned['calls'] / base['calls']:>6.0%} "
+          f"{1 - planned['input_tokens'] / base['input_tokens']:>8.0%} "
+          f"{1 - planned['output_tokens'] / base['output_tokens']:>8.0%} "
+          f"{1 - planned['seconds'] / base['seconds']:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
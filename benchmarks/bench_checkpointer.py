@@ -0,0 +1,116 @@
+"""
+Benchmark - checkpoint storage for a long-running server (phase 3)
+Runs THREADS conversations of TURNS questions each against the phase 3 graph
+with the stub model and reports, per saver:
+- bytes on disk (for the in-memory saver: the pickle `langgraph dev` writes
+  to .langgraph_api/.langgraph_checkpoint.*.pckl)
+- checkpoints kept and time per turn
+- whether every thread's final research document still loads correctly
+
+Savers: LangGraph's InMemorySaver; CompressedSqliteSaver uncompressed and
+keeping everything; zstd keeping everything; zstd with the default retention
+(CHECKPOINT_KEEP_LAST per thread), compacted at the end.
+
+Usage:
+    python benchmarks/bench_checkpointer.py [threads] [turns]
+"""
+
+import contextlib
+import io
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+
+from stubs import ROOT, load_agent, stub_search_server  # noqa: E402
+
+sys.path.insert(0, str(ROOT))
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+from langgraph.checkpoint.memory import InMemorySaver  # noqa: E402
+
+from checkpointer import (CHECKPOINT_KEEP_LAST,  # noqa: E402
+                          CompressedSqliteSaver)
+
+THREADS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+TURNS = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+QUESTIONS = [
+    "What is the population density of Orlando?",
+    "How does that compare with Tampa?",
+    "And with Miami?"
+]
+
+
+def stored_bytes(saver) -> int:
+    if isinstance(saver, InMemorySaver):
+        storage = {thread: dict(namespaces) for thread, namespaces in saver.storage.items()}
+        return len(pickle.dumps((storage, dict(saver.writes), dict(saver.blobs))))
+    return saver.file_size()
+
+
+def checkpoint_count(saver) -> int:
+    if isinstance(saver, InMemorySaver):
+        return sum(len(checkpoints) for namespaces in saver.storage.values()
+                   for checkpoints in namespaces.values())
+    return saver.stats()["checkpoints"]
+
+
+def measure(agent, saver, compact: bool = False) -> dict:
+    app = agent.graph.compile(checkpointer=saver)
+    start = time.perf_counter()
+    expected = {}
+    for thread in range(THREADS):
+        config = {"recursion_limit": 150, "configurable": {"thread_id": f"kiosk-{thread}"}}
+        for turn in range(TURNS):
+            # The agents print every step; keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = app.invoke(
+                    {"messages": [HumanMessage(content=QUESTIONS[turn % len(QUESTIONS)])]},
+                    config)
+        expected[thread] = len(result["research_document"]["findings"])
+    seconds = (time.perf_counter() - start) / (THREADS * TURNS)
+
+    if compact:
+        saver.compact()
+    # Every thread's document must still load from what the saver kept
+    intact = all(
+        len(app.get_state({"configurable": {"thread_id": f"kiosk-{thread}"}})
+            .values["research_document"]["findings"]) == findings
+        for thread, findings in expected.items())
+    return {"bytes": stored_bytes(saver), "checkpoints": checkpoint_count(saver),
+            "seconds": seconds, "intact": intact}
+
+
+def main():
+    print(f"🧪 {THREADS} threads x {TURNS} turns on phase 3")
+    print(f"{'saver':<34} {'KiB':>8} {'checkpoints':>12} {'ms/turn':>8} {'state ok':>9}")
+    directory = tempfile.mkdtemp()
+
+    with stub_search_server() as url:
+        os.environ["PERPLEXITY_API_URL"] = url
+        agent = load_agent(3)
+        savers = [
+            ("InMemorySaver (pickled)", InMemorySaver(), False),
+            ("sqlite, uncompressed, keep all",
+             CompressedSqliteSaver(os.path.join(directory, "raw.sqlite3"), compression="none",
+                                   keep_last=0, retention_every=0), True),
+            ("sqlite, zstd, keep all",
+             CompressedSqliteSaver(os.path.join(directory, "zstd.sqlite3"),
+                                   keep_last=0, retention_every=0), True),
+            (f"sqlite, zstd, keep last {CHECKPOINT_KEEP_LAST}",
+             CompressedSqliteSaver(os.path.join(directory, "kept.sqlite3"),
+                                   retention_every=20), True)
+        ]
+        for name, saver, compact in savers:
+            r = measure(agent, saver, compact)
+            print(f"{name:<34} {r['bytes'] / 1024:>8.0f} {r['checkpoints']:>12} "
+                  f"{r['seconds'] * 1000:>8.1f} {'✅' if r['intact'] else '❌':>8}")
+
+
+if __name__ == "__main__":
+    main()
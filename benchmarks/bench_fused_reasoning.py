@@ -0,0 +1,78 @@
+"""
+Benchmark - two-call reasoner/executor steps vs fused reasoning
+Runs every phase's scripted research task (benchmarks/stubs.py) RUNS times in
+each mode and reports, per run:
+- LLM calls, prompt/completion tokens (~4 chars/token stub accounting)
+- wall time with MODEL_LATENCY seconds of simulated latency per call
+- graph steps, to confirm the node sequence seen in Studio is unchanged
+
+The mode is switched by patching each agent module's FUSED_REASONING flag,
+which is what setting FUSED_REASONING=true in .env does at import time.
+
+Usage:
+    python benchmarks/bench_fused_reasoning.py [runs] [latency]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+
+from stubs import LLMCallCounter, load_agent, stub_search_server  # noqa: E402
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+MODEL_LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+
+
+def measure(agent) -> dict:
+    counter = LLMCallCounter()
+    config = {"recursion_limit": 100, "callbacks": [counter]}
+    steps = 0
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        # The agents print every step; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in agent.app.stream(
+                    {"messages": [HumanMessage(content="What is the population density of Orlando?")]},
+                    config, stream_mode="updates"):
+                steps += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "calls": counter.calls / RUNS,
+        "input_tokens": counter.input_tokens / RUNS,
+        "output_tokens": counter.output_tokens / RUNS,
+        "seconds": elapsed / RUNS,
+        "steps": steps / RUNS
+    }
+
+
+def main():
+    print(f"🧪 {RUNS} runs per graph and mode, {MODEL_LATENCY * 1000:.0f} ms simulated model latency")
+    print(f"{'graph':<8} {'mode':<9} {'calls':>6} {'in tok':>8} {'out tok':>8} {'sec/run':>8} {'steps':>6}")
+
+    with stub_search_server() as url:
+        os.environ["PERPLEXITY_API_URL"] = url
+        for phase in (1, 2, 3):
+            agent = load_agent(phase, latency=MODEL_LATENCY)
+            results = {}
+            for mode, fused in (("two-call", False), ("fused", True)):
+                agent.FUSED_REASONING = fused
+                results[mode] = r = measure(agent)
+                print(f"phase{phase:<3} {mode:<9} {r['calls']:>6.1f} {r['input_tokens']:>8.0f} "
+                      f"{r['output_tokens']:>8.0f} {r['seconds']:>8.2f} {r['steps']:>6.1f}")
+
+            base, fused = results["two-call"], results["fused"]
+            print(f"{'':<8} {'saved':<9} {1 - fused['calls'] / base['calls']:>6.0%} "
+                  f"{1 - fused['input_tokens'] / base['input_tokens']:>8.0%} "
+                  f"{1 - fused['output_tokens'] / base['output_tokens']:>8.0%} "
+                  f"{1 - fused['seconds'] / base['seconds']:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark - tail latency of hedged model requests
+Sends REQUESTS chat completions requests, as the orchestrator_executor node,
+through AsyncHedgedTransport over a stub transport whose latency is mostly
+BASE seconds with a heavy tail (TAIL_SHARE of requests take TAIL seconds),
+WORKERS at a time. Compares no hedging with hedging at several percentiles
+and reports p50/p95/p99/max latency, the hedge rate and the extra requests
+sent (each one billed).
+
+Usage:
+    python benchmarks/bench_hedging.py [requests] [tail_share]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["METRICS_ENABLED"] = "false"
+
+import httpx  # noqa: E402
+from langchain_core.runnables.config import var_child_runnable_config  # noqa: E402
+
+from hedging import AsyncHedgedTransport, HedgePolicy  # noqa: E402
+from metrics import percentile  # noqa: E402
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+TAIL_SHARE = float(sys.argv[2]) if len(sys.argv) > 2 else 0.03
+BASE, TAIL = 0.08, 1.5
+WORKERS = 8
+NODE = "orchestrator_executor"
+SETTINGS = [("no hedging", None), ("p99", 0.99), ("p95", 0.95), ("p90", 0.90)]
+
+
+async def run(fraction) -> dict:
+    rng = random.Random(11)
+    sent = 0
+
+    async def handler(request):
+        nonlocal sent
+        sent += 1
+        await asyncio.sleep(TAIL if rng.random() < TAIL_SHARE else rng.uniform(0.6, 1.4) * BASE)
+        return httpx.Response(200, json={"choices": []})
+
+    policy = HedgePolicy({NODE: fraction} if fraction else {}, min_samples=20, min_delay=0.1)
+    latencies = []
+    var_child_runnable_config.set({"metadata": {"langgraph_node": NODE}})
+    async with httpx.AsyncClient(
+            transport=AsyncHedgedTransport(policy, httpx.MockTransport(handler))) as client:
+        queue = iter(range(REQUESTS))
+
+        async def worker():
+            for _ in queue:
+                start = time.perf_counter()
+                await client.post("http://stub/v1/chat/completions", json={"messages": []})
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(WORKERS)))
+    hedged = sum(counts["hedged"] for counts in policy.stats().values())
+    return {"p50": percentile(latencies, 0.50), "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99), "max": max(latencies),
+            "hedge_rate": hedged / REQUESTS, "extra": sent / REQUESTS - 1}
+
+
+def main():
+    print(f"🧪 {REQUESTS} requests, {TAIL_SHARE:.0%} take {TAIL}s, the rest ~{BASE}s")
+    print(f"{'hedging':<12} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'max s':>7} "
+          f"{'hedged':>7} {'extra req':>10}")
+    for name, fraction in SETTINGS:
+        result = asyncio.run(run(fraction))
+        print(f"{name:<12} {result['p50']:>7.3f} {result['p95']:>7.3f} {result['p99']:>7.3f} "
+              f"{result['max']:>7.3f} {result['hedge_rate']:>6.1%} {result['extra']:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark - LLM response cache on repeated runs
+Runs every phase's scripted research task (benchmarks/stubs.py) three times
+against an LLMResponseCache in a temporary file:
+- cold:   empty cache, every call reaches the model
+- memory: same cache instance, answered from the in-process LRU
+- disk:   fresh cache instance on the same file (a new process / restart)
+
+Model calls take MODEL_LATENCY seconds; searches go to a local stub server
+with the search cache off, so repeat runs measure the LLM cache on its own.
+
+Usage:
+    python benchmarks/bench_llm_cache.py [latency]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+
+from stubs import load_agent, stub_search_server  # noqa: E402
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from llm_cache import LLMResponseCache  # noqa: E402
+
+MODEL_LATENCY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+
+
+def run_once(agent) -> float:
+    start = time.perf_counter()
+    # The agents print every step; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent.app.invoke(
+            {"messages": [HumanMessage(content="What is the population density of Orlando?")]},
+            {"recursion_limit": 100})
+    return time.perf_counter() - start
+
+
+def main():
+    print(f"🧪 {MODEL_LATENCY * 1000:.0f} ms simulated model latency")
+    print(f"{'graph':<8} {'run':<7} {'seconds':>8} {'model calls':>12} {'mem hits':>9} {'disk hits':>10}")
+
+    with stub_search_server() as url, tempfile.TemporaryDirectory() as tmp:
+        os.environ["PERPLEXITY_API_URL"] = url
+        for phase in (1, 2, 3):
+            path = str(Path(tmp) / f"phase{phase}.sqlite3")
+            cache = LLMResponseCache(path=path)
+            for run in ("cold", "memory", "disk"):
+                if run == "disk":
+                    cache.close()
+                    cache = LLMResponseCache(path=path)
+                agent = load_agent(phase, latency=MODEL_LATENCY, cache=cache)
+                before = cache.stats()
+                elapsed = run_once(agent)
+                after = cache.stats()
+                print(f"phase{phase:<3} {run:<7} {elapsed:>8.3f} "
+                      f"{after['misses'] - before['misses']:>12} "
+                      f"{after['memory_hits'] - before['memory_hits']:>9} "
+                      f"{after['disk_hits'] - before['disk_hits']:>10}")
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
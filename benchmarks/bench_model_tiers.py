@@ -0,0 +1,101 @@
+"""
+Benchmark - latency and cost of per-node model tiers in the phase 3 graph
+Runs the phase 3 graph with stub models twice:
+- "all large": every node on the large tier (gpt-4o), as before model tiers
+- "tiered": the mapping in model_tiers.json (executors on gpt-4o-mini)
+The large tier's stub takes LATENCY seconds per call and the small tier's
+LATENCY * SMALL_RATIO, so the wall-time column shows the effect of whatever
+latency ratio you assume. Cost uses MODEL_PRICES (metrics.py) on the stubs'
+token counts (~4 chars per token), per model that served the call.
+
+Usage:
+    python benchmarks/bench_model_tiers.py [latency_seconds] [small_ratio] [runs]
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+from langchain_core.messages import HumanMessage  # noqa: E402
+from stubs import load_agent, stub_search_server  # noqa: E402
+
+from metrics import estimate_cost  # noqa: E402
+
+LATENCY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+SMALL_RATIO = float(sys.argv[2]) if len(sys.argv) > 2 else 0.4
+RUNS = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+QUESTION = "What is the population density of Orlando?"
+
+
+class ModelUsage(BaseCallbackHandler):
+    """Calls, tokens and estimated cost per model"""
+
+    def __init__(self):
+        self.usage = defaultdict(lambda: {"calls": 0, "tokens": 0, "cost": 0.0})
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                message = generation.message
+                model = message.response_metadata.get("model_name", "")
+                usage = message.usage_metadata or {}
+                entry = self.usage[model]
+                entry["calls"] += 1
+                entry["tokens"] += usage.get("total_tokens", 0)
+                entry["cost"] += estimate_cost(model, usage.get("input_tokens", 0),
+                                               usage.get("output_tokens", 0))
+
+
+def measure(agent) -> tuple:
+    """(mean seconds per run, {model: usage per run})"""
+    seconds, usage = [], ModelUsage()
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        # The agents print every step; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            agent.app.invoke({"messages": [HumanMessage(content=QUESTION)]},
+                             {"recursion_limit": 150, "callbacks": [usage]})
+        seconds.append(time.perf_counter() - start)
+    return statistics.mean(seconds), {model: {field: value / RUNS for field, value in entry.items()}
+                                      for model, entry in usage.usage.items()}
+
+
+def main():
+    tier_latency = {"large": LATENCY, "small": LATENCY * SMALL_RATIO}
+    print(f"🧪 Phase 3, large tier {LATENCY:.2f}s / small tier {tier_latency['small']:.2f}s "
+          f"per call, {RUNS} run(s) per setup")
+    results = {}
+    with stub_search_server() as url:
+        os.environ["PERPLEXITY_API_URL"] = url
+        tiered = load_agent(3, tier_latency=tier_latency)
+        config = tiered.model_tiers.config
+        setups = {
+            "all large": load_agent(3, tier_latency=tier_latency,
+                                    tiers_config={**config, "nodes": {}, "default_tier": "large"}),
+            "tiered": tiered
+        }
+        for name, agent in setups.items():
+            results[name] = measure(agent)
+
+    print(f"{'setup':<10} {'s/run':>7} {'model':<12} {'calls':>6} {'tokens':>8} {'cost $':>9}")
+    for name, (seconds, usage) in results.items():
+        total = sum(entry["cost"] for entry in usage.values())
+        for i, (model, entry) in enumerate(sorted(usage.items())):
+            print(f"{name if i == 0 else '':<10} {f'{seconds:.2f}' if i == 0 else '':>7} "
+                  f"{model:<12} {entry['calls']:>6.0f} {entry['tokens']:>8.0f} "
+                  f"{entry['cost']:>9.5f}")
+        print(f"{'':<10} {'':>7} {'total':<12} {'':>6} {'':>8} {total:>9.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark - near-duplicate merging in the phase 3 research document
+Replays a scripted memory session through phase 3's own operation parsers
+(apply_add_open_question, apply_add_finding) and the research_document
+reducer, once with DEDUP_ENABLED off and once on. The script researches
+TOPICS facts; every fact is asked and found REPEATS times in different
+wordings, the way the memory agent records it again after re-searching, and
+facts that differ only in a number are kept apart.
+
+Reported per mode:
+- questions and findings in the final document
+- characters of the rendered document (what every reasoner prompt carries)
+- characters of the rendered document summed over the session, i.e. the
+  research document part of a reasoner prompt after every operation
+- time per recorded operation
+
+For the same comparison on recorded runs, replay cassettes through
+run_benchmarks.py with --env DEDUP_ENABLED=false and --compare (see its Usage).
+
+Usage:
+    python benchmarks/bench_near_duplicates.py [topics] [repeats]
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+from stubs import ROOT, load_agent
+
+sys.path.insert(0, str(ROOT))
+
+import research_document  # noqa: E402
+from research_document import (apply_research_document_deltas,  # noqa: E402
+                               create_empty_research_document,
+                               render_research_document)
+
+TOPICS = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+REPEATS = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+CITIES = ["Orlando", "Tampa", "Miami", "Jacksonville", "Tallahassee", "Gainesville",
+          "Pensacola", "Sarasota", "Naples", "Ocala"]
+ATTRIBUTES = [("population", "people", 1000), ("land area", "square miles", 1),
+              ("median household income", "dollars", 100), ("elevation", "feet", 1)]
+
+QUESTION_WORDINGS = [
+    "What is the {attribute} of {city}?",
+    "What is the {attribute} of {city}",
+    "What is the {attribute} of {city} (latest)?"
+]
+FINDING_WORDINGS = [
+    "{city}'s {attribute} is about {value:,} {unit} (2023 estimate)",
+    "{city} {attribute} is about {value} {unit} (2023 estimate).",
+    "{city}'s {attribute}: about {value:,} {unit} (2023 estimate)"
+]
+CONFIDENCES = ["medium", "high", "low"]
+
+
+def script() -> list:
+    """(operation, details) pairs: each fact asked and found REPEATS times"""
+    operations = []
+    for repeat in range(REPEATS):
+        for topic in range(TOPICS):
+            city = CITIES[topic % len(CITIES)]
+            attribute, unit, scale = ATTRIBUTES[topic // len(CITIES) % len(ATTRIBUTES)]
+            # Past the first 40 topics, facts repeat with a different number
+            value = (137 + 29 * topic) * scale
+            words = {"city": city, "attribute": attribute, "unit": unit, "value": value}
+            question = QUESTION_WORDINGS[repeat % len(QUESTION_WORDINGS)].format(**words)
+            finding = FINDING_WORDINGS[repeat % len(FINDING_WORDINGS)].format(**words)
+            operations.append(("question", f"{question}\npriority: medium"))
+            operations.append(("finding", f"content: {finding}\n"
+                                          f"confidence: {CONFIDENCES[repeat % len(CONFIDENCES)]}\n"
+                                          f"related_questions: {question}"))
+    return operations
+
+
+def run(agent, operations: list, dedup: bool) -> dict:
+    research_document.DEDUP_ENABLED = dedup
+    apply = {"question": agent.apply_add_open_question, "finding": agent.apply_add_finding}
+    doc = create_empty_research_document()
+    prompt_chars = 0
+    elapsed = 0.0
+    for operation, details in operations:
+        start = time.perf_counter()
+        ok, message, deltas = apply[operation](doc, details)
+        doc = apply_research_document_deltas(doc, [deltas])
+        elapsed += time.perf_counter() - start
+        prompt_chars += len(render_research_document(doc))
+    return {"questions": len(doc["open_questions"]), "findings": len(doc["findings"]),
+            "final_chars": len(render_research_document(doc)), "prompt_chars": prompt_chars,
+            "ms_per_op": elapsed / len(operations) * 1000}
+
+
+def main():
+    operations = script()
+    print(f"🧪 {TOPICS} facts x {REPEATS} wordings = {len(operations)} memory operations")
+    with contextlib.redirect_stdout(io.StringIO()):
+        agent = load_agent(3)
+
+    results = {mode: run(agent, operations, dedup) for mode, dedup in (("off", False), ("on", True))}
+    print(f"{'dedup':<6} {'questions':>10} {'findings':>9} {'doc chars':>10} "
+          f"{'session chars':>14} {'ms/op':>7}")
+    for mode, r in results.items():
+        print(f"{mode:<6} {r['questions']:>10} {r['findings']:>9} {r['final_chars']:>10} "
+              f"{r['prompt_chars']:>14} {r['ms_per_op']:>7.3f}")
+    saved = 1 - results["on"]["prompt_chars"] / results["off"]["prompt_chars"]
+    ok = "✅" if results["on"]["findings"] == TOPICS else "❌"
+    print(f"📉 {saved:.0%} fewer research document characters in reasoner prompts; "
+          f"{results['on']['findings']} findings for {TOPICS} facts {ok}")
+
+
+if __name__ == "__main__":
+    main()
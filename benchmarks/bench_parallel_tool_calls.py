@@ -0,0 +1,138 @@
+"""
+Benchmark - one tool call per turn vs parallel tool calls (phases 1 and 2)
+Runs a scripted question per graph RUNS times with each model behaviour and
+reports, per solved question:
+- LLM calls and prompt/completion tokens (~4 chars/token stub accounting)
+- wall time with MODEL_LATENCY seconds of simulated latency per call
+- tool node executions and the largest number run in one graph step
+
+"sequential" asks for one tool per executor turn, as the old prompts
+required; "parallel" asks for every independent call at once, which
+should_continue now fans out to the per-tool nodes with Send.
+- phase 1: 2847 * 193^2 + 4521 / 7 (193^2 and 4521 / 7 are independent)
+- phase 2: two searches, one calculation, conclusion (the searches are independent)
+
+Usage:
+    python benchmarks/bench_parallel_tool_calls.py [runs] [latency]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+from collections import Counter
+
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+
+from stubs import (LLMCallCounter, _summary, _transcript,  # noqa: E402
+                   load_agent, stub_search_server)
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+MODEL_LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+
+QUESTIONS = {
+    1: "What is 2847 * 193^2 + 4521 / 7?",
+    2: "What is the population density of Orlando?"
+}
+
+# Tool calls per executor turn; a turn's calls are independent of each other
+SCRIPTS = {
+    1: [
+        [("exponentiation_tool", {"a": 193, "b": 2}), ("division_tool", {"a": 4521, "b": 7})],
+        [("multiplication_tool", {"a": 2847, "b": 37249})],
+        [("addition_tool", {"a": 106047903, "b": 645.8571428571429})]
+    ],
+    2: [
+        [("search_tool", {"query": "population of Orlando"}),
+         ("search_tool", {"query": "land area of Orlando in square miles"})],
+        [("data_analysis_tool", {"expression": "320000 / 110"})],
+        [("conclusion_tool", {"findings": "Orlando has about 2,900 people per square mile",
+                              "limitations": "none"})]
+    ]
+}
+
+# Text every tool result starts with, to count finished calls from the transcript
+RESULT_MARKERS = {1: "The result of ", 2: ("Search results for '", "Calculation: ")}
+
+
+def scripted_responder(phase: int, parallel: bool):
+    """Executor follows SCRIPTS[phase], one call per turn unless parallel"""
+    calls = [call for turn in SCRIPTS[phase] for call in turn]
+    turns = SCRIPTS[phase] if parallel else [[call] for call in calls]
+    markers = RESULT_MARKERS[phase]
+    markers = (markers,) if isinstance(markers, str) else markers
+
+    def responder(messages):
+        system = messages[0].content
+        if "running summary" in system:
+            return _summary(messages)
+        if "executor" not in system.split("\n", 1)[0]:
+            return "Make the next tool calls in the script."
+        transcript = _transcript(messages)
+        done = sum(transcript.count(marker) for marker in markers)
+        start = 0
+        for turn in turns:
+            if done <= start:
+                return AIMessage(content="", tool_calls=[
+                    {"name": name, "args": args, "id": f"call_{start + i}"}
+                    for i, (name, args) in enumerate(turn)])
+            start += len(turn)
+        return "The answer is 106048548.857."
+
+    return responder
+
+
+def measure(agent, phase: int) -> dict:
+    counter = LLMCallCounter()
+    config = {"recursion_limit": 100, "callbacks": [counter]}
+    tool_steps = Counter()
+    start = time.perf_counter()
+    for run in range(RUNS):
+        # The agents print every step; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            for event in agent.app.stream(
+                    {"messages": [HumanMessage(content=QUESTIONS[phase])]}, config,
+                    stream_mode="debug"):
+                if event["type"] == "task" and event["payload"]["name"].endswith("_tool"):
+                    tool_steps[(run, event["step"])] += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "calls": counter.calls / RUNS,
+        "input_tokens": counter.input_tokens / RUNS,
+        "output_tokens": counter.output_tokens / RUNS,
+        "seconds": elapsed / RUNS,
+        "tool_runs": sum(tool_steps.values()) / RUNS,
+        "widest": max(tool_steps.values())
+    }
+
+
+def main():
+    print(f"🧪 {RUNS} runs per graph and mode, {MODEL_LATENCY * 1000:.0f} ms simulated model latency")
+    print(f"{'graph':<8} {'mode':<11} {'calls':>6} {'in tok':>8} {'out tok':>8} {'sec/run':>8} "
+          f"{'tools':>6} {'widest':>7}")
+
+    with stub_search_server() as url:
+        os.environ["PERPLEXITY_API_URL"] = url
+        for phase in (1, 2):
+            results = {}
+            for mode, parallel in (("sequential", False), ("parallel", True)):
+                agent = load_agent(phase, responder=scripted_responder(phase, parallel),
+                                   latency=MODEL_LATENCY)
+                results[mode] = r = measure(agent, phase)
+                print(f"phase{phase:<3} {mode:<11} {r['calls']:>6.1f} {r['input_tokens']:>8.0f} "
+                      f"{r['output_tokens']:>8.0f} {r['seconds']:>8.2f} {r['tool_runs']:>6.1f} "
+                      f"{r['widest']:>7}")
+
+            base, parallel = results["sequential"], results["parallel"]
+            print(f"{'':<8} {'saved':<11} {1 - parallel['calls'] / base['calls']:>6.0%} "
+                  f"{1 - parallel['input_tokens'] / base['input_tokens']:>8.0%} "
+                  f"{1 - parallel['output_tokens'] / base['output_tokens']:>8.0%} "
+                  f"{1 - parallel['seconds'] / base['seconds']:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
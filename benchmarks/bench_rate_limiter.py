@@ -0,0 +1,117 @@
+"""
+Benchmark - concurrent callers against a provider quota, with and without the shared rate limiter
+Simulates a provider that answers 429 once more than QUOTA requests arrive in
+a sliding minute (scaled down: the quota window is WINDOW seconds), and
+WORKERS threads each making CALLS calls of LATENCY seconds, each retried up
+to SEARCH_MAX_RETRIES times with search_client.py's full-jitter backoff.
+Without the limiter every caller backs off on its own; with it, callers share
+one RateLimiter sized to the quota (burst scaled like
+RATE_LIMIT_BURST_SECONDS) and a 429 pauses all of them. Reports calls that
+succeeded and failed (out of retries), 429s received, wall time, per-call
+p50/p95 latency and the total time spent waiting.
+
+Usage:
+    python benchmarks/bench_rate_limiter.py [workers] [calls_per_worker]
+"""
+
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ["METRICS_ENABLED"] = "false"
+
+from rate_limiter import RATE_LIMIT_BURST_SECONDS, RateLimiter  # noqa: E402
+from search_client import SEARCH_MAX_RETRIES, BaseSearchClient  # noqa: E402
+
+WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+CALLS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+QUOTA = 20          # requests allowed per window
+WINDOW = 2.0        # seconds standing in for the provider's minute
+LATENCY = 0.05
+# search_client.py's retry policy, in the benchmark's time scale
+BACKOFF = BaseSearchClient(backoff_base=0.1, backoff_max=2.0)
+
+
+class QuotaProvider:
+    """Sliding-window request quota; returns 429 with Retry-After when exceeded"""
+
+    def __init__(self):
+        self.arrivals = deque()
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def call(self) -> tuple:
+        with self._lock:
+            now = time.monotonic()
+            while self.arrivals and now - self.arrivals[0] > WINDOW:
+                self.arrivals.popleft()
+            if len(self.arrivals) >= QUOTA:
+                self.throttled += 1
+                return 429, f"{WINDOW - (now - self.arrivals[0]):.2f}"
+            self.arrivals.append(now)
+        time.sleep(LATENCY)
+        return 200, None
+
+
+def run(limiter: RateLimiter = None) -> dict:
+    provider = QuotaProvider()
+    latencies, waits, failed = [], [], []
+    lock = threading.Lock()
+
+    def one_call():
+        start, waited, status = time.monotonic(), 0.0, None
+        for attempt in range(SEARCH_MAX_RETRIES + 1):
+            if limiter is not None:
+                waited += limiter.acquire()
+            status, retry_after = provider.call()
+            if status == 200:
+                if limiter is not None:
+                    limiter.record_success()
+                break
+            if limiter is not None:
+                limiter.record_throttle(retry_after)
+            if attempt < SEARCH_MAX_RETRIES:
+                delay = BACKOFF.backoff_delay(attempt, retry_after)
+                time.sleep(delay)
+                waited += delay
+        with lock:
+            latencies.append(time.monotonic() - start)
+            waits.append(waited)
+            failed.append(status != 200)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(WORKERS) as pool:
+        for _ in range(WORKERS * CALLS):
+            pool.submit(one_call)
+    return {"seconds": time.monotonic() - start, "ok": failed.count(False),
+            "failed": failed.count(True),
+            "throttled": provider.throttled,
+            "p50": statistics.median(latencies),
+            "p95": sorted(latencies)[int(0.95 * len(latencies)) - 1],
+            "wait": sum(waits)}
+
+
+def main():
+    rpm = int(QUOTA * 60 / WINDOW)
+    print(f"🧪 {WORKERS} workers x {CALLS} calls against a {QUOTA} per {WINDOW:g}s quota")
+    print(f"{'mode':<14} {'ok':>5} {'failed':>7} {'429s':>6} {'wall s':>7} {'p50 s':>7} "
+          f"{'p95 s':>7} {'waited s':>9}")
+    for name, limiter in (("no limiter", None),
+                          ("rate limiter", RateLimiter("bench", rpm=rpm, tpm=0,
+                                                       burst_seconds=WINDOW * RATE_LIMIT_BURST_SECONDS / 60,
+                                                       backoff_base=BACKOFF.backoff_base,
+                                                       backoff_max=BACKOFF.backoff_max))):
+        result = run(limiter)
+        print(f"{name:<14} {result['ok']:>5} {result['failed']:>7} {result['throttled']:>6} "
+              f"{result['seconds']:>7.2f} {result['p50']:>7.2f} {result['p95']:>7.2f} "
+              f"{result['wait']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark - checkpoint cost of the research document, full copies vs deltas
+Grows a research document by one finding per graph step for STEPS steps with
+an in-memory checkpointer and reports, at several document sizes:
+- bytes the checkpointer stored for the research_document channel per step
+- checkpoint write time per step
+
+"full" declares research_document as a plain dict and each step returns the
+whole new document, so every checkpoint stores a copy of it (what in-place
+edits amounted to, minus the stale values). "deltas" is phase 3's channel:
+DeltaChannel(apply_research_document_deltas), each step returns one
+add_finding delta and only that write is stored. Both runs then reload the
+final state from the checkpointer to check it matches.
+
+Usage:
+    python benchmarks/bench_research_document_checkpoints.py [steps]
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Annotated
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langgraph.channels import DeltaChannel  # noqa: E402
+from langgraph.checkpoint.memory import InMemorySaver  # noqa: E402
+from langgraph.graph import END, START, StateGraph  # noqa: E402
+from typing_extensions import TypedDict  # noqa: E402
+
+from research_document import (apply_research_document_deltas,  # noqa: E402
+                               create_empty_research_document)
+
+STEPS = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+REPORT_AT = [step for step in (10, 50, 100, 200, 400, 800, 1600) if step <= STEPS]
+
+
+class FullState(TypedDict):
+    step: int
+    research_document: dict
+
+
+class DeltaState(TypedDict):
+    step: int
+    research_document: Annotated[dict, DeltaChannel(apply_research_document_deltas)]
+
+
+def make_finding(step: int) -> dict:
+    return {
+        "content": f"Finding {step}: the metro area population grew {step % 7}.{step % 10}% "
+                   "year over year according to the census bureau estimates",
+        "source": "search_tool",
+        "confidence": "medium",
+        "related_questions": [],
+        "timestamp": f"2025-01-01T00:{step // 60 % 60:02d}:{step % 60:02d}"
+    }
+
+
+def full_node(state: FullState) -> dict:
+    doc = dict(state.get("research_document") or create_empty_research_document())
+    doc["findings"] = doc["findings"] + [make_finding(state.get("step", 0))]
+    doc["version"] += 1
+    return {"step": state.get("step", 0) + 1, "research_document": doc}
+
+
+def delta_node(state: DeltaState) -> dict:
+    finding = make_finding(state.get("step", 0))
+    return {"step": state.get("step", 0) + 1,
+            "research_document": [{"op": "add_finding", "finding": finding}]}
+
+
+def build(state_type, node):
+    graph = StateGraph(state_type)
+    graph.add_node("record", node)
+    graph.add_edge(START, "record")
+    graph.add_conditional_edges("record", lambda s: END if s["step"] >= STEPS else "record")
+    return graph
+
+
+class MeasuredSaver(InMemorySaver):
+    """InMemorySaver recording research_document bytes stored and put time per checkpoint"""
+
+    def __init__(self):
+        super().__init__()
+        self.steps = []
+        self.pending_bytes = 0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        start = time.perf_counter()
+        result = super().put(config, checkpoint, metadata, new_versions)
+        elapsed = time.perf_counter() - start
+        stored = self.pending_bytes
+        if "research_document" in new_versions:
+            key = (config["configurable"]["thread_id"], config["configurable"]["checkpoint_ns"],
+                   "research_document", new_versions["research_document"])
+            stored += len(self.blobs[key][1])
+        self.steps.append((elapsed, stored))
+        self.pending_bytes = 0
+        return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        super().put_writes(config, writes, task_id, task_path)
+        key = (config["configurable"]["thread_id"], config["configurable"]["checkpoint_ns"],
+               config["configurable"]["checkpoint_id"])
+        self.pending_bytes += sum(len(write[2][1]) for (task, _), write in self.writes[key].items()
+                                  if task == task_id and write[1] == "research_document")
+
+
+def measure(state_type, node) -> tuple:
+    saver = MeasuredSaver()
+    app = build(state_type, node).compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": "bench"}, "recursion_limit": STEPS * 2 + 10}
+    start = time.perf_counter()
+    app.invoke({"step": 0}, config)
+    elapsed = time.perf_counter() - start
+    doc = app.get_state(config).values["research_document"]
+    return saver.steps, elapsed, len(doc["findings"])
+
+
+def main():
+    print(f"🧪 {STEPS} steps, one finding added per step")
+    results = {mode: measure(*args) for mode, args in (
+        ("full", (FullState, full_node)), ("deltas", (DeltaState, delta_node)))}
+
+    print(f"{'findings':>9} {'full B/step':>12} {'delta B/step':>13} "
+          f"{'full ms/put':>12} {'delta ms/put':>13}")
+    for step in REPORT_AT:
+        # Average over the ten steps up to this size
+        row = []
+        for mode in ("full", "deltas"):
+            window = results[mode][0][max(0, step - 10):step]
+            row.append((sum(b for _, b in window) / len(window),
+                        sum(t for t, _ in window) / len(window) * 1000))
+        print(f"{step:>9} {row[0][0]:>12.0f} {row[1][0]:>13.0f} "
+              f"{row[0][1]:>12.3f} {row[1][1]:>13.3f}")
+
+    for mode, (steps, elapsed, findings) in results.items():
+        total = sum(b for _, b in steps)
+        ok = "✅" if findings == STEPS else "❌"
+        print(f"{mode:<7} {total / 1024:>9.0f} KiB stored, {elapsed:.2f}s total, "
+              f"reloaded {findings} findings {ok}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark - research document rendering for reasoner prompts
+Compares the old `{doc}` repr that was pasted into prompts against
+render_research_document() on synthetic documents of increasing size.
+
+Reports prompt tokens (tiktoken cl100k_base when installed, else ~4 chars/token)
+and per-call time for the repr, a cold render, and a cached render.
+
+Usage:
+    python benchmarks/bench_research_document_render.py
+"""
+
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from research_document import (create_empty_research_document,  # noqa: E402
+                               mark_research_document_changed,
+                               render_research_document)
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(_encoding.encode(text))
+except Exception:
+    def count_tokens(text: str) -> int:
+        return len(text) // 4
+
+SIZES = [10, 50, 200, 1000]
+REPEATS = 200
+
+
+def build_document(n: int) -> dict:
+    """Build a research document with n findings and proportional questions"""
+    doc = create_empty_research_document()
+    now = datetime.now().isoformat()
+    for i in range(n):
+        question = f"What was the {i}th data point for Orlando home prices vs GOOG and MSFT?"
+        doc["findings"].append({
+            "content": f"Orlando median home price rose {i % 17 + 2}% in period {i}; GOOG closed at {100 + i}.",
+            "source": "search_tool",
+            "confidence": ["high", "medium", "low"][i % 3],
+            "related_questions": [question],
+            "timestamp": now
+        })
+        if i % 2 == 0:
+            doc["open_questions"].append({
+                "id": f"q_{i:08x}", "question": question, "added": now,
+                "priority": ["high", "medium", "low"][i % 3]
+            })
+        if i % 5 == 0:
+            doc["closed_questions_complete"].append({
+                "id": f"q_c{i:07x}", "question": question,
+                "answer": f"{i % 9 + 1}.{i % 7}% annualized", "evidence": [],
+                "confidence": "high", "closed": now
+            })
+        if i % 10 == 0:
+            doc["unhelpful_searches"].append({
+                "query": f"exact Orlando price index {i}", "source": "search_tool",
+                "reason": "No monthly data", "partial_info": "",
+                "potential_followups": [], "related_questions": [], "timestamp": now
+            })
+    mark_research_document_changed(doc)
+    return doc
+
+
+def time_per_call(fn, repeats: int = REPEATS) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    print(f"{'findings':>8} | {'repr tok':>9} | {'outline tok':>11} | {'saved':>6} | "
+          f"{'repr us':>9} | {'cold us':>9} | {'cached us':>9}")
+    print("-" * 80)
+    for n in SIZES:
+        doc = build_document(n)
+        repr_text = f"{doc}"
+        outline = render_research_document(doc)
+
+        repr_tokens = count_tokens(repr_text)
+        outline_tokens = count_tokens(outline)
+
+        repr_us = time_per_call(lambda: f"{doc}")
+
+        def cold():
+            mark_research_document_changed(doc)
+            render_research_document(doc)
+        cold_us = time_per_call(cold)
+        cached_us = time_per_call(lambda: render_research_document(doc))
+
+        saved = 1 - outline_tokens / repr_tokens
+        print(f"{n:>8} | {repr_tokens:>9} | {outline_tokens:>11} | {saved:>6.1%} | "
+              f"{repr_us:>9.1f} | {cold_us:>9.1f} | {cached_us:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark - relevance-ranked research document in the orchestrator prompt
+Grows a research document to several sizes (findings about many cities and
+attributes, a few answered questions) with one open question, and reports
+per size:
+- characters of the whole outline (render_research_document) and of the
+  ranked outline the orchestrator now gets (render_relevant_research_document
+  within RETRIEVAL_TOKEN_BUDGET)
+- how many of the findings that answer the open question the ranked outline
+  kept - they are scattered through the document
+- time to build the ranked outline, first call and repeated
+
+Usage:
+    python benchmarks/bench_retrieval.py [max_findings] [token_budget]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from research_document import (apply_research_document_deltas,  # noqa: E402
+                               close_question_delta,
+                               render_relevant_research_document,
+                               render_research_document)
+from retrieval import RETRIEVAL_TOKEN_BUDGET  # noqa: E402
+
+MAX_FINDINGS = int(sys.argv[1]) if len(sys.argv) > 1 else 1600
+TOKEN_BUDGET = int(sys.argv[2]) if len(sys.argv) > 2 else RETRIEVAL_TOKEN_BUDGET
+SIZES = [size for size in (25, 50, 100, 200, 400, 800, 1600, 3200) if size <= MAX_FINDINGS]
+
+CITIES = ["Orlando", "Tampa", "Miami", "Jacksonville", "Gainesville", "Pensacola",
+          "Sarasota", "Naples", "Ocala", "Tallahassee"]
+ATTRIBUTES = ["population", "land area in square miles", "median household income",
+              "average rent", "unemployment rate", "number of public schools"]
+# The open question, and the findings that answer it
+TARGET_CITY, TARGET_ATTRIBUTE = "Tallahassee", "population"
+QUESTION = {"id": "q_target", "priority": "high",
+            "question": f"What is the {TARGET_ATTRIBUTE} density of {TARGET_CITY}?"}
+NEEDLES = [f"{TARGET_CITY} {TARGET_ATTRIBUTE} was about 201,000 in the 2023 estimate",
+           f"{TARGET_CITY} covers about 103 square miles of land",
+           f"{TARGET_CITY} {TARGET_ATTRIBUTE} density is roughly 1,900 people per square mile"]
+
+
+def finding(content: str) -> dict:
+    return {"content": content, "source": "search_tool", "confidence": "medium",
+            "related_questions": [], "timestamp": "2025-01-01T00:00:00"}
+
+
+def build(size: int, rng: random.Random) -> dict:
+    """Document with `size` findings, NEEDLES among them at random positions"""
+    writes = [[{"op": "add_open_question", "question": QUESTION}]]
+    needle_at = dict(zip(rng.sample(range(size), len(NEEDLES)), NEEDLES))
+    for position in range(size):
+        if position in needle_at:
+            content = needle_at[position]
+        else:
+            city = rng.choice([c for c in CITIES if c != TARGET_CITY])
+            content = (f"{city} {rng.choice(ATTRIBUTES)} was {rng.randint(10, 99_000):,} "
+                       f"in {rng.randint(2015, 2024)} according to source {position}")
+        writes.append([{"op": "add_finding", "finding": finding(content)}])
+        if position % 25 == 24:
+            question = {"id": f"q_{position}", "priority": "medium",
+                        "question": f"What is the {ATTRIBUTES[position % len(ATTRIBUTES)]} of "
+                                    f"{CITIES[position % (len(CITIES) - 1)]}?"}
+            writes.append([{"op": "add_open_question", "question": question}])
+            writes.append([close_question_delta("closed_questions_complete", {
+                **question, "answer": f"see F{position + 1}", "confidence": "medium"})])
+    return apply_research_document_deltas(None, writes)
+
+
+def main():
+    rng = random.Random(7)
+    query = f"Find the {TARGET_ATTRIBUTE} density of {TARGET_CITY}"
+    print(f"🧪 Ranked outline within {TOKEN_BUDGET} tokens (~{TOKEN_BUDGET * 4} chars)")
+    print(f"{'findings':>9} {'full chars':>11} {'ranked chars':>13} {'needles kept':>13} "
+          f"{'first ms':>9} {'repeat ms':>10}")
+    for size in SIZES:
+        doc = build(size, rng)
+        full = render_research_document(doc)
+        start = time.perf_counter()
+        ranked = render_relevant_research_document(doc, query, TOKEN_BUDGET)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        render_relevant_research_document(doc, query, TOKEN_BUDGET)
+        repeat = time.perf_counter() - start
+        kept = sum(needle in ranked for needle in NEEDLES)
+        print(f"{size:>9} {len(full):>11} {len(ranked):>13} {kept:>10}/{len(NEEDLES)} "
+              f"{first * 1000:>9.2f} {repeat * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark - time to first visible output of the text-producing phase 3 nodes
+Runs the phase 3 graph with the stub model (LATENCY seconds per model call,
+streamed word by word when LangGraph asks for tokens) twice with astream():
+- "whole message": stream_mode=["tasks", "updates"], what a client without
+  token streaming sees - a node's output appears when the node finishes
+- "token stream": stream_mode=["tasks", "messages"], what `langgraph dev` /
+  Studio and astream_events clients see - the first token chunk
+and reports, per node, the mean time from the node starting to its first
+visible output, plus the chunks each node streamed. Executors, summaries and
+structured calls are kept out of the token stream (without_token_stream), so
+they only show their final message.
+
+Usage:
+    python benchmarks/bench_streaming.py [latency_seconds] [runs]
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["METRICS_ENABLED"] = "false"
+
+from langchain_core.messages import AIMessageChunk, HumanMessage  # noqa: E402
+from stubs import load_agent, stub_search_server  # noqa: E402
+
+LATENCY = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+RUNS = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+QUESTION = "What is the population density of Orlando?"
+
+
+async def measure(agent, stream_mode: list) -> tuple:
+    """({node: [seconds from start to first output]}, {node: chunks}, total seconds)"""
+    first_output = defaultdict(list)
+    chunks = defaultdict(int)
+    started = {}
+    start = time.perf_counter()
+    async for mode, payload in agent.app.astream(
+            {"messages": [HumanMessage(content=QUESTION)]}, {"recursion_limit": 150},
+            stream_mode=stream_mode):
+        now = time.perf_counter()
+        if mode == "tasks":
+            if "result" not in payload:
+                started[payload["name"]] = now
+            elif payload["name"] in started:
+                # Without token streaming the result is the first output
+                first_output[payload["name"]].append(now - started.pop(payload["name"]))
+        elif mode == "messages":
+            chunk, metadata = payload
+            node = metadata.get("langgraph_node")
+            if isinstance(chunk, AIMessageChunk):
+                chunks[node] += 1
+                if node in started:
+                    first_output[node].append(now - started.pop(node))
+    return first_output, chunks, time.perf_counter() - start
+
+
+def main():
+    modes = {"whole message": ["tasks", "updates"], "token stream": ["tasks", "messages"]}
+    print(f"🧪 Phase 3, {LATENCY:.2f}s per model call, {RUNS} run(s) per mode")
+    with stub_search_server() as url:
+        os.environ["PERPLEXITY_API_URL"] = url
+        agent = load_agent(3, latency=LATENCY)
+        results = {}
+        for name, stream_mode in modes.items():
+            first_output, chunks, totals = defaultdict(list), defaultdict(int), []
+            for _ in range(RUNS):
+                # The agents print every step; keep the report readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    run_first, run_chunks, total = asyncio.run(measure(agent, stream_mode))
+                for node, seconds in run_first.items():
+                    first_output[node].extend(seconds)
+                for node, count in run_chunks.items():
+                    chunks[node] += count
+                totals.append(total)
+            results[name] = (first_output, chunks, statistics.mean(totals))
+
+    streamed = sorted(results["token stream"][1])
+    print(f"{'node':<26} {'whole msg s':>12} {'first token s':>14} {'chunks/run':>11}")
+    for node in streamed:
+        before = statistics.mean(results["whole message"][0][node])
+        after = statistics.mean(results["token stream"][0][node])
+        print(f"{node:<26} {before:>12.3f} {after:>14.3f} "
+              f"{results['token stream'][1][node] / RUNS:>11.0f}")
+    for name, (_, _, total) in results.items():
+        print(f"   {name}: {total:.2f}s per run")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Benchmark runner - the documented test questions against phase1/2/3 `app`, offline
+Runs any subset of the test questions listed in the phase module docstrings
+with the stub model (benchmarks/stubs.py) and the stub search server - or
+against recorded cassettes (cassettes.py) - and records per run:
+- nodes visited (count and sequence)
+- LLM calls, prompt and completion tokens (~4 chars/token stub accounting)
+- prompt characters actually sent (with cassettes, tokens are the recorded
+  usage, so this is what shows prompt-size changes such as DEDUP_ENABLED)
+- wall time, with --latency seconds of simulated model latency per call
+- peak RSS of the process that ran it
+
+Every run executes in a fresh subprocess, so peak RSS belongs to that run
+alone. Results (runs, per-phase summary, configuration) are written as JSON
+to --output; --env KEY=VALUE sets configuration flags in every run
+(e.g. FUSED_REASONING=true) and --compare prints the change against an
+earlier results file.
+
+--cassettes DIR replays DIR/phase<N>-q<M>.jsonl with the real ChatOpenAI
+instead of the stubs (add --env CASSETTE_LATENCY=recorded for the original
+timings); with --record the runs call the real OpenAI and Perplexity APIs
+and write those cassettes.
+
+Usage:
+    python benchmarks/run_benchmarks.py --list
+    python benchmarks/run_benchmarks.py --record --cassettes cassettes/
+    python benchmarks/run_benchmarks.py --phases 2 3 --questions 1 3 5 \\
+        --env FUSED_REASONING=true --label fused --output fused.json \\
+        --compare baseline.json
+    python benchmarks/run_benchmarks.py --phases 3 --cassettes cassettes/ \\
+        --env DEDUP_ENABLED=false --label no-dedup --output no-dedup.json
+    python benchmarks/run_benchmarks.py --phases 3 --cassettes cassettes/ \\
+        --label dedup --output dedup.json --compare no-dedup.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from stubs import ROOT, stub_search_server
+
+PHASES = (1, 2, 3)
+
+# Flags pinned in every run unless --env overrides them: no caches, so every
+# run does the full work, no rate limiting of the local stubs, and no metrics
+# log written next to the agents
+DEFAULT_ENV = {
+    "SEARCH_CACHE_ENABLED": "false",
+    "LLM_CACHE_ENABLED": "false",
+    "RATE_LIMIT_ENABLED": "false",
+    "METRICS_ENABLED": "false"
+}
+
+SUMMARY_FIELDS = ("nodes", "llm_calls", "prompt_chars", "prompt_tokens",
+                  "completion_tokens", "seconds", "peak_rss_mb")
+
+
+def parse_test_questions(phase: int) -> list:
+    """The numbered test questions in phase<N>-agent.py's docstring"""
+    source = (ROOT / f"phase{phase}-agent.py").read_text(encoding="utf-8")
+    docstring = source.split('"""')[1]
+    questions = re.findall(r'^\s*\d+\.\s*[^\n]*:\s*\n\s*"([^"]+)"', docstring, re.MULTILINE)
+    # Phase 1 documents a single test case between asterisks
+    questions += re.findall(r"\*{3,}\s*(.+?)\s*\*{3,}", docstring)
+    return questions
+
+
+def run_question(phase: int, question: str, latency: float) -> dict:
+    """Run one question against one graph in this process (child side)"""
+    import io
+
+    from langchain_core.messages import HumanMessage
+    from stubs import LLMCallCounter, load_agent
+
+    # Cassette runs use the real model client, pointed at the recording
+    stub = os.getenv("CASSETTE_MODE", "off") not in ("record", "replay")
+    agent = load_agent(phase, latency=latency, stub=stub)
+    counter = LLMCallCounter()
+    config = {"recursion_limit": 150, "callbacks": [counter]}
+    visited = []
+    start = time.perf_counter()
+    # The agents print every step; keep the runner's output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for update in agent.app.stream(
+                {"messages": [HumanMessage(content=question)]}, config, stream_mode="updates"):
+            visited.extend(update)
+    seconds = time.perf_counter() - start
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {
+        "nodes": len(visited),
+        "node_sequence": visited,
+        "llm_calls": counter.calls,
+        "prompt_chars": counter.prompt_chars,
+        "prompt_tokens": counter.input_tokens,
+        "completion_tokens": counter.output_tokens,
+        "seconds": round(seconds, 4),
+        "peak_rss_mb": round(peak_rss_mb, 1)
+    }
+
+
+def run_in_subprocess(phase: int, question_number: int, question: str,
+                      latency: float, env: dict) -> dict:
+    """Run one question in a fresh interpreter and return its measurements"""
+    completed = subprocess.run(
+        [sys.executable, __file__, "--child", str(phase), str(question_number), str(latency)],
+        env={**os.environ, **env}, capture_output=True, text=True)
+    if completed.returncode != 0:
+        error = (completed.stderr.strip().splitlines() or ["unknown error"])[-1]
+        return {"error": error}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs: list) -> dict:
+    """Mean and median of each measurement per phase (failed runs excluded)"""
+    summary = {}
+    for phase in sorted({run["phase"] for run in runs}):
+        ok = [run for run in runs if run["phase"] == phase and "error" not in run]
+        summary[f"phase{phase}"] = {
+            "runs": len(ok),
+            "errors": sum(1 for run in runs if run["phase"] == phase and "error" in run),
+            **{field: {"mean": round(statistics.mean(run[field] for run in ok), 4),
+                       "median": round(statistics.median(run[field] for run in ok), 4)}
+               for field in SUMMARY_FIELDS if ok}
+        }
+    return summary
+
+
+def print_comparison(summary: dict, baseline_path: str):
+    """Mean of each measurement against the same phase in a baseline results file"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n📊 Compared with {baseline_path} ({baseline.get('label', '')})")
+    for phase, current in summary.items():
+        before = baseline.get("summary", {}).get(phase)
+        if not before:
+            continue
+        changes = []
+        for field in SUMMARY_FIELDS:
+            if field in current and field in before and before[field]["mean"]:
+                change = current[field]["mean"] / before[field]["mean"] - 1
+                changes.append(f"{field} {change:+.0%}")
+        print(f"   {phase}: " + ", ".join(changes))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--phases", type=int, nargs="+", default=list(PHASES), choices=PHASES)
+    parser.add_argument("--questions", type=int, nargs="+",
+                        help="question numbers from the docstrings (default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per question")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulated seconds per model call")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="configuration flag for every run (repeatable)")
+    parser.add_argument("--label", default="baseline", help="name of this configuration")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", metavar="RESULTS_JSON",
+                        help="earlier results file to compare against")
+    parser.add_argument("--cassettes", metavar="DIR",
+                        help="replay (or with --record, record) one cassette per question")
+    parser.add_argument("--record", action="store_true",
+                        help="record cassettes from the real APIs (needs API keys)")
+    parser.add_argument("--list", action="store_true", help="list the questions and exit")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.list:
+        for phase in args.phases:
+            print(f"phase{phase}:")
+            for number, question in enumerate(parse_test_questions(phase), 1):
+                print(f"   {number:>2}. {question}")
+        return
+
+    env = {**DEFAULT_ENV, **dict(item.split("=", 1) for item in args.env)}
+    runs = []
+    print(f"🧪 {args.label}: phases {args.phases}, {args.repeat} run(s) per question, "
+          f"{args.latency * 1000:.0f} ms simulated model latency")
+    print(f"{'graph':<8} {'q':>3} {'nodes':>6} {'calls':>6} {'in tok':>8} {'sec':>7} {'rss MB':>7}")
+
+    if args.record and not args.cassettes:
+        raise SystemExit("--record needs --cassettes DIR")
+    if args.cassettes:
+        env["CASSETTE_MODE"] = "record" if args.record else "replay"
+
+    with contextlib.ExitStack() as stack:
+        if not args.cassettes:
+            env["PERPLEXITY_API_URL"] = stack.enter_context(stub_search_server())
+        for phase in args.phases:
+            questions = parse_test_questions(phase)
+            numbers = [n for n in (args.questions or range(1, len(questions) + 1))
+                       if 1 <= n <= len(questions)]
+            for number in numbers:
+                if args.cassettes:
+                    env["CASSETTE_PATH"] = os.path.join(
+                        args.cassettes, f"phase{phase}-q{number}.jsonl")
+                # A recording is made once per question
+                for repeat in range(1 if args.record else args.repeat):
+                    result = run_in_subprocess(phase, number, questions[number - 1],
+                                               args.latency, env)
+                    runs.append({"phase": phase, "question": number, "repeat": repeat,
+                                 "text": questions[number - 1], **result})
+                    if "error" in result:
+                        print(f"phase{phase:<3} {number:>3} ❌ {result['error']}")
+                        continue
+                    print(f"phase{phase:<3} {number:>3} {result['nodes']:>6} "
+                          f"{result['llm_calls']:>6} {result['prompt_tokens']:>8} "
+                          f"{result['seconds']:>7.3f} {result['peak_rss_mb']:>7.1f}")
+
+    env.pop("PERPLEXITY_API_URL", None)
+    env.pop("CASSETTE_PATH", None)
+    results = {
+        "label": args.label,
+        "created": datetime.now().isoformat(),
+        "config": {
+            "env": env,
+            "cassettes": args.cassettes,
+            "latency": args.latency,
+            "repeat": args.repeat,
+            "python": platform.python_version()
+        },
+        "summary": summarize(runs),
+        "runs": runs
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        print_comparison(results["summary"], args.compare)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        phase, number, latency = int(sys.argv[2]), int(sys.argv[3]), float(sys.argv[4])
+        print(json.dumps(run_question(phase, parse_test_questions(phase)[number - 1], latency)))
+    else:
+        main()
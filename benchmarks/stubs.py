@@ -0,0 +1,311 @@
+"""
+Benchmark stubs - offline stand-ins for the OpenAI chat model and the agent modules
+Lets benchmarks drive the real graphs end to end without API keys or network.
+
+- StubChatModel answers with a scripted responder after a fixed latency
+  (time.sleep for invoke(), asyncio.sleep for ainvoke()) so the I/O wait of a
+  real model call is reproduced without burning CPU. When LangGraph streams
+  (stream_mode="messages", astream_events) it streams too: the text arrives
+  word by word, the latency spread evenly over the words
+- research_responder() scripts a short, complete run for each phase's graph;
+  every decision is made from the messages alone, so concurrent runs never
+  share state
+- load_agent() imports the hyphenated phase scripts as modules; phase 3 gets
+  one stub per model tier (model_tiers.py), each named after its tier's model
+  and optionally with its own latency
+
+Search traffic goes to stub_perplexity_server.py, run by stub_search_server().
+"""
+
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# The stubs answer locally; a provider budget would only add waiting
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+from langchain_core.language_models.chat_models import \
+    BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, AIMessageChunk  # noqa: E402
+from langchain_core.outputs import (ChatGeneration,  # noqa: E402
+                                    ChatGenerationChunk, ChatResult)
+
+from fused_reasoning import FusedDecision  # noqa: E402
+from model_tiers import ModelTiers  # noqa: E402
+
+# Present in every fused reasoner prompt (see fused_reasoning.py)
+FUSED_MARKER = "You are also the executor for this step"
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model returning responder(messages) after `latency` seconds"""
+
+    responder: Callable
+    latency: float = 0.0
+    # Reported as the response's model, so cost estimates use its price
+    model_name: str = "stub"
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _respond(self, messages, tools=()) -> ChatResult:
+        message = self.responder(messages)
+        if isinstance(message, dict):
+            # Structured output: with_structured_output(schema) reads the answer from a tool call
+            message = AIMessage(content="", tool_calls=[{
+                "name": tools[0], "args": message, "id": "call_structured"}])
+        elif not isinstance(message, AIMessage):
+            message = AIMessage(content=message)
+        if FusedDecision.__name__ in tools:
+            # with_structured_output(FusedDecision) reads the answer from a tool call
+            message = AIMessage(content="", tool_calls=[{
+                "name": FusedDecision.__name__,
+                "args": {"reasoning": "Follow the plan for the next step.",
+                         "directive": message.content},
+                "id": "call_fused"}])
+        elif message.tool_calls and not message.content and FUSED_MARKER in str(messages[0].content):
+            message.content = "Following the plan, the next step is this tool call."
+        # Rough usage numbers (~4 chars per token) so token reports stay meaningful
+        prompt_chars = sum(len(str(msg.content)) for msg in messages)
+        input_tokens = prompt_chars // 4
+        output_tokens = (len(str(message.content)) + len(str(message.tool_calls))) // 4 + 1
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens
+        }
+        message.response_metadata = {**message.response_metadata, "model_name": self.model_name}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages, kwargs.get("tools", ()))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages, kwargs.get("tools", ()))
+
+    def _chunks(self, messages, tools) -> list:
+        """The response as (delay, chunk) pairs: a word per chunk, tool calls in the last"""
+        message = self._respond(messages, tools).generations[0].message
+        words = str(message.content).split(" ")
+        chunks = [AIMessageChunk(content=word if i == 0 else " " + word)
+                  for i, word in enumerate(words) if message.content]
+        chunks.append(AIMessageChunk(
+            content="", usage_metadata=message.usage_metadata,
+            tool_call_chunks=[{"name": call["name"], "args": json.dumps(call["args"]),
+                               "id": call["id"], "index": i}
+                              for i, call in enumerate(message.tool_calls)]))
+        delay = self.latency / len(chunks)
+        return [(delay, ChatGenerationChunk(message=chunk)) for chunk in chunks]
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        for delay, chunk in self._chunks(messages, kwargs.get("tools", ())):
+            if delay:
+                time.sleep(delay)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        for delay, chunk in self._chunks(messages, kwargs.get("tools", ())):
+            if delay:
+                await asyncio.sleep(delay)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def bind_tools(self, tools, **kwargs: Any):
+        # The responder decides on tool calls itself; binding only needs to be accepted
+        names = [getattr(t, "name", getattr(t, "__name__", str(t))) for t in tools]
+        return self.bind(tools=names, **kwargs)
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Callback counting chat model calls, the prompt characters sent and token usage"""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_chars = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
+        # Counted from what is sent, so replayed cassettes (whose usage is the
+        # recorded prompt's) still show changes to the prompts
+        self.prompt_chars += sum(len(_transcript(batch)) for batch in messages)
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.input_tokens += usage.get("input_tokens", 0)
+                self.output_tokens += usage.get("output_tokens", 0)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+def _transcript(messages) -> str:
+    return "\n".join(str(msg.content) for msg in messages)
+
+
+def _tool_call(name: str, args: dict, index: int) -> AIMessage:
+    return AIMessage(content="", tool_calls=[
+        {"name": name, "args": args, "id": f"call_{name}_{index}"}])
+
+
+def _summary(messages):
+    """Echo the summarizer's input so tool results survive summarization"""
+    prompt = messages[0].content
+    return prompt.split("Current summary:", 1)[1].split("Write the updated summary", 1)[0].strip()
+
+
+# Each responder decides from tool-output markers in the transcript, so the
+# same script works whether the conversation arrives as messages (executor)
+# or as text inside a fused reasoner prompt.
+
+# Plan for "What is 2847 * 193^2 + 4521 / 7?" in planning mode
+PHASE1_PLAN = {
+    "steps": [
+        {"id": "s1", "tool": "exponentiation_tool", "a": "193", "b": "2"},
+        {"id": "s2", "tool": "division_tool", "a": "4521", "b": "7"},
+        {"id": "s3", "tool": "multiplication_tool", "a": "2847", "b": "s1"},
+        {"id": "s4", "tool": "addition_tool", "a": "s3", "b": "s2"}
+    ],
+    "final_step": "s4"
+}
+
+
+def phase1_responder(messages):
+    """Mathematician agent: two tool calls, then the final answer (or a plan in planning mode)"""
+    system = messages[0].content
+    if "running summary" in system:
+        return _summary(messages)
+    if "Break this calculation into" in system:
+        return PHASE1_PLAN
+    if "📐 Plan complete" in _transcript(messages):
+        return "The answer is 106048548.857."
+    if ("executor part of a mathematician agent" not in system
+            and FUSED_MARKER not in system):
+        return "Use the next tool with the suggested arguments."
+    done = _transcript(messages).count("The result of ")
+    if done == 0:
+        return _tool_call("multiplication_tool", {"a": 6, "b": 7}, done)
+    if done == 1:
+        return _tool_call("addition_tool", {"a": 42, "b": 8}, done)
+    return "The answer is 50."
+
+
+def phase2_responder(messages):
+    """Research agent: search, calculate, then conclude"""
+    system = messages[0].content
+    if "running summary" in system:
+        return _summary(messages)
+    if ("executor for a general research agent" not in system
+            and FUSED_MARKER not in system):
+        return "Search for the data, calculate, then conclude."
+    transcript = _transcript(messages)
+    if "Search results for '" not in transcript:
+        return _tool_call("search_tool", {"query": "population of Orlando"}, 0)
+    if "Calculation: 320000 / 2 =" not in transcript:
+        return _tool_call("data_analysis_tool", {"expression": "320000 / 2"}, 1)
+    return _tool_call("conclusion_tool", {
+        "findings": "Orlando has about 320,000 residents", "limitations": "none"}, 2)
+
+
+def phase3_responder(messages):
+    """Research orchestrator: search, log a question, calculate, then conclude"""
+    system = messages[0].content
+    if "running summary" in system:
+        return _summary(messages)
+    transcript = _transcript(messages)
+    if "Memory Agent's executor" in system:
+        # One logged question per batch of search results
+        if transcript.count("✅ Added open question") < transcript.count("🔍 Search results for"):
+            return ("OPERATION: ADD_OPEN_QUESTION\n"
+                    "DETAILS: What is the population of Orlando?\npriority: high")
+        return "OPERATION: CONCLUDE_MEMORY_PROCESSING\nDETAILS: Finished processing"
+    if "executor for a general research agent" in system:
+        if "🔍 Search results for" not in transcript:
+            return "ROUTING: SEARCH - SEARCH:\n- population of Orlando\n- area of Orlando"
+        if "📊 Calculation:" not in transcript:
+            return "ROUTING: DATA_ANALYSIS - CALCULATION: 320000 / 110"
+        return "ROUTING: CONCLUSION - CONCLUSION: Orlando has about 2,900 people per square mile"
+    return "Work through the plan: search, record, calculate, conclude."
+
+
+RESPONDERS = {1: phase1_responder, 2: phase2_responder, 3: phase3_responder}
+
+
+def research_responder(phase: int) -> Callable:
+    return RESPONDERS[phase]
+
+
+def load_agent(phase: int, responder: Callable = None, latency: float = 0.0, cache=False,
+               stub: bool = True, tier_latency: dict = None, tiers_config: dict = None):
+    """Import phase<N>-agent.py and swap its model for a StubChatModel (uncached by default)
+
+    stub=False keeps the module's own ChatOpenAI, e.g. to record or replay cassettes.
+    For phase 3, tier_latency ({tier: seconds}) overrides `latency` per model tier
+    and tiers_config replaces the model_tiers.json mapping.
+    """
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ.setdefault("PERPLEXITY_API_KEY", "stub")
+    spec = importlib.util.spec_from_file_location(
+        f"phase{phase}_agent", ROOT / f"phase{phase}-agent.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not stub:
+        return module
+
+    responder = responder or research_responder(phase)
+    if hasattr(module, "model_tiers"):
+        module.model_tiers = ModelTiers(
+            tiers_config or module.model_tiers.config,
+            factory=lambda tier, settings: StubChatModel(
+                responder=responder, latency=(tier_latency or {}).get(tier, latency),
+                cache=cache, model_name=settings.get("model", "stub")))
+        return module
+
+    stub = StubChatModel(responder=responder, latency=latency, cache=cache)
+    module.llm = stub
+    if hasattr(module, "llm_with_tools"):
+        module.llm_with_tools = stub
+    return module
+
+
+@contextlib.contextmanager
+def stub_search_server():
+    """Run stub_perplexity_server.py in a subprocess and yield its URL"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / "stub_perplexity_server.py"), str(port)],
+        stdout=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", port)):
+                break
+            time.sleep(0.05)
+        yield f"http://127.0.0.1:{port}/chat/completions"
+    finally:
+        process.terminate()
+        process.wait()
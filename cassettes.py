@@ -0,0 +1,342 @@
+"""
+Cassettes - Record and replay the agents' OpenAI and Perplexity HTTP traffic
+Goal: Run, benchmark and regression-test the graphs offline with real recorded responses
+
+CASSETTE_MODE=record captures every chat model request/response (the httpx
+clients handed to ChatOpenAI) and every Perplexity search (search_client.py's
+requests session and httpx client) to CASSETTE_PATH, one JSON interaction
+per line. CASSETTE_MODE=replay serves them back without touching the network:
+- Requests are matched on method, URL path and canonical JSON body; repeated
+  identical requests get their recordings in order
+- A request with no exact match gets the next unused recording for the same
+  path (CASSETTE_MATCH=sequence, the default), which absorbs prompt details
+  such as timestamps; CASSETTE_MATCH=exact fails instead
+- CASSETTE_LATENCY adds latency: "recorded" sleeps as long as the original
+  call took, a number sleeps that many seconds per call, empty/0 adds none
+API keys and other request headers are never written to the cassette.
+
+As a stand-in server, replaying for `langgraph dev` or any other process:
+    python cassettes.py serve cassettes/ [--port 8765]
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+    PERPLEXITY_API_URL=http://127.0.0.1:8765/chat/completions
+
+Record the documented test questions with:
+    python benchmarks/run_benchmarks.py --record --cassettes cassettes/
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# Load environment variables
+load_dotenv()
+
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+CASSETTE_PATH = os.getenv("CASSETTE_PATH", "cassettes/default.jsonl")
+CASSETTE_MATCH = os.getenv("CASSETTE_MATCH", "sequence").lower()
+CASSETTE_LATENCY = os.getenv("CASSETTE_LATENCY", "")
+
+# Response headers that describe the original transfer, not the recorded body
+TRANSFER_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding",
+                              "connection", "keep-alive"})
+
+
+class CassetteMissError(RuntimeError):
+    """Raised in replay mode for a request the cassette has no recording for"""
+
+
+def canonical_body(body) -> str:
+    """Request body as stable text: JSON with sorted keys, else decoded as-is"""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    body = body or ""
+    try:
+        return json.dumps(json.loads(body), sort_keys=True)
+    except ValueError:
+        return body
+
+
+def interaction_key(method: str, url: str, body) -> str:
+    """Match key of a request - the host is ignored so the stand-in server matches too"""
+    path = urlsplit(url).path
+    return hashlib.sha256(
+        f"{method.upper()} {path}\x00{canonical_body(body)}".encode()).hexdigest()
+
+
+class Cassette:
+    """Recorded interactions of one or more cassette files"""
+
+    def __init__(self, path: str = CASSETTE_PATH, mode: str = CASSETTE_MODE,
+                 match: str = CASSETTE_MATCH, latency: str = CASSETTE_LATENCY):
+        self.path = path
+        self.mode = mode
+        self.match = match
+        self.latency = latency
+        self.hits = 0
+        self.sequence_hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._by_key = defaultdict(deque)
+        self._by_path = defaultdict(deque)
+        self._used = set()
+        if mode == "replay":
+            self.load(path)
+
+    def load(self, path: str):
+        """Load a cassette file, or every *.jsonl file in a directory"""
+        target = Path(path)
+        files = sorted(target.glob("*.jsonl")) if target.is_dir() else [target]
+        for file in files:
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        interaction = json.loads(line)
+                        self._by_key[interaction["key"]].append(interaction)
+                        self._by_path[urlsplit(interaction["request"]["url"]).path].append(
+                            interaction)
+
+    def play(self, method: str, url: str, body) -> dict:
+        """The recorded interaction for this request (raises CassetteMissError)"""
+        with self._lock:
+            candidates = self._by_key.get(interaction_key(method, url, body))
+            while candidates:
+                interaction = candidates.popleft()
+                if id(interaction) not in self._used:
+                    self._used.add(id(interaction))
+                    self.hits += 1
+                    return interaction
+
+            if self.match == "sequence":
+                candidates = self._by_path.get(urlsplit(url).path)
+                while candidates:
+                    interaction = candidates.popleft()
+                    if id(interaction) not in self._used:
+                        self._used.add(id(interaction))
+                        self.sequence_hits += 1
+                        return interaction
+
+            self.misses += 1
+        raise CassetteMissError(f"No recording for {method} {url} in {self.path}")
+
+    def record(self, method: str, url: str, body, status: int, headers, content: bytes,
+               duration: float):
+        """Append one interaction to the cassette file"""
+        interaction = {
+            "key": interaction_key(method, url, body),
+            "request": {"method": method.upper(), "url": url, "body": canonical_body(body)},
+            "response": {
+                "status": status,
+                "headers": {name.lower(): value for name, value in headers.items()
+                            if name.lower() == "content-type"},
+                "body": content.decode("utf-8", errors="replace")
+            },
+            "duration": round(duration, 4)
+        }
+        with self._lock:
+            if self._file is None:
+                # A recording session replaces the previous cassette
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write(json.dumps(interaction) + "\n")
+            self._file.flush()
+            self.recorded += 1
+
+    def delay(self, interaction: dict) -> float:
+        """Seconds to wait before serving a recorded response"""
+        if self.latency == "recorded":
+            return interaction.get("duration", 0.0)
+        try:
+            return float(self.latency or 0)
+        except ValueError:
+            return 0.0
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "hits": self.hits, "sequence_hits": self.sequence_hits,
+                "misses": self.misses, "recorded": self.recorded}
+
+
+def _replay_headers(interaction: dict) -> dict:
+    return interaction["response"]["headers"] or {"content-type": "application/json"}
+
+
+def _passthrough_headers(headers) -> dict:
+    return {name: value for name, value in headers.items()
+            if name.lower() not in TRANSFER_HEADERS}
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """httpx transport recording through, or replaying from, a cassette"""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self._transport = httpx.HTTPTransport() if cassette.mode == "record" else None
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        if self.cassette.mode == "replay":
+            interaction = self.cassette.play(request.method, str(request.url), body)
+            time.sleep(self.cassette.delay(interaction))
+            return httpx.Response(interaction["response"]["status"],
+                                  headers=_replay_headers(interaction),
+                                  content=interaction["response"]["body"].encode(),
+                                  request=request)
+
+        start = time.perf_counter()
+        response = self._transport.handle_request(request)
+        content = response.read()
+        self.cassette.record(request.method, str(request.url), body, response.status_code,
+                             response.headers, content, time.perf_counter() - start)
+        return httpx.Response(response.status_code,
+                              headers=_passthrough_headers(response.headers),
+                              content=content, request=request)
+
+    def close(self):
+        if self._transport is not None:
+            self._transport.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """Async twin of CassetteTransport"""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self._transport = httpx.AsyncHTTPTransport() if cassette.mode == "record" else None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        if self.cassette.mode == "replay":
+            interaction = self.cassette.play(request.method, str(request.url), body)
+            await asyncio.sleep(self.cassette.delay(interaction))
+            return httpx.Response(interaction["response"]["status"],
+                                  headers=_replay_headers(interaction),
+                                  content=interaction["response"]["body"].encode(),
+                                  request=request)
+
+        start = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        content = await response.aread()
+        self.cassette.record(request.method, str(request.url), body, response.status_code,
+                             response.headers, content, time.perf_counter() - start)
+        return httpx.Response(response.status_code,
+                              headers=_passthrough_headers(response.headers),
+                              content=content, request=request)
+
+    async def aclose(self):
+        if self._transport is not None:
+            await self._transport.aclose()
+
+
+class CassetteAdapter(HTTPAdapter):
+    """requests adapter recording through, or replaying from, a cassette"""
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        if self.cassette.mode == "replay":
+            interaction = self.cassette.play(request.method, request.url, request.body)
+            time.sleep(self.cassette.delay(interaction))
+            response = requests.Response()
+            response.status_code = interaction["response"]["status"]
+            response.headers = CaseInsensitiveDict(_replay_headers(interaction))
+            response._content = interaction["response"]["body"].encode()
+            response.encoding = "utf-8"
+            response.url = request.url
+            response.request = request
+            return response
+
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        self.cassette.record(request.method, request.url, request.body, response.status_code,
+                             response.headers, response.content, time.perf_counter() - start)
+        return response
+
+
+_default_cassette = None
+_default_cassette_lock = threading.Lock()
+
+
+def get_cassette():
+    """Return the process-wide cassette, or None when CASSETTE_MODE is off"""
+    global _default_cassette
+    if CASSETTE_MODE not in ("record", "replay"):
+        return None
+    with _default_cassette_lock:
+        if _default_cassette is None:
+            _default_cassette = Cassette()
+        return _default_cassette
+
+
+def serve(path: str, port: int = 8765, latency: str = CASSETTE_LATENCY,
+          match: str = CASSETTE_MATCH):
+    """Replay cassettes over HTTP as an OpenAI / Perplexity compatible stand-in"""
+    cassette = Cassette(path, mode="replay", match=match, latency=latency)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                interaction = cassette.play("POST", self.path, body)
+            except CassetteMissError as e:
+                error = json.dumps({"error": {"message": str(e), "type": "cassette_miss"}})
+                self._reply(404, {"content-type": "application/json"}, error.encode())
+                return
+            time.sleep(cassette.delay(interaction))
+            self._reply(interaction["response"]["status"], _replay_headers(interaction),
+                        interaction["response"]["body"].encode())
+
+        def do_GET(self):
+            self._reply(200, {"content-type": "application/json"},
+                        json.dumps(cassette.stats()).encode())
+
+        def _reply(self, status, headers, content):
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"📼 Replaying {path} at http://127.0.0.1:{port}")
+    print(f"   OPENAI_BASE_URL=http://127.0.0.1:{port}/v1")
+    print(f"   PERPLEXITY_API_URL=http://127.0.0.1:{port}/chat/completions")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        print(f"📊 {cassette.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded cassettes over HTTP")
+    parser.add_argument("command", choices=["serve"])
+    parser.add_argument("path", help="cassette file or directory of *.jsonl cassettes")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default=CASSETTE_LATENCY,
+                        help='"recorded", seconds per call, or empty for none')
+    parser.add_argument("--match", default=CASSETTE_MATCH, choices=["exact", "sequence"])
+    args = parser.parse_args()
+    serve(args.path, args.port, args.latency, args.match)
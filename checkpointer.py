@@ -0,0 +1,538 @@
+"""
+Checkpointer - Compressed SQLite checkpoint saver with retention for long-running servers
+Goal: A kiosk running `langgraph dev` all day keeps flat memory and bounded disk
+
+langgraph.json points the server at create_checkpointer(), replacing the
+in-memory saver behind .langgraph_api/.langgraph_checkpoint.*.pckl (every
+checkpoint of every thread, held in memory and pickled whole) with one
+SQLite file (CHECKPOINT_PATH):
+- Channel values are stored once per content hash and checkpoints only
+  reference them, so a value that did not change between steps - or is the
+  same in several threads - is written once
+- Checkpoints, channel values and pending writes are compressed with zstd
+  (zlib when the zstandard package is missing, or CHECKPOINT_COMPRESSION=none).
+  Every stored value names its codec, so changing the setting never breaks
+  reading older rows
+- Retention: a thread keeps its newest CHECKPOINT_KEEP_LAST checkpoints per
+  namespace, and threads idle for CHECKPOINT_THREAD_TTL_HOURS are deleted.
+  It runs every CHECKPOINT_RETENTION_EVERY checkpoint writes, when the
+  server prunes a thread, and from the command line
+- research_document is a DeltaChannel (see research_document.py): checkpoints
+  hold its writes, not its value. Before older checkpoints are dropped, the
+  oldest kept one gets a snapshot of the document so it can still be rebuilt
+
+Usage:
+    python checkpointer.py stats
+    python checkpointer.py compact [--keep-last N] [--ttl-hours H]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+
+from dotenv import load_dotenv
+from langgraph.checkpoint.base import (WRITES_IDX_MAP, BaseCheckpointSaver,
+                                       CheckpointTuple, get_checkpoint_id,
+                                       get_checkpoint_metadata, writes_sort_key)
+from langgraph.checkpoint.serde.types import _DeltaSnapshot
+
+from research_document import apply_research_document_deltas
+
+try:
+    import zstandard
+except ImportError:  # zlib is always there
+    zstandard = None
+
+# Load environment variables
+load_dotenv()
+
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", ".checkpoints.sqlite3")
+CHECKPOINT_COMPRESSION = os.getenv("CHECKPOINT_COMPRESSION", "zstd").lower()
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "20"))
+CHECKPOINT_THREAD_TTL_HOURS = float(os.getenv("CHECKPOINT_THREAD_TTL_HOURS", "24"))
+CHECKPOINT_RETENTION_EVERY = int(os.getenv("CHECKPOINT_RETENTION_EVERY", "100"))
+
+# DeltaChannel channels and the reducer that folds their writes into a value
+DELTA_REDUCERS = {"research_document": apply_research_document_deltas}
+
+# One-byte prefix naming the codec of every stored value
+CODEC_PREFIXES = {"zstd": b"Z", "zlib": b"D", "none": b"-"}
+
+
+def compress(data: bytes, codec: str = CHECKPOINT_COMPRESSION) -> bytes:
+    if codec == "zstd" and zstandard is None:
+        codec = "zlib"
+    if codec == "zstd":
+        return b"Z" + zstandard.ZstdCompressor(level=3).compress(data)
+    if codec == "zlib":
+        return b"D" + zlib.compress(data, 6)
+    return b"-" + data
+
+
+def decompress(data: bytes) -> bytes:
+    prefix, payload = data[:1], data[1:]
+    if prefix == b"Z":
+        if zstandard is None:
+            raise RuntimeError("Checkpoint was written with zstd; pip install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if prefix == b"D":
+        return zlib.decompress(payload)
+    return payload
+
+
+def _pack(typed: tuple) -> bytes:
+    """serde's (type, bytes) pair as one byte string"""
+    return typed[0].encode() + b"\x00" + typed[1]
+
+
+def _unpack(data: bytes) -> tuple:
+    type_name, _, payload = data.partition(b"\x00")
+    return type_name.decode(), payload
+
+
+class CompressedSqliteSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpoint saver over one SQLite file, compressed and content-addressed"""
+
+    def __init__(self, path: str = CHECKPOINT_PATH, *, compression: str = CHECKPOINT_COMPRESSION,
+                 keep_last: int = CHECKPOINT_KEEP_LAST,
+                 thread_ttl_hours: float = CHECKPOINT_THREAD_TTL_HOURS,
+                 retention_every: int = CHECKPOINT_RETENTION_EVERY,
+                 delta_reducers: dict = None, serde=None):
+        super().__init__(serde=serde)
+        self.path = path
+        self.compression = compression
+        self.keep_last = keep_last
+        self.thread_ttl_hours = thread_ttl_hours
+        self.retention_every = retention_every
+        self.delta_reducers = DELTA_REDUCERS if delta_reducers is None else delta_reducers
+        self._puts = 0
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                # A power cut may lose the last step, never corrupt the file
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL,
+                    checkpoint_id TEXT NOT NULL,
+                    parent_checkpoint_id TEXT,
+                    run_id TEXT,
+                    checkpoint BLOB NOT NULL,
+                    metadata BLOB NOT NULL,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+                );
+                -- hash is NULL when the channel was empty at that version
+                CREATE TABLE IF NOT EXISTS channel_versions (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL,
+                    channel TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    hash TEXT,
+                    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+                );
+                CREATE TABLE IF NOT EXISTS blobs (
+                    hash TEXT PRIMARY KEY,
+                    data BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS writes (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL,
+                    checkpoint_id TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    channel TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    task_path TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                );
+                CREATE TABLE IF NOT EXISTS threads (
+                    thread_id TEXT PRIMARY KEY,
+                    updated REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS checkpoints_run ON checkpoints (run_id);
+                CREATE INDEX IF NOT EXISTS channel_versions_hash ON channel_versions (hash);
+                CREATE INDEX IF NOT EXISTS threads_updated ON threads (updated);
+            """)
+
+    # ------------------------------------------------------------------ storage
+
+    def _dump(self, value) -> bytes:
+        return compress(_pack(self.serde.dumps_typed(value)), self.compression)
+
+    def _load(self, data: bytes):
+        return self.serde.loads_typed(_unpack(decompress(data)))
+
+    def _put_blob(self, value) -> str:
+        """Store a channel value once per content hash and return the hash"""
+        packed = _pack(self.serde.dumps_typed(value))
+        digest = hashlib.sha256(packed).hexdigest()
+        if self._conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is None:
+            self._conn.execute("INSERT INTO blobs VALUES (?, ?)",
+                               (digest, compress(packed, self.compression)))
+        return digest
+
+    def _load_values(self, thread_id: str, checkpoint_ns: str, versions: dict) -> dict:
+        if not versions:
+            return {}
+        pairs = list(versions.items())
+        rows = self._conn.execute(f"""
+            SELECT cv.channel, b.data FROM channel_versions cv JOIN blobs b ON b.hash = cv.hash
+            WHERE cv.thread_id = ? AND cv.checkpoint_ns = ?
+              AND (cv.channel, cv.version) IN (VALUES {", ".join(["(?, ?)"] * len(pairs))})""",
+            [thread_id, checkpoint_ns, *(str(part) for pair in pairs for part in pair)])
+        return {channel: self._load(data) for channel, data in rows}
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
+        rows = self._conn.execute("""
+            SELECT task_id, idx, channel, value, task_path FROM writes
+            WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?""",
+            (thread_id, checkpoint_ns, checkpoint_id)).fetchall()
+        rows.sort(key=lambda row: writes_sort_key(row[4], row[0], row[1]))
+        return [(task_id, channel, self._load(value)) for task_id, _, channel, value, _ in rows]
+
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, checkpoint_data, metadata_data = row
+        checkpoint = self._load(checkpoint_data)
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": self._load_values(
+                thread_id, checkpoint_ns, checkpoint["channel_versions"])},
+            metadata=self._load(metadata_data),
+            parent_config=({"configurable": {"thread_id": thread_id,
+                                             "checkpoint_ns": checkpoint_ns,
+                                             "checkpoint_id": parent_checkpoint_id}}
+                           if parent_checkpoint_id else None),
+            pending_writes=self._load_writes(thread_id, checkpoint_ns, checkpoint_id))
+
+    # --------------------------------------------------------- saver interface
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = """
+            SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints
+            WHERE thread_id = ? AND checkpoint_ns = ?"""
+        params = [thread_id, checkpoint_ns]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            return self._tuple(thread_id, checkpoint_ns, row) if row else None
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        query = """
+            SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint,
+                   metadata FROM checkpoints WHERE 1 = 1"""
+        params = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self._load(row[3])
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                checkpoint_tuple = self._tuple(thread_id, checkpoint_ns, row)
+            # Yield outside the lock: a caller that stops iterating must not hold it
+            yield checkpoint_tuple
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        metadata = get_checkpoint_metadata(config, metadata)
+
+        with self._lock, self._conn:
+            for channel, version in new_versions.items():
+                digest = self._put_blob(values[channel]) if channel in values else None
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO channel_versions VALUES (?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), digest))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"],
+                 config["configurable"].get("checkpoint_id"), metadata.get("run_id"),
+                 self._dump(stored), self._dump(metadata)))
+            self._conn.execute("INSERT OR REPLACE INTO threads VALUES (?, ?)",
+                               (thread_id, time.time()))
+
+        self._puts += 1
+        if self.retention_every and self._puts % self.retention_every == 0:
+            self.apply_retention()
+
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special writes (errors, interrupts) replace earlier ones; others are kept once
+        verb = "INSERT OR REPLACE" if all(w[0] in WRITES_IDX_MAP for w in writes) else "INSERT OR IGNORE"
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(thread_id, checkpoint_ns, checkpoint_id, task_id,
+                  WRITES_IDX_MAP.get(channel, idx), channel, self._dump(value), task_path)
+                 for idx, (channel, value) in enumerate(writes)])
+
+    def delete_thread(self, thread_id: str):
+        with self._lock, self._conn:
+            for table in ("checkpoints", "channel_versions", "writes", "threads"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def delete_for_runs(self, run_ids):
+        run_ids = [str(run_id) for run_id in run_ids]
+        if not run_ids:
+            return
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id FROM checkpoints "
+                f"WHERE run_id IN ({', '.join('?' * len(run_ids))})", run_ids).fetchall()
+            for table in ("checkpoints", "writes"):
+                self._conn.executemany(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "AND checkpoint_id = ?", rows)
+
+    def copy_thread(self, source_thread_id: str, target_thread_id: str):
+        with self._lock, self._conn:
+            for table, columns in (
+                    ("checkpoints", "checkpoint_ns, checkpoint_id, parent_checkpoint_id, run_id, "
+                                    "checkpoint, metadata"),
+                    ("channel_versions", "checkpoint_ns, channel, version, hash"),
+                    ("writes", "checkpoint_ns, checkpoint_id, task_id, idx, channel, value, "
+                               "task_path")):
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {table} SELECT ?, {columns} FROM {table} "
+                    "WHERE thread_id = ?", (target_thread_id, source_thread_id))
+            self._conn.execute("INSERT OR REPLACE INTO threads VALUES (?, ?)",
+                               (target_thread_id, time.time()))
+
+    def prune(self, thread_ids, *, strategy: str = "keep_latest"):
+        for thread_id in thread_ids:
+            if strategy == "keep_latest":
+                with self._lock, self._conn:
+                    for (checkpoint_ns,) in self._conn.execute(
+                            "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?",
+                            (str(thread_id),)).fetchall():
+                        self._retain(str(thread_id), checkpoint_ns, 1)
+            else:
+                self.delete_thread(str(thread_id))
+
+    def get_next_version(self, current, channel=None) -> str:
+        # Same scheme as LangGraph's InMemorySaver: zero-padded counter + random tiebreak
+        current_v = 0 if current is None else int(str(current).split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # The server's event loop forbids blocking calls, so SQLite work runs in a thread
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        checkpoint_tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str):
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def adelete_for_runs(self, run_ids):
+        await asyncio.to_thread(self.delete_for_runs, run_ids)
+
+    async def acopy_thread(self, source_thread_id: str, target_thread_id: str):
+        await asyncio.to_thread(self.copy_thread, source_thread_id, target_thread_id)
+
+    async def aprune(self, thread_ids, *, strategy: str = "keep_latest"):
+        await asyncio.to_thread(self.prune, thread_ids, strategy=strategy)
+
+    async def aget_delta_channel_history(self, *, config, channels):
+        return await asyncio.to_thread(
+            lambda: self.get_delta_channel_history(config=config, channels=channels))
+
+    # ---------------------------------------------------------------- retention
+
+    def _snapshot_delta_channels(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        """Store the value of each delta channel at a checkpoint whose ancestors will be dropped"""
+        config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                   "checkpoint_id": checkpoint_id}}
+        checkpoint = self.get_tuple(config).checkpoint
+        versions = checkpoint["channel_versions"]
+        channels = [channel for channel in self.delta_reducers
+                    if channel in versions and channel not in checkpoint["channel_values"]]
+        if not channels:
+            return
+        history = self.get_delta_channel_history(config=config, channels=channels)
+        for channel in channels:
+            seed = history[channel].get("seed")
+            if isinstance(seed, _DeltaSnapshot):
+                seed = seed.value
+            writes = [value for _, _, value in history[channel]["writes"]]
+            if seed is None and not writes:
+                continue
+            value = self.delta_reducers[channel](seed if seed is not None else {}, writes)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO channel_versions VALUES (?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, channel, str(versions[channel]),
+                 self._put_blob(_DeltaSnapshot(value))))
+
+    def _retain(self, thread_id: str, checkpoint_ns: str, keep: int) -> int:
+        """Drop all but the newest `keep` checkpoints of one thread namespace"""
+        rows = self._conn.execute("""
+            SELECT checkpoint_id, parent_checkpoint_id, checkpoint FROM checkpoints
+            WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC""",
+            (thread_id, checkpoint_ns)).fetchall()
+        if keep <= 0 or len(rows) <= keep:
+            return 0
+        kept, dropped = rows[:keep], {row[0] for row in rows[keep:]}
+
+        # Kept checkpoints whose parent goes become roots holding their own snapshot
+        for checkpoint_id, parent_checkpoint_id, _ in kept:
+            if parent_checkpoint_id in dropped:
+                self._snapshot_delta_channels(thread_id, checkpoint_ns, checkpoint_id)
+                self._conn.execute("""
+                    UPDATE checkpoints SET parent_checkpoint_id = NULL
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?""",
+                    (thread_id, checkpoint_ns, checkpoint_id))
+
+        for table in ("checkpoints", "writes"):
+            self._conn.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND checkpoint_id = ?",
+                [(thread_id, checkpoint_ns, checkpoint_id) for checkpoint_id in dropped])
+
+        # Channel versions no kept checkpoint refers to
+        referenced = {(channel, str(version)) for _, _, data in kept
+                      for channel, version in self._load(data)["channel_versions"].items()}
+        stale = [(thread_id, checkpoint_ns, channel, version)
+                 for channel, version in self._conn.execute(
+                     "SELECT channel, version FROM channel_versions "
+                     "WHERE thread_id = ? AND checkpoint_ns = ?", (thread_id, checkpoint_ns))
+                 if (channel, version) not in referenced]
+        self._conn.executemany(
+            "DELETE FROM channel_versions WHERE thread_id = ? AND checkpoint_ns = ? "
+            "AND channel = ? AND version = ?", stale)
+        return len(dropped)
+
+    def apply_retention(self, keep_last: int = None, thread_ttl_hours: float = None) -> dict:
+        """Delete idle threads and old checkpoints, then blobs nothing refers to"""
+        keep_last = self.keep_last if keep_last is None else keep_last
+        thread_ttl_hours = self.thread_ttl_hours if thread_ttl_hours is None else thread_ttl_hours
+        result = {"threads_expired": 0, "checkpoints_dropped": 0, "blobs_dropped": 0}
+
+        with self._lock, self._conn:
+            if thread_ttl_hours > 0:
+                expired = [row[0] for row in self._conn.execute(
+                    "SELECT thread_id FROM threads WHERE updated < ?",
+                    (time.time() - thread_ttl_hours * 3600,))]
+                for thread_id in expired:
+                    self.delete_thread(thread_id)
+                result["threads_expired"] = len(expired)
+
+            if keep_last > 0:
+                for thread_id, checkpoint_ns in self._conn.execute("""
+                        SELECT thread_id, checkpoint_ns FROM checkpoints
+                        GROUP BY thread_id, checkpoint_ns HAVING COUNT(*) > ?""",
+                        (keep_last,)).fetchall():
+                    result["checkpoints_dropped"] += self._retain(
+                        thread_id, checkpoint_ns, keep_last)
+
+            result["blobs_dropped"] = self._conn.execute("""
+                DELETE FROM blobs WHERE hash NOT IN (
+                    SELECT hash FROM channel_versions WHERE hash IS NOT NULL)""").rowcount
+        return result
+
+    def compact(self, keep_last: int = None, thread_ttl_hours: float = None) -> dict:
+        """apply_retention(), then VACUUM so the file shrinks"""
+        before = self.file_size()
+        result = self.apply_retention(keep_last, thread_ttl_hours)
+        with self._lock:
+            self._conn.execute("VACUUM")
+            # VACUUM goes through the WAL; fold it back into the main file
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {**result, "bytes_before": before, "bytes_after": self.file_size()}
+
+    def file_size(self) -> int:
+        if self.path == ":memory:":
+            return 0
+        return sum(os.path.getsize(self.path + suffix) for suffix in ("", "-wal")
+                   if os.path.exists(self.path + suffix))
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                      for table in ("threads", "checkpoints", "channel_versions", "blobs",
+                                    "writes")}
+            (blob_bytes,) = self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+        return {**counts, "blob_bytes": blob_bytes, "file_bytes": self.file_size()}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_checkpointer() -> CompressedSqliteSaver:
+    """Checkpointer factory for langgraph.json ("checkpointer": {"path": ...})"""
+    return CompressedSqliteSaver()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or compact the checkpoint database")
+    parser.add_argument("command", choices=["stats", "compact"])
+    parser.add_argument("--path", default=CHECKPOINT_PATH)
+    parser.add_argument("--keep-last", type=int, default=CHECKPOINT_KEEP_LAST,
+                        help="checkpoints kept per thread namespace (0 keeps all)")
+    parser.add_argument("--ttl-hours", type=float, default=CHECKPOINT_THREAD_TTL_HOURS,
+                        help="delete threads idle this long (0 keeps them)")
+    args = parser.parse_args()
+
+    saver = CompressedSqliteSaver(args.path, retention_every=0)
+    if args.command == "compact":
+        result = saver.compact(args.keep_last, args.ttl_hours)
+        print(f"🧹 Compacted {args.path}: {result['threads_expired']} idle threads, "
+              f"{result['checkpoints_dropped']} checkpoints, {result['blobs_dropped']} blobs "
+              f"removed ({result['bytes_before'] / 1024:.0f} KiB -> "
+              f"{result['bytes_after'] / 1024:.0f} KiB)")
+    else:
+        for key, value in saver.stats().items():
+            print(f"   {key}: {value}")
+    saver.close()
@@ -0,0 +1,138 @@
+"""
+Conversation Context - Rolling summarization for reasoner prompts
+Goal: Keep reasoner prompt size bounded no matter how many steps a run takes
+
+Implements the "Smart Context Management / Message Summary Strategy" from
+docs/feature_ledgers/memory-management-agent.md:
+- The current user request (the latest human message) is always sent verbatim;
+  in a multi-turn thread the thread's first request is sent along as context
+- The most recent RECENT_MESSAGE_WINDOW messages are sent verbatim
+- Everything older is folded into a running summary kept in AgentState
+
+The summary is updated incrementally: once SUMMARY_BATCH_SIZE messages have
+aged out of the recent window, they are merged into the existing summary with
+one LLM call. Older messages are never re-sent after they are summarized.
+"""
+
+import os
+
+from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from graph_nodes import without_token_stream
+
+# Load environment variables
+load_dotenv()
+
+# Number of most recent messages passed to the reasoner verbatim
+RECENT_MESSAGE_WINDOW = int(os.getenv("RECENT_MESSAGE_WINDOW", "10"))
+
+# Number of aged-out messages folded into the summary per summarization call
+SUMMARY_BATCH_SIZE = int(os.getenv("SUMMARY_BATCH_SIZE", "5"))
+
+
+def build_summary_prompt(summary: str, messages: list) -> str:
+    new_messages = "\n".join(f"- {msg.content}" for msg in messages)
+
+    return f"""You maintain a running summary of an agent's working conversation.
+
+    Current summary:
+    {summary or "(empty - this is the start of the conversation)"}
+
+    New messages to fold into the summary:
+    {new_messages}
+
+    Write the updated summary. Keep it concise, but preserve:
+    1. Every concrete number, search result and calculation result
+    2. Decisions taken and tools used
+    3. Anything that is still unresolved
+
+    Respond with the updated summary only."""
+
+
+def summarize_messages(llm, summary: str, messages: list) -> str:
+    """Merge a batch of messages into the running conversation summary"""
+    summary_response = without_token_stream(llm).invoke(
+        [SystemMessage(content=build_summary_prompt(summary, messages))])
+    return summary_response.content
+
+
+async def asummarize_messages(llm, summary: str, messages: list) -> str:
+    """Async version of summarize_messages()"""
+    summary_response = await without_token_stream(llm).ainvoke(
+        [SystemMessage(content=build_summary_prompt(summary, messages))])
+    return summary_response.content
+
+
+def _pending_batch(state: dict) -> tuple:
+    """Return (summary, summarized_count, cutoff); cutoff is None if no summary update is due"""
+    summary = state.get("conversation_summary", "")
+    summarized_count = state.get("summarized_message_count", 0)
+
+    # Only summarize once a full batch has aged out of the recent window so
+    # the summarizer runs once per SUMMARY_BATCH_SIZE messages, not every turn
+    cutoff = len(state["messages"]) - RECENT_MESSAGE_WINDOW
+    if cutoff - summarized_count >= SUMMARY_BATCH_SIZE:
+        return summary, summarized_count, cutoff
+    return summary, summarized_count, None
+
+
+def _format_context(messages: list, summary: str, summarized_count: int) -> str:
+    if not summarized_count:
+        return str([msg.content for msg in messages])
+
+    # Keep the user's current request pinned even after it has been summarized;
+    # in a follow-up turn that is the latest human message, not the first
+    requests = [msg.content for msg in messages if isinstance(msg, HumanMessage)]
+    current_request = requests[-1] if requests else ""
+    first_request = ""
+    if len(requests) > 1 and requests[0] != current_request:
+        first_request = f"\n    First request in this conversation (context only): {requests[0]}"
+    recent = [msg.content for msg in messages[summarized_count:]]
+
+    return f"""
+    Current request: {current_request}{first_request}
+    Summary of earlier conversation ({summarized_count} messages): {summary}
+    Most recent messages: {recent}"""
+
+
+def build_conversation_context(state: dict, llm) -> tuple:
+    """
+    Build the conversation text for a reasoner prompt.
+
+    Returns (context_text, state_update). state_update is empty unless the
+    running summary advanced, in which case the reasoner node should merge it
+    into its own return value.
+    """
+    messages = state["messages"]
+    summary, summarized_count, cutoff = _pending_batch(state)
+
+    state_update = {}
+    if cutoff is not None:
+        summary = summarize_messages(
+            llm, summary, messages[summarized_count:cutoff])
+        summarized_count = cutoff
+        state_update = {
+            "conversation_summary": summary,
+            "summarized_message_count": summarized_count
+        }
+
+    return _format_context(messages, summary, summarized_count), state_update
+
+
+async def abuild_conversation_context(state: dict, llm) -> tuple:
+    """Async version of build_conversation_context()"""
+    messages = state["messages"]
+    summary, summarized_count, cutoff = _pending_batch(state)
+
+    state_update = {}
+    if cutoff is not None:
+        summary = await asummarize_messages(
+            llm, summary, messages[summarized_count:cutoff])
+        summarized_count = cutoff
+        state_update = {
+            "conversation_summary": summary,
+            "summarized_message_count": summarized_count
+        }
+
+    return _format_context(messages, summary, summarized_count), state_update
@@ -0,0 +1,99 @@
+"""
+Fused Reasoning - One LLM call per reasoner/executor step
+Goal: Stop paying a second LLM call for the executor to restate the reasoner's decision
+
+With FUSED_REASONING enabled, each reasoner node makes a single call that
+returns both its reasoning and the executor's action:
+- Phase 1/2 (tool-calling executors): the reasoning is the message text and
+  the action is the tool call made in the same response
+- Phase 3 (text directives): a structured FusedDecision with `reasoning` and
+  the `directive` line the executor prompt asks for (CALCULATION:, SEARCH:,
+  ROUTING: ..., OPERATION: ...)
+
+The reasoner node still only emits its reasoning message; the action is
+parked in the `fused_action` state field. The executor node then emits that
+message without calling the LLM, so the graph, its edges and the Studio view
+are unchanged: one reasoner update followed by one executor update.
+"""
+
+import os
+
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel, Field
+
+# Load environment variables
+load_dotenv()
+
+FUSED_REASONING = os.getenv(
+    "FUSED_REASONING", "false").lower() in ("1", "true", "yes")
+
+FINAL_ANSWER_MARKER = "FINAL ANSWER:"
+
+
+class FusedDecision(BaseModel):
+    """Reasoning for the next step plus the executor directive that carries it out"""
+
+    reasoning: str = Field(
+        description="Step-by-step reasoning about what to do next")
+    directive: str = Field(
+        description="The exact response the executor would give, in the executor's format")
+
+
+def build_fused_tool_prompt(reasoning_prompt: str) -> str:
+    """Reasoner prompt for tool-calling graphs where the same response takes the action"""
+    return f"""{reasoning_prompt}
+
+    You are also the executor for this step. In this one response:
+    1. Write your reasoning as the message text
+    2. Make the tool call your reasoning recommends (or all of them, if it
+       recommends several independent calls - they run in parallel)
+    If no tool is needed because you can answer, make no tool call and end
+    your message with "{FINAL_ANSWER_MARKER} <answer>".
+    """
+
+
+def build_fused_directive_prompt(reasoning_prompt: str, executor_prompt: str) -> str:
+    """Reasoner prompt for directive graphs, returning a FusedDecision"""
+    return f"""{reasoning_prompt}
+
+    You are also the executor for this step. Put your reasoning in `reasoning`,
+    then put the executor's response for that reasoning in `directive`.
+    The executor's instructions (treat your own reasoning as "the reasoner"):
+
+{executor_prompt}
+    """
+
+
+def split_tool_response(response: AIMessage) -> tuple:
+    """Split a fused tool-calling response into (reasoning_msg, action_msg)"""
+    content = response.content if isinstance(response.content, str) else ""
+
+    if response.tool_calls:
+        # Models sometimes skip the text when calling a tool; keep the step readable
+        reasoning = content.strip() or "Next step: " + ", ".join(
+            f"{call['name']}({call['args']})" for call in response.tool_calls)
+        action = AIMessage(content="", tool_calls=response.tool_calls,
+                           usage_metadata=response.usage_metadata)
+        return AIMessage(content=reasoning), action
+
+    reasoning, _, answer = content.partition(FINAL_ANSWER_MARKER)
+    if not answer:
+        return AIMessage(content=content), AIMessage(content=content)
+    return AIMessage(content=reasoning.strip() or content), AIMessage(content=answer.strip())
+
+
+def split_directive_decision(decision: FusedDecision) -> tuple:
+    """Split a FusedDecision into (reasoning_msg, action_msg)"""
+    return AIMessage(content=decision.reasoning), AIMessage(content=decision.directive)
+
+
+def take_fused_action(state: dict):
+    """Executor state update emitting the action parked by a fused reasoner, or None"""
+    action = state.get("fused_action")
+    if action is None:
+        return None
+    return {
+        "messages": [action],
+        "fused_action": None
+    }
@@ -0,0 +1,51 @@
+"""
+Graph Nodes - Shared helpers for registering LangGraph nodes
+Goal: Every node runs natively under both app.invoke() and app.ainvoke()
+
+dual_node() pairs a sync node function with its async twin so LangGraph calls
+the sync version from invoke()/stream() and awaits the async version from
+ainvoke()/astream() (which is what `langgraph dev` uses). Nodes that do no
+I/O get an inline async wrapper, so async runs never hop to a worker thread.
+
+send_tool_calls() fans every tool call in a message out to its per-tool node.
+
+Chat model calls inside a node stream their tokens to stream_mode="messages"
+and astream_events clients on their own (LangGraph attaches a streaming
+callback, and the model then streams). without_token_stream() keeps a call's
+tokens out of the messages stream - for executor directives, summaries and
+structured output, which are not text for the user.
+"""
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.types import Send
+
+
+def dual_node(func, afunc=None) -> RunnableLambda:
+    """Wrap a sync node function and its async twin as a single graph node"""
+    if afunc is None:
+        async def afunc(state):
+            # Pure CPU work - cheaper to run inline than in the thread pool
+            return func(state)
+
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
+
+
+def without_token_stream(model):
+    """`model` with its token chunks left out of stream_mode="messages" (the node's result still streams)"""
+    return model.with_config(tags=[TAG_NOSTREAM])
+
+
+def send_tool_calls(message, tool_nodes) -> list:
+    """
+    One Send per tool call in `message`, addressed to the node of the same name.
+
+    Each node gets a copy of the message carrying only its own call, so calls to
+    different tools (or several to one tool) all run in the same graph step.
+    LangGraph applies their ToolMessages in Send order, i.e. the order of
+    message.tool_calls. Calls to tools without a node are skipped.
+    """
+    return [Send(call["name"], {"messages": [AIMessage(content="", tool_calls=[call])]})
+            for call in getattr(message, "tool_calls", None) or []
+            if call.get("name") in tool_nodes]
@@ -0,0 +1,369 @@
+"""
+Hedging - Duplicate slow model requests of chosen nodes and take whichever answers first
+Goal: Cut p99 step latency caused by the occasional very slow OpenAI response
+
+Opt-in per graph node: HEDGE_NODES is a comma-separated list of node names
+("*" for all), each optionally with its own percentile, e.g.
+    HEDGE_NODES=orchestrator_executor,memory_agent_executor:0.9
+For a listed node, a chat completions request that has not come back after
+the node's HEDGE_PERCENTILE of recent latency (the last HEDGE_WINDOW requests,
+once HEDGE_MIN_SAMPLES are known, never below HEDGE_MIN_DELAY) gets a second,
+identical request. The first usable response wins; the other request is
+cancelled (async) or discarded when it finishes (sync). Only use it for nodes
+whose calls are short and safe to send twice - each hedge is billed.
+
+A sync request can't be interrupted, so each copy of a hedged sync request
+runs on its own thread and holds it until the request finishes, even after
+the other copy has won. Losers never queue later requests behind them, but
+they keep their connection and rate limiter reservation until they land.
+
+Hedging happens at the HTTP layer of the shared ChatOpenAI client (see
+rate_limiter.openai_http_clients), so the model cache, callbacks and metrics
+above it see one call. Both requests go through the rate limiter. Streamed
+requests and calls from other nodes pass straight through.
+
+Every hedged-node request's latency and whether it was hedged go to
+metrics.py (agent_llm_request_seconds, agent_llm_hedges_total).
+
+    python hedging.py report [metrics.jsonl]   # hedge rate and latency per node
+    python hedging.py                          # demo against a slow-tailed stub
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+import httpx
+from dotenv import load_dotenv
+
+from metrics import METRICS_PATH, current_node, percentile, record_llm_request
+
+# Load environment variables
+load_dotenv()
+
+HEDGE_NODES = os.getenv("HEDGE_NODES", "")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_WINDOW = int(os.getenv("HEDGE_WINDOW", "200"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.25"))
+
+
+def parse_hedge_nodes(spec: str, default_percentile: float = HEDGE_PERCENTILE) -> dict:
+    """"node[:percentile],..." -> {node: percentile}"""
+    nodes = {}
+    for item in spec.split(","):
+        name, _, value = item.strip().partition(":")
+        if name:
+            nodes[name.strip()] = float(value) if value else default_percentile
+    return nodes
+
+
+def _usable(response: httpx.Response) -> bool:
+    """A response worth returning instead of waiting for the other request"""
+    return response.status_code != 429 and response.status_code < 500
+
+
+def _hedgeable(request: httpx.Request) -> bool:
+    if request.method != "POST":
+        return False
+    try:
+        return not json.loads(request.content or b"{}").get("stream")
+    except ValueError:
+        return False
+
+
+class HedgePolicy:
+    """Per-node hedge delays from a window of recent latencies, plus hedge counters"""
+
+    def __init__(self, nodes: dict, min_samples: int = HEDGE_MIN_SAMPLES,
+                 window: int = HEDGE_WINDOW, min_delay: float = HEDGE_MIN_DELAY):
+        self.nodes = nodes
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._latencies = defaultdict(lambda: deque(maxlen=window))
+        self._counts = defaultdict(lambda: {"requests": 0, "hedged": 0, "hedge_wins": 0})
+        self._lock = threading.Lock()
+
+    def covers(self, node: str) -> bool:
+        return node in self.nodes or ("*" in self.nodes and bool(node))
+
+    def delay(self, node: str):
+        """Seconds to wait before hedging a request of `node`, None while too few samples"""
+        with self._lock:
+            latencies = list(self._latencies[node])
+        if len(latencies) < self.min_samples:
+            return None
+        fraction = self.nodes.get(node, self.nodes.get("*", HEDGE_PERCENTILE))
+        return max(self.min_delay, percentile(latencies, fraction))
+
+    def observe(self, node: str, seconds: float, primary_seconds: float, hedged: bool,
+                hedge_won: bool):
+        """Record a finished request: what the caller waited, and how long the first copy took"""
+        with self._lock:
+            # The window holds first-copy latencies, so hedging doesn't lower its own bar;
+            # a first copy that lost counts with the time it had taken so far
+            self._latencies[node].append(primary_seconds)
+            counts = self._counts[node]
+            counts["requests"] += 1
+            counts["hedged"] += hedged
+            counts["hedge_wins"] += hedge_won
+        record_llm_request(node, seconds, hedged, hedge_won)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {node: {**counts, "hedge_rate": round(counts["hedged"] / counts["requests"], 3)}
+                    for node, counts in self._counts.items() if counts["requests"]}
+
+
+_default_policy = None
+_default_policy_lock = threading.Lock()
+
+
+def get_hedge_policy():
+    """Return the process-wide hedge policy, or None when HEDGE_NODES is empty"""
+    global _default_policy
+    nodes = parse_hedge_nodes(HEDGE_NODES)
+    if not nodes:
+        return None
+    with _default_policy_lock:
+        if _default_policy is None:
+            _default_policy = HedgePolicy(nodes)
+        return _default_policy
+
+
+class HedgedTransport(httpx.BaseTransport):
+    """httpx transport that sends a second copy of a slow request and returns the first answer"""
+
+    def __init__(self, policy: HedgePolicy, transport: httpx.BaseTransport = None):
+        self.policy = policy
+        self._transport = transport or httpx.HTTPTransport()
+
+    def _send(self, request: httpx.Request) -> tuple:
+        start = time.monotonic()
+        response = self._transport.handle_request(request)
+        try:
+            response.read()
+        except BaseException:
+            response.close()
+            raise
+        return response, time.monotonic() - start
+
+    def _submit(self, request: httpx.Request) -> Future:
+        """
+        Send `request` on a thread of its own, so a loser still waiting on a slow
+        response never delays later requests (a shared pool would queue them)
+        """
+        attempt, context = Future(), contextvars.copy_context()
+
+        def run():
+            # Keep the node's context for the layers below
+            try:
+                attempt.set_result(context.run(self._send, request))
+            except BaseException as e:
+                attempt.set_exception(e)
+
+        attempt.set_running_or_notify_cancel()
+        threading.Thread(target=run, name="hedge", daemon=True).start()
+        return attempt
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        node = current_node()
+        if not (self.policy.covers(node) and _hedgeable(request)):
+            return self._transport.handle_request(request)
+        delay = self.policy.delay(node)
+        start = time.monotonic()
+        if delay is None:
+            response, seconds = self._send(request)
+            self.policy.observe(node, seconds, seconds, False, False)
+            return response
+
+        attempts = [self._submit(request)]
+        if not wait(attempts, timeout=delay).done:
+            attempts.append(self._submit(request))
+        pending, fallback, error = set(attempts), None, None
+        while pending and (fallback is None or not _usable(fallback[0])):
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for attempt in done:
+                try:
+                    response, seconds = attempt.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if fallback is None or (_usable(response) and not _usable(fallback[0])):
+                    if fallback is not None:
+                        fallback[0].close()
+                    fallback = (response, seconds, attempt)
+                else:
+                    response.close()
+        # A losing sync request can't be interrupted; drop its response when it lands
+        for attempt in pending:
+            attempt.add_done_callback(_close_result)
+        if fallback is None:
+            raise error
+        response, seconds, winner = fallback
+        elapsed = time.monotonic() - start
+        hedge_won = winner is not attempts[0]
+        self.policy.observe(node, elapsed, elapsed if hedge_won else seconds,
+                            len(attempts) > 1, hedge_won)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+def _close_result(attempt):
+    if not attempt.cancelled() and attempt.exception() is None:
+        attempt.result()[0].close()
+
+
+class AsyncHedgedTransport(httpx.AsyncBaseTransport):
+    """Async twin of HedgedTransport; the losing request is cancelled"""
+
+    def __init__(self, policy: HedgePolicy, transport: httpx.AsyncBaseTransport = None):
+        self.policy = policy
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def _send(self, request: httpx.Request) -> tuple:
+        start = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        try:
+            await response.aread()
+        except BaseException:
+            await response.aclose()
+            raise
+        return response, time.monotonic() - start
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        node = current_node()
+        if not (self.policy.covers(node) and _hedgeable(request)):
+            return await self._transport.handle_async_request(request)
+        delay = self.policy.delay(node)
+        start = time.monotonic()
+        if delay is None:
+            response, seconds = await self._send(request)
+            self.policy.observe(node, seconds, seconds, False, False)
+            return response
+
+        attempts = [asyncio.ensure_future(self._send(request))]
+        done, _ = await asyncio.wait(attempts, timeout=delay)
+        if not done:
+            attempts.append(asyncio.ensure_future(self._send(request)))
+        pending, fallback, error = set(attempts), None, None
+        try:
+            while pending and (fallback is None or not _usable(fallback[0])):
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    try:
+                        response, seconds = attempt.result()
+                    except Exception as e:
+                        error = error or e
+                        continue
+                    if fallback is None or (_usable(response) and not _usable(fallback[0])):
+                        if fallback is not None:
+                            await fallback[0].aclose()
+                        fallback = (response, seconds, attempt)
+                    else:
+                        await response.aclose()
+        finally:
+            for attempt in pending:
+                attempt.cancel()
+        if fallback is None:
+            raise error
+        response, seconds, winner = fallback
+        elapsed = time.monotonic() - start
+        hedge_won = winner is not attempts[0]
+        self.policy.observe(node, elapsed, elapsed if hedge_won else seconds,
+                            len(attempts) > 1, hedge_won)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def summarize_hedging(path: str = METRICS_PATH) -> list:
+    """Per node: requests, hedge rate, hedge wins and latency percentiles from a metrics log"""
+    samples = defaultdict(list)
+    counts = defaultdict(lambda: {"hedged": 0, "hedge_wins": 0})
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            event = json.loads(line)
+            if event.get("type") != "llm_request":
+                continue
+            samples[event["node"]].append(event["seconds"])
+            counts[event["node"]]["hedged"] += event["hedged"]
+            counts[event["node"]]["hedge_wins"] += event["hedge_won"]
+    return [{
+        "node": node, "requests": len(values), **counts[node],
+        "hedge_rate": counts[node]["hedged"] / len(values),
+        "p50": percentile(values, 0.50), "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99), "max": max(values)
+    } for node, values in sorted(samples.items())]
+
+
+def test_hedging():
+    """Send sync and async requests with a slow tail through the hedged transport, as one node"""
+    import random
+    from langchain_core.runnables.config import var_child_runnable_config
+
+    def latency():
+        # Mostly ~50ms; one request in ten takes a second
+        return 1.0 if random.random() < 0.1 else random.uniform(0.03, 0.07)
+
+    def handler(request):
+        time.sleep(latency())
+        return httpx.Response(200, json={"ok": True})
+
+    async def ahandler(request):
+        await asyncio.sleep(latency())
+        return httpx.Response(200, json={"ok": True})
+
+    var_child_runnable_config.set({"metadata": {"langgraph_node": "demo_node"}})
+    random.seed(3)
+    print("🧪 Testing hedged requests (10% of requests take 1s)")
+    for name, hedge in (("unhedged", False), ("hedged", True)):
+        policy = HedgePolicy({"demo_node": 0.8} if hedge else {}, min_samples=10)
+        client = httpx.Client(transport=HedgedTransport(policy, httpx.MockTransport(handler)))
+        latencies = []
+        for _ in range(200):
+            start = time.monotonic()
+            client.post("http://stub/v1/chat/completions", json={"messages": []})
+            latencies.append(time.monotonic() - start)
+        print(f"   {name:<9} sync  p50 {percentile(latencies, 0.5):.3f}s "
+              f"p99 {percentile(latencies, 0.99):.3f}s max {max(latencies):.3f}s "
+              f"{policy.stats()}")
+        client.close()
+
+    async def run_async():
+        policy = HedgePolicy({"demo_node": 0.8}, min_samples=10)
+        async with httpx.AsyncClient(
+                transport=AsyncHedgedTransport(policy, httpx.MockTransport(ahandler))) as client:
+            latencies = []
+            for _ in range(200):
+                start = time.monotonic()
+                await client.post("http://stub/v1/chat/completions", json={"messages": []})
+                latencies.append(time.monotonic() - start)
+        print(f"   hedged    async p50 {percentile(latencies, 0.5):.3f}s "
+              f"p99 {percentile(latencies, 0.99):.3f}s max {max(latencies):.3f}s "
+              f"{policy.stats()}")
+
+    asyncio.run(run_async())
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["report"]:
+        log_path = sys.argv[2] if len(sys.argv) > 2 else METRICS_PATH
+        print(f"📈 Hedged model requests from {log_path}")
+        print(f"{'node':<28} {'requests':>8} {'hedged':>7} {'wins':>5} {'p50 s':>7} "
+              f"{'p95 s':>7} {'p99 s':>7} {'max s':>7}")
+        for row in summarize_hedging(log_path):
+            print(f"{row['node']:<28} {row['requests']:>8} {row['hedge_rate']:>6.1%} "
+                  f"{row['hedge_wins']:>5} {row['p50']:>7.3f} {row['p95']:>7.3f} "
+                  f"{row['p99']:>7.3f} {row['max']:>7.3f}")
+    else:
+        test_hedging()
@@ -0,0 +1,252 @@
+"""
+LLM Cache - Content-addressed response cache for the agents' chat models
+Goal: Rerunning a documented test question at temperature=0 costs no OpenAI calls
+
+Plugs into LangChain's model-level cache hook (`ChatOpenAI(cache=...)`), so
+every llm.invoke / llm_with_tools.invoke / ainvoke goes through it unchanged.
+- Keys are a SHA-256 of the model's llm_string (model name, temperature and
+  other parameters, bound tools) and the serialized messages, minus fields
+  the model never sees (message ids, usage and response metadata)
+- Two tiers: an in-process LRU (LLM_CACHE_MEMORY_SIZE entries) in front of a
+  SQLite file (LLM_CACHE_PATH) that survives restarts; disk hits are promoted
+- Per-node policy: LLM_CACHE_NODES (comma-separated graph node names, "*" for
+  all) opts nodes in and LLM_CACHE_SKIP_NODES opts them out. The node is read
+  from the LangGraph run config active when the model is called; calls made
+  outside a graph count as node "*"
+- with_llm_cache(llm, enabled=False) opts a single model instance out
+- Hit/miss counters per tier and per node are kept per process (see stats())
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from collections import Counter, OrderedDict
+
+from dotenv import load_dotenv
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+from langchain_core.runnables.config import var_child_runnable_config
+
+# Load environment variables
+load_dotenv()
+
+# langchain_core.load.loads() is marked beta; it is what LangChain's own caches use
+warnings.filterwarnings("ignore", category=LangChainBetaWarning, module=__name__)
+
+LLM_CACHE_ENABLED = os.getenv(
+    "LLM_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".llm_cache.sqlite3")
+LLM_CACHE_MEMORY_SIZE = int(os.getenv("LLM_CACHE_MEMORY_SIZE", "512"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "20000"))
+LLM_CACHE_NODES = frozenset(
+    n.strip() for n in os.getenv("LLM_CACHE_NODES", "*").split(",") if n.strip())
+LLM_CACHE_SKIP_NODES = frozenset(
+    n.strip() for n in os.getenv("LLM_CACHE_SKIP_NODES", "").split(",") if n.strip())
+
+
+# The only classes a cached chat model response deserializes to
+CACHED_OBJECTS = [ChatGeneration, Generation, AIMessage]
+
+
+# Message fields that never reach the model: per-run ids (add_messages stamps a
+# fresh uuid on every message) and bookkeeping that differs on cached replays
+UNSENT_MESSAGE_FIELDS = ("id", "usage_metadata", "response_metadata")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Drop fields the model never sees from a serialized message list"""
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    if isinstance(messages, list):
+        for message in messages:
+            if isinstance(message, dict):
+                for field in UNSENT_MESSAGE_FIELDS:
+                    message.get("kwargs", {}).pop(field, None)
+    return json.dumps(messages, sort_keys=True)
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Content address for one model call"""
+    return hashlib.sha256(
+        f"{llm_string}\x00{normalize_prompt(prompt)}".encode()).hexdigest()
+
+
+def current_node() -> str:
+    """Name of the graph node making the current model call ("*" outside a graph)"""
+    config = var_child_runnable_config.get() or {}
+    return config.get("metadata", {}).get("langgraph_node", "*")
+
+
+class LLMResponseCache(BaseCache):
+    """In-memory LRU in front of a SQLite store, keyed by cache_key()"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, memory_size: int = LLM_CACHE_MEMORY_SIZE,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 nodes=LLM_CACHE_NODES, skip_nodes=LLM_CACHE_SKIP_NODES):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.nodes = frozenset(nodes)
+        self.skip_nodes = frozenset(skip_nodes)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.bypassed = 0
+        self.node_hits = Counter()
+        self.node_misses = Counter()
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    generations TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_lru ON llm_cache (last_access)")
+
+    def node_enabled(self, node: str) -> bool:
+        if node in self.skip_nodes:
+            return False
+        return "*" in self.nodes or node in self.nodes
+
+    def _remember(self, key: str, serialized: str):
+        # Serialized, so every hit gets fresh message objects (LangChain stamps
+        # ids onto returned messages, and add_messages merges on id)
+        self._memory[key] = serialized
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str):
+        """Return cached generations for this call, or None on a miss"""
+        node = current_node()
+        if not self.node_enabled(node):
+            self.bypassed += 1
+            return None
+
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            serialized = self._memory.get(key)
+            if serialized is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.node_hits[node] += 1
+                return loads(serialized, allowed_objects=CACHED_OBJECTS)
+
+            with self._conn:
+                row = self._conn.execute(
+                    "SELECT generations FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    self.node_misses[node] += 1
+                    return None
+                self._conn.execute(
+                    "UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+
+            self._remember(key, row[0])
+            self.disk_hits += 1
+            self.node_hits[node] += 1
+            return loads(row[0], allowed_objects=CACHED_OBJECTS)
+
+    def update(self, prompt: str, llm_string: str, return_val: list):
+        """Store the generations for this call in both tiers"""
+        if not self.node_enabled(current_node()):
+            return
+
+        key = cache_key(prompt, llm_string)
+        serialized = dumps(return_val)
+        now = time.time()
+        with self._lock:
+            self._remember(key, serialized)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                    (key, serialized, now, now))
+                self._evict()
+            self.writes += 1
+
+    async def alookup(self, prompt: str, llm_string: str):
+        # Local memory/SQLite reads are faster than a hop to the thread pool
+        return self.lookup(prompt, llm_string)
+
+    async def aupdate(self, prompt: str, llm_string: str, return_val: list):
+        self.update(prompt, llm_string, return_val)
+
+    def _evict(self):
+        """Drop least recently used rows above max_entries"""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute("""
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_access LIMIT ?
+                )""", (overflow,))
+
+    def clear(self, **kwargs):
+        with self._lock, self._conn:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM llm_cache")
+
+    async def aclear(self, **kwargs):
+        self.clear(**kwargs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            memory_entries = len(self._memory)
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "bypassed": self.bypassed,
+            "memory_entries": memory_entries,
+            "disk_entries": entries,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "by_node": {node: {"hits": self.node_hits[node], "misses": self.node_misses[node]}
+                        for node in sorted(set(self.node_hits) | set(self.node_misses))}
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Return the process-wide LLM response cache, or None when LLM_CACHE_ENABLED is off"""
+    global _default_cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache()
+        return _default_cache
+
+
+def with_llm_cache(llm, enabled: bool = True):
+    """Return a copy of a chat model that uses (or bypasses) the shared response cache"""
+    cache = get_llm_cache() if enabled else None
+    # cache=False explicitly opts out; None would fall back to any global cache
+    return llm.model_copy(update={"cache": cache if cache is not None else False})
@@ -0,0 +1,467 @@
+"""
+Metrics - Local per-node latency, token, cost, search and memory-op metrics
+Goal: See which node dominates p95 latency without sending anything to a network service
+
+instrument_graph() attaches a callback handler to a compiled graph, so every
+node of every graph is measured without touching the node functions:
+- wall time per node execution (tool nodes included), with ok/error status
+- LLM calls, prompt/completion tokens (usage metadata) and estimated cost
+  (MODEL_PRICES) attributed to the node that made them
+Search latency (cache or API, ok or error) is recorded by search_client.py,
+memory-operation outcomes by the phase 3 memory nodes, time spent waiting for
+a provider's rate limit and 429 throttles by rate_limiter.py, and the latency
+of model requests from hedged nodes by hedging.py.
+
+Every measurement is appended to METRICS_PATH as one JSON object per line and
+aggregated in process. Once the log passes METRICS_MAX_BYTES it is rolled to
+METRICS_PATH.1 (replacing the previous one), so a long-running server keeps
+at most two files; with METRICS_PORT set, the aggregates are served in the
+Prometheus text format at http://localhost:<METRICS_PORT>/metrics.
+
+    python metrics.py [metrics.jsonl]    # per-node p50/p95 report from the log
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.config import var_child_runnable_config
+
+# Load environment variables
+load_dotenv()
+
+METRICS_ENABLED = os.getenv(
+    "METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+METRICS_PATH = os.getenv("METRICS_PATH", "metrics.jsonl")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+# Size at which the JSONL log is rolled over (0 = never)
+METRICS_MAX_BYTES = int(os.getenv("METRICS_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# USD per million (prompt, completion) tokens
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60)
+}
+
+# Histogram buckets in seconds, shared by node, search and rate-limit wait latency
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost of one model call (0.0 for models without a price)"""
+    # Dated snapshots (gpt-4o-2024-08-06) are priced like their base model
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model and model.startswith(name):
+            prompt_price, completion_price = MODEL_PRICES[name]
+            return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+    return 0.0
+
+
+def current_node() -> str:
+    """Graph node running in this context ("" outside a graph)"""
+    config = var_child_runnable_config.get() or {}
+    return config.get("metadata", {}).get("langgraph_node", "")
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+def _labels(names, values) -> str:
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}" if pairs else ""
+
+
+class MetricsRegistry:
+    """In-process aggregates plus the JSONL event log"""
+
+    def __init__(self, path: str = METRICS_PATH, max_bytes: int = METRICS_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+        self.node_latency = defaultdict(Histogram)       # (graph, node)
+        self.node_runs = defaultdict(int)                # (graph, node, status)
+        self.llm_calls = defaultdict(int)                # (graph, node)
+        self.llm_tokens = defaultdict(int)               # (graph, node, kind)
+        self.llm_cost = defaultdict(float)               # (graph, node)
+        self.search_latency = defaultdict(Histogram)     # (source, status)
+        self.memory_operations = defaultdict(int)        # (operation, status)
+        self.rate_limit_wait = defaultdict(Histogram)    # (provider,)
+        self.rate_limit_throttles = defaultdict(int)     # (provider,)
+        self.llm_request_latency = defaultdict(Histogram)  # (node, hedged)
+        self.llm_hedges = defaultdict(int)               # (node, outcome)
+
+    def _write(self, event: dict):
+        # Called with the lock held
+        if self._file is not None:
+            self._file.write(json.dumps(event) + "\n")
+            self._file.flush()
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        # Called with the lock held: keep one previous log next to the current one
+        self._file.close()
+        os.replace(self.path, self.path + ".1")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def record_node(self, graph: str, node: str, step: int, seconds: float, status: str,
+                    llm_calls: int = 0, prompt_tokens: int = 0, completion_tokens: int = 0,
+                    cost_usd: float = 0.0):
+        with self._lock:
+            self.node_latency[(graph, node)].observe(seconds)
+            self.node_runs[(graph, node, status)] += 1
+            self.llm_calls[(graph, node)] += llm_calls
+            self.llm_tokens[(graph, node, "prompt")] += prompt_tokens
+            self.llm_tokens[(graph, node, "completion")] += completion_tokens
+            self.llm_cost[(graph, node)] += cost_usd
+            self._write({
+                "ts": time.time(), "type": "node", "graph": graph, "node": node,
+                "step": step, "seconds": round(seconds, 6), "status": status,
+                "llm_calls": llm_calls, "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens, "cost_usd": round(cost_usd, 8)
+            })
+
+    def record_search(self, seconds: float, source: str, status: str):
+        with self._lock:
+            self.search_latency[(source, status)].observe(seconds)
+            self._write({
+                "ts": time.time(), "type": "search", "node": current_node(),
+                "seconds": round(seconds, 6), "source": source, "status": status
+            })
+
+    def record_memory_operation(self, operation: str, ok: bool):
+        status = "success" if ok else "failure"
+        with self._lock:
+            self.memory_operations[(operation, status)] += 1
+            self._write({
+                "ts": time.time(), "type": "memory_operation", "node": current_node(),
+                "operation": operation, "status": status
+            })
+
+    def record_rate_limit_wait(self, provider: str, seconds: float):
+        with self._lock:
+            self.rate_limit_wait[(provider,)].observe(seconds)
+            # Only calls that actually waited are logged
+            if seconds > 0:
+                self._write({
+                    "ts": time.time(), "type": "rate_limit_wait", "node": current_node(),
+                    "provider": provider, "seconds": round(seconds, 6)
+                })
+
+    def record_throttle(self, provider: str):
+        with self._lock:
+            self.rate_limit_throttles[(provider,)] += 1
+            self._write({
+                "ts": time.time(), "type": "rate_limit_throttle", "node": current_node(),
+                "provider": provider
+            })
+
+    def record_llm_request(self, node: str, seconds: float, hedged: bool, hedge_won: bool):
+        outcome = "hedge_won" if hedge_won else "primary_won" if hedged else "not_hedged"
+        with self._lock:
+            self.llm_request_latency[(node, str(hedged).lower())].observe(seconds)
+            self.llm_hedges[(node, outcome)] += 1
+            self._write({
+                "ts": time.time(), "type": "llm_request", "node": node,
+                "seconds": round(seconds, 6), "hedged": hedged, "hedge_won": hedge_won
+            })
+
+    def render_prometheus(self) -> str:
+        """Current aggregates in the Prometheus text exposition format"""
+        lines = []
+
+        def histogram(name, help_text, label_names, histograms):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in sorted(histograms.items()):
+                for bound, count in zip(hist.buckets, hist.counts):
+                    labels = _labels(label_names + ("le",), key + (f"{bound:g}",))
+                    lines.append(f"{name}_bucket{labels} {count}")
+                lines.append(f"{name}_bucket{_labels(label_names + ('le',), key + ('+Inf',))} "
+                             f"{hist.count}")
+                lines.append(f"{name}_sum{_labels(label_names, key)} {hist.sum}")
+                lines.append(f"{name}_count{_labels(label_names, key)} {hist.count}")
+
+        def counter(name, help_text, label_names, values):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(values.items()):
+                lines.append(f"{name}{_labels(label_names, key)} {value}")
+
+        with self._lock:
+            histogram("agent_node_duration_seconds", "Wall time of one node execution",
+                      ("graph", "node"), self.node_latency)
+            counter("agent_node_runs_total", "Node executions by outcome",
+                    ("graph", "node", "status"), self.node_runs)
+            counter("agent_llm_calls_total", "Chat model calls made by a node",
+                    ("graph", "node"), self.llm_calls)
+            counter("agent_llm_tokens_total", "Prompt and completion tokens used by a node",
+                    ("graph", "node", "kind"), self.llm_tokens)
+            counter("agent_llm_cost_usd_total", "Estimated model cost of a node in USD",
+                    ("graph", "node"), self.llm_cost)
+            histogram("agent_search_duration_seconds", "Latency of one search",
+                      ("source", "status"), self.search_latency)
+            counter("agent_memory_operations_total", "Memory operations by outcome",
+                    ("operation", "status"), self.memory_operations)
+            histogram("agent_rate_limit_wait_seconds",
+                      "Time a call waited for its provider's rate limit",
+                      ("provider",), self.rate_limit_wait)
+            counter("agent_rate_limit_throttles_total", "429 responses from a provider",
+                    ("provider",), self.rate_limit_throttles)
+            histogram("agent_llm_request_seconds",
+                      "Latency of one model request from a hedged node, as the caller saw it",
+                      ("node", "hedged"), self.llm_request_latency)
+            counter("agent_llm_hedges_total", "Model requests from hedged nodes by outcome",
+                    ("node", "outcome"), self.llm_hedges)
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Times every node task of one graph and attributes model usage to it"""
+
+    def __init__(self, graph: str, registry: "MetricsRegistry"):
+        self.graph = graph
+        self.registry = registry
+        self._nodes = {}       # node task run_id -> open measurement
+        self._tasks = {}       # checkpoint namespace -> node task run_id
+        self._llm_tasks = {}   # model run_id -> checkpoint namespace
+        self._lock = threading.Lock()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None,
+                       tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        # The node task itself is the run named after the node and tagged with its step
+        if (node is None or node == "__start__" or kwargs.get("name") != node
+                or not any(tag.startswith("graph:step:") for tag in tags or ())):
+            return
+        with self._lock:
+            self._nodes[run_id] = {
+                "node": node,
+                "step": metadata.get("langgraph_step", 0),
+                "namespace": metadata.get("langgraph_checkpoint_ns", ""),
+                "start": time.perf_counter(),
+                "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0
+            }
+            self._tasks[self._nodes[run_id]["namespace"]] = run_id
+
+    def _finish_node(self, run_id, status: str):
+        with self._lock:
+            measurement = self._nodes.pop(run_id, None)
+            if measurement is None:
+                return
+            self._tasks.pop(measurement["namespace"], None)
+        self.registry.record_node(
+            self.graph, measurement["node"], measurement["step"],
+            time.perf_counter() - measurement["start"], status,
+            measurement["llm_calls"], measurement["prompt_tokens"],
+            measurement["completion_tokens"], measurement["cost_usd"])
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish_node(run_id, "ok")
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        # Interrupts and Command(graph=PARENT) are control flow, not failures
+        control_flow = type(error).__name__ in ("GraphInterrupt", "NodeInterrupt", "ParentCommand")
+        self._finish_node(run_id, "interrupted" if control_flow else "error")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        namespace = (metadata or {}).get("langgraph_checkpoint_ns")
+        if namespace is not None:
+            with self._lock:
+                self._llm_tasks[run_id] = namespace
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            namespace = self._llm_tasks.pop(run_id, None)
+            measurement = self._nodes.get(self._tasks.get(namespace))
+            if measurement is None:
+                return
+
+            llm_output = response.llm_output or {}
+            model = llm_output.get("model_name", "")
+            prompt_tokens = completion_tokens = 0
+            for generations in response.generations:
+                for generation in generations:
+                    message = getattr(generation, "message", None)
+                    usage = getattr(message, "usage_metadata", None) or {}
+                    prompt_tokens += usage.get("input_tokens", 0)
+                    completion_tokens += usage.get("output_tokens", 0)
+                    model = model or (getattr(message, "response_metadata", None) or {}).get(
+                        "model_name", "")
+            if not prompt_tokens and not completion_tokens:
+                token_usage = llm_output.get("token_usage") or {}
+                prompt_tokens = token_usage.get("prompt_tokens", 0)
+                completion_tokens = token_usage.get("completion_tokens", 0)
+
+            measurement["llm_calls"] += 1
+            measurement["prompt_tokens"] += prompt_tokens
+            measurement["completion_tokens"] += completion_tokens
+            measurement["cost_usd"] += estimate_cost(model, prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._llm_tasks.pop(run_id, None)
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes would otherwise flood the agent's console output
+        pass
+
+
+_registry = None
+_server = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry, or None when METRICS_ENABLED is off"""
+    global _registry
+    if not METRICS_ENABLED:
+        return None
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
+
+
+def start_metrics_server(port: int = METRICS_PORT):
+    """Serve /metrics on localhost:port in a daemon thread (once per process)"""
+    global _server
+    with _registry_lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsRequestHandler)
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"📈 Metrics at http://127.0.0.1:{_server.server_address[1]}/metrics")
+    return _server
+
+
+def instrument_graph(app, graph_name: str):
+    """Return the compiled graph with the metrics callback attached to every run"""
+    registry = get_metrics()
+    if registry is None:
+        return app
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    # Pregel.with_config returns a compiled graph, so langgraph dev still loads it
+    return app.with_config({"callbacks": [MetricsCallbackHandler(graph_name, registry)]})
+
+
+def record_search(seconds: float, source: str, status: str):
+    """Record one search: source is "api" or "cache", status "ok" or "error" """
+    registry = get_metrics()
+    if registry is not None:
+        registry.record_search(seconds, source, status)
+
+
+def record_memory_operation(operation: str, ok: bool):
+    """Record the outcome of one memory operation"""
+    registry = get_metrics()
+    if registry is not None:
+        registry.record_memory_operation(operation, ok)
+
+
+def record_rate_limit_wait(provider: str, seconds: float):
+    """Record the time one call waited for a provider's rate limit (0 if it did not)"""
+    registry = get_metrics()
+    if registry is not None:
+        registry.record_rate_limit_wait(provider, seconds)
+
+
+def record_throttle(provider: str):
+    """Record one 429 from a provider"""
+    registry = get_metrics()
+    if registry is not None:
+        registry.record_throttle(provider)
+
+
+def record_llm_request(node: str, seconds: float, hedged: bool, hedge_won: bool):
+    """Record one model request from a hedged node, and whether a hedge was sent and won"""
+    registry = get_metrics()
+    if registry is not None:
+        registry.record_llm_request(node, seconds, hedged, hedge_won)
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize_metrics(path: str = METRICS_PATH) -> list:
+    """Per (graph, node) latency percentiles and usage from a metrics log, slowest p95 first"""
+    samples = defaultdict(list)
+    usage = defaultdict(lambda: defaultdict(float))
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            event = json.loads(line)
+            if event.get("type") == "node":
+                key = (event["graph"], event["node"])
+            elif event.get("type") == "search":
+                key = ("search", event["source"])
+            elif event.get("type") == "rate_limit_wait":
+                key = ("rate_limit", event["provider"])
+            else:
+                continue
+            samples[key].append(event["seconds"])
+            for field in ("llm_calls", "prompt_tokens", "completion_tokens", "cost_usd"):
+                usage[key][field] += event.get(field, 0)
+
+    rows = [{
+        "graph": graph, "node": node, "runs": len(values),
+        "p50": percentile(values, 0.50), "p95": percentile(values, 0.95), "max": max(values),
+        "total_seconds": sum(values), **usage[(graph, node)]
+    } for (graph, node), values in samples.items()]
+    return sorted(rows, key=lambda row: row["p95"], reverse=True)
+
+
+if __name__ == "__main__":
+    log_path = sys.argv[1] if len(sys.argv) > 1 else METRICS_PATH
+    print(f"📈 Node latency from {log_path} (slowest p95 first)")
+    print(f"{'graph':<8} {'node':<36} {'runs':>5} {'p50 s':>8} {'p95 s':>8} {'max s':>8} "
+          f"{'tokens':>8} {'cost $':>8}")
+    for row in summarize_metrics(log_path):
+        tokens = row.get("prompt_tokens", 0) + row.get("completion_tokens", 0)
+        print(f"{row['graph']:<8} {row['node']:<36} {row['runs']:>5} {row['p50']:>8.3f} "
+              f"{row['p95']:>8.3f} {row['max']:>8.3f} {tokens:>8.0f} {row.get('cost_usd', 0):>8.4f}")
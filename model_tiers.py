@@ -0,0 +1,119 @@
+"""
+Model Tiers - Per-node model selection from a config file
+Goal: Cheap, fast models for routing and formatting nodes; the large model for reasoning and conclusions
+
+model_tiers.json (MODEL_TIERS_PATH) names the tiers - ChatOpenAI settings -
+and maps graph nodes to them:
+    {
+      "default_tier": "large",
+      "tiers": {"large": {"model": "gpt-4o", "temperature": 0},
+                "small": {"model": "gpt-4o-mini", "temperature": 0}},
+      "nodes": {"orchestrator_executor": "small"}
+    }
+- Nodes that are not listed use default_tier; without a config file every
+  node gets DEFAULT_TIER (gpt-4o at temperature 0)
+- A tier's client is built the first time one of its nodes asks for it and is
+  then shared by all of them, in every thread and event loop
+- Every client gets the response cache (llm_cache.py), streamed token usage
+  and the rate limiter / hedging / cassette transports (rate_limiter.py)
+- MODEL_TIER_OVERRIDE=<tier> sends every node to one tier, e.g. to compare
+  answers against the all-large setup
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+
+from llm_cache import with_llm_cache
+from rate_limiter import openai_http_clients
+
+# Load environment variables
+load_dotenv()
+
+MODEL_TIERS_PATH = os.getenv(
+    "MODEL_TIERS_PATH", str(Path(__file__).resolve().parent / "model_tiers.json"))
+MODEL_TIER_OVERRIDE = os.getenv("MODEL_TIER_OVERRIDE", "")
+
+# Used for every node when there is no config file
+DEFAULT_TIER = {"model": "gpt-4o", "temperature": 0}
+
+
+def build_chat_model(tier: str, settings: dict):
+    """The shared ChatOpenAI client of one tier"""
+    return with_llm_cache(ChatOpenAI(api_key=os.getenv("OPENAI_API_KEY"),
+                                     # Token usage is reported for streamed calls too
+                                     stream_usage=True,
+                                     **settings,
+                                     **openai_http_clients()))
+
+
+class ModelTiers:
+    """Node -> tier mapping with one lazily built chat model per tier"""
+
+    def __init__(self, config: dict, factory=build_chat_model,
+                 override: str = MODEL_TIER_OVERRIDE):
+        self.config = config
+        self.tiers = config.get("tiers") or {"default": DEFAULT_TIER}
+        self.default_tier = config.get("default_tier", next(iter(self.tiers)))
+        self.nodes = config.get("nodes", {})
+        self.override = override
+        self.factory = factory
+        for node, tier in [("default_tier", self.default_tier), ("MODEL_TIER_OVERRIDE", override),
+                           *self.nodes.items()]:
+            if tier and tier not in self.tiers:
+                raise ValueError(f"Unknown model tier '{tier}' for {node} "
+                                 f"(tiers: {', '.join(self.tiers)})")
+        self._models = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str = MODEL_TIERS_PATH, **kwargs) -> "ModelTiers":
+        """Read the config file; a missing file means one default tier for every node"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+        except FileNotFoundError:
+            config = {}
+        return cls(config, **kwargs)
+
+    def tier(self, node: str) -> str:
+        return self.override or self.nodes.get(node, self.default_tier)
+
+    def model(self, node: str):
+        """The chat model serving `node`, built on first use"""
+        tier = self.tier(node)
+        model = self._models.get(tier)
+        if model is None:
+            with self._lock:
+                model = self._models.get(tier)
+                if model is None:
+                    model = self._models[tier] = self.factory(tier, self.tiers[tier])
+        return model
+
+    def describe(self) -> dict:
+        """tier -> {"model", "nodes"} for every tier, as configured"""
+        return {tier: {"model": settings.get("model"),
+                       "nodes": sorted(node for node, t in self.nodes.items()
+                                       if (self.override or t) == tier)}
+                for tier, settings in self.tiers.items()}
+
+
+def test_model_tiers():
+    """Show the tier of each configured node and check clients are built once per tier"""
+    built = []
+    tiers = ModelTiers.load(factory=lambda tier, settings: built.append(tier) or object())
+    print(f"🧪 Model tiers from {MODEL_TIERS_PATH} (default: {tiers.default_tier})")
+    for tier, info in tiers.describe().items():
+        print(f"   {tier:<6} {info['model']:<12} {', '.join(info['nodes']) or '-'}")
+    models = [tiers.model(node) for node in [*tiers.nodes, "unlisted_node"] * 2]
+    ok = len(built) == len(set(built)) and len(set(map(id, models))) == len(built)
+    print(f"   {'✅' if ok else '❌'} {len(built)} client(s) built for {len(models)} lookups")
+    return ok
+
+
+if __name__ == "__main__":
+    test_model_tiers()
@@ -3,8 +3,13 @@ Phase 1 Calculator Agent - Basic LangGraph agent with calculator tool
 Goal: Get to LangGraph Studio visualization ASAP
 testcase: 
 ********** What is 2847 * 193^2 + 4521^2? **********
+
+Set CALCULATOR_PLANNING=true to plan the whole calculation as a dependency
+graph in one LLM call; independent operations then run in parallel on the
+tool nodes and the reasoner sees all results in a single turn.
 """
 
+import copy
 import inspect
 import os
 from typing import Annotated, List
@@ -18,17 +23,38 @@ from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, create_react_agent
 from langsmith import traceable
+from pydantic import BaseModel, Field
 from typing_extensions import TypedDict
 
+from conversation_context import (abuild_conversation_context,
+                                  build_conversation_context)
+from fused_reasoning import (FUSED_REASONING, build_fused_tool_prompt,
+                             split_tool_response, take_fused_action)
+from graph_nodes import dual_node, send_tool_calls, without_token_stream
+from llm_cache import with_llm_cache
+from metrics import instrument_graph
+from rate_limiter import openai_http_clients
+
 # Load environment variables
 load_dotenv()
 
+# Plan the whole calculation up front and run independent steps in parallel
+CALCULATOR_PLANNING = os.getenv(
+    "CALCULATOR_PLANNING", "false").lower() in ("1", "true", "yes")
+
 # Define our agent's state
 
 
 class AgentState(TypedDict):
     messages: Annotated[List[HumanMessage | AIMessage |
                              ToolMessage], add_messages]
+    # Rolling summary of turns older than the recent window (see conversation_context.py)
+    conversation_summary: str
+    summarized_message_count: int
+    # Executor action precomputed by the reasoner in fused mode (see fused_reasoning.py)
+    fused_action: AIMessage
+    # Calculation DAG and its results in planning mode (see plan_executor_node)
+    calculation_plan: dict
 
 
 @tool
@@ -80,6 +106,9 @@ def exponentiation_tool(a: float, b: float) -> str:
 all_tools = [addition_tool, subtraction_tool,
              multiplication_tool, division_tool, exponentiation_tool]
 
+# Graph node name of each tool node (the node is named after its tool)
+TOOL_NODES = [tool.name for tool in all_tools]
+
 # Create individual tool nodes
 addition_node = ToolNode([addition_tool])
 subtraction_node = ToolNode([subtraction_tool])
@@ -88,13 +117,20 @@ division_node = ToolNode([division_tool])
 exponentiation_node = ToolNode([exponentiation_tool])
 
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0,
-                 api_key=os.getenv("OPENAI_API_KEY"))
+# Identical prompts are answered from the response cache (see llm_cache.py);
+# CASSETTE_MODE records or replays the model's HTTP traffic (see cassettes.py),
+# calls share the process-wide OpenAI rate limit (see rate_limiter.py), and
+# HEDGE_NODES duplicates slow requests of chosen nodes (see hedging.py)
+llm = with_llm_cache(ChatOpenAI(model="gpt-4o", temperature=0,
+                                api_key=os.getenv("OPENAI_API_KEY"),
+                                # Token usage is reported for streamed calls too
+                                stream_usage=True,
+                                **openai_http_clients()))
 llm_with_tools = llm.bind_tools(all_tools)
 
 
-def reasoner_node(state: AgentState) -> AgentState:
-    """Pure reasoning node - analyzes situation and decides what to do next"""
+def build_reasoning_prompt(conversation: str) -> str:
+    """Reasoner prompt for the current conversation context"""
 
     # Build tool descriptions for the reasoner
     tool_descriptions = []
@@ -106,10 +142,10 @@ def reasoner_node(state: AgentState) -> AgentState:
     tools_text = "\n".join(tool_descriptions)
 
     # Generate reasoning about what to do next
-    reasoning_prompt = f"""
+    return f"""
     Look at this conversation and think step by step:
     
-    Current conversation: {[msg.content for msg in state['messages']]}
+    Current conversation: {conversation}
 
     Available tools:
     {tools_text}
@@ -123,85 +159,384 @@ def reasoner_node(state: AgentState) -> AgentState:
     
     Just provide your reasoning, don't take action yet.
 
-    One note: this is for a demonstration of simple reasoning. So please only do one tool call at a time. Let's take this one step at a time.
+    One note: this is for a demonstration of simple reasoning, so take it one step at a time. If several calculations do not depend on each other's results, you may recommend them together - they run in parallel.
     """
 
+
+def reasoner_node(state: AgentState) -> AgentState:
+    """Pure reasoning node - analyzes situation and decides what to do next"""
+
+    # Recent messages verbatim + running summary of older turns
+    conversation, context_update = build_conversation_context(state, llm)
+
+    reasoning_prompt = build_reasoning_prompt(conversation)
+
+    if FUSED_REASONING:
+        # One call returns both the reasoning and the executor's tool call
+        fused_response = llm_with_tools.invoke(
+            [SystemMessage(content=build_fused_tool_prompt(reasoning_prompt))])
+        reasoning_msg, action_msg = split_tool_response(fused_response)
+        return {
+            "messages": [reasoning_msg],
+            "fused_action": action_msg,
+            **context_update
+        }
+
     reasoning_response = llm.invoke([SystemMessage(content=reasoning_prompt)])
     reasoning_msg = AIMessage(
         content=reasoning_response.content)
 
     return {
-        "messages": [reasoning_msg]
+        "messages": [reasoning_msg],
+        **context_update
     }
 
 
-def executor_node(state: AgentState) -> AgentState:
-    """Executor node - takes action based on the reasoner's analysis"""
+async def areasoner_node(state: AgentState) -> AgentState:
+    """Async version of reasoner_node"""
+
+    conversation, context_update = await abuild_conversation_context(state, llm)
 
-    # Add a system message to guide the executor to follow the reasoner's advice
-    executor_prompt = """You are the executor part of a mathematician agent. Your job is to follow the reasoning and advice from the reasoner.
+    reasoning_prompt = build_reasoning_prompt(conversation)
+
+    if FUSED_REASONING:
+        # One call returns both the reasoning and the executor's tool call
+        fused_response = await llm_with_tools.ainvoke(
+            [SystemMessage(content=build_fused_tool_prompt(reasoning_prompt))])
+        reasoning_msg, action_msg = split_tool_response(fused_response)
+        return {
+            "messages": [reasoning_msg],
+            "fused_action": action_msg,
+            **context_update
+        }
+
+    reasoning_response = await llm.ainvoke([SystemMessage(content=reasoning_prompt)])
+    reasoning_msg = AIMessage(
+        content=reasoning_response.content)
+
+    return {
+        "messages": [reasoning_msg],
+        **context_update
+    }
+
+
+# Add a system message to guide the executor to follow the reasoner's advice
+EXECUTOR_PROMPT = """You are the executor part of a mathematician agent. Your job is to follow the reasoning and advice from the reasoner.
 
 Look at the most recent reasoning message and execute the recommended action. If the reasoner suggested using a specific tool, use that tool with the suggested arguments. If the reasoner said you have enough information to provide a final answer, then provide that answer.
 
-If the reasoner suggests using a single tool, but you think you can use multiple tools at the same time, do not do it. Just listen to the reasoner and execute the recommended action. The reasoner has a master plan. Please let the reasoner take the lead. Thank you.
+If the reasoner recommends several independent tool calls, make all of them in this response - they run in parallel. If the reasoner suggests using a single tool, but you think you can use multiple tools at the same time, do not do it. Just listen to the reasoner and execute the recommended action. The reasoner has a master plan. Please let the reasoner take the lead. Thank you.
 
 Follow the reasoner's guidance closely."""
 
+
+def executor_node(state: AgentState) -> AgentState:
+    """Executor node - takes action based on the reasoner's analysis"""
+
+    # Fused mode: the reasoner already chose the action
+    fused_update = take_fused_action(state)
+    if fused_update:
+        return fused_update
+
     # Combine the executor prompt with the conversation
     messages_with_guidance = [
-        SystemMessage(content=executor_prompt)] + state["messages"]
-    action_response = llm_with_tools.invoke(messages_with_guidance)
+        SystemMessage(content=EXECUTOR_PROMPT)] + state["messages"]
+    action_response = without_token_stream(llm_with_tools).invoke(messages_with_guidance)
+
+    return {
+        "messages": [action_response],
+    }
+
+
+async def aexecutor_node(state: AgentState) -> AgentState:
+    """Async version of executor_node"""
+
+    # Fused mode: the reasoner already chose the action
+    fused_update = take_fused_action(state)
+    if fused_update:
+        return fused_update
+
+    messages_with_guidance = [
+        SystemMessage(content=EXECUTOR_PROMPT)] + state["messages"]
+    action_response = await without_token_stream(llm_with_tools).ainvoke(messages_with_guidance)
 
     return {
         "messages": [action_response],
     }
 
 
-# Define routing logic - route to specific tool nodes
-def should_continue(state: AgentState) -> str:
+# Planning mode (CALCULATOR_PLANNING=true) - the planner turns the user's calculation into a dependency DAG of tool calls
+# with one LLM call. plan_executor then releases the DAG layer by layer: every
+# operation whose inputs are known is sent to its tool node in parallel, and
+# the results flow back to plan_executor instead of the reasoner. Once the
+# plan is done, the reasoner sees every result in one turn and answers.
+
+class PlanStep(BaseModel):
+    """One tool call in the calculation plan"""
+
+    id: str = Field(description='Step id, e.g. "s1"')
+    tool: str = Field(description="One of the available tool names")
+    a: str = Field(description='First operand: a number, or the id of an earlier step')
+    b: str = Field(description='Second operand: a number, or the id of an earlier step')
+
+
+class CalculationPlan(BaseModel):
+    """Dependency graph of tool calls that computes the user's expression"""
+
+    steps: List[PlanStep] = Field(
+        description="Every operation needed; empty if the request is not a calculation")
+    final_step: str = Field(description="Id of the step whose result answers the question")
+
+
+def build_planner_prompt(question: str) -> str:
+    """Planner prompt for the user's calculation"""
+    tools_text = "\n".join(f"- {tool.name}(a, b): {tool.description.strip()}"
+                           for tool in all_tools)
+
+    return f"""
+    Break this calculation into the individual tool calls needed to compute it.
+
+    Request: {question}
+
+    Available tools:
+    {tools_text}
+
+    Rules:
+    1. Each step is exactly one tool call with two operands
+    2. An operand is either a number or the id of another step whose result it uses
+    3. Respect operator precedence: exponents, then multiplication/division, then addition/subtraction
+    4. Do not compute anything yourself - every operation must be a step
+    5. Set final_step to the step that produces the answer
+    6. If the request is not a calculation, return no steps
+    """
+
+
+def validate_plan(plan: CalculationPlan) -> dict:
+    """Turn a CalculationPlan into plan state, or None if it is not a usable DAG"""
+    tool_names = {tool.name for tool in all_tools}
+    steps = {step.id: step for step in plan.steps}
+    if not steps or len(steps) != len(plan.steps) or plan.final_step not in steps:
+        return None
+
+    operands = {}
+    for step in plan.steps:
+        if step.tool not in tool_names:
+            return None
+        operands[step.id] = []
+        for operand in (step.a, step.b):
+            operand = operand.strip()
+            if operand in steps:
+                operands[step.id].append({"step": operand})
+                continue
+            try:
+                operands[step.id].append({"value": float(operand.replace(",", ""))})
+            except ValueError:
+                return None
+
+    # Kahn's algorithm: reject cycles and self-references
+    remaining = dict(operands)
+    done = set()
+    while remaining:
+        ready = [step_id for step_id, ops in remaining.items()
+                 if all(op.get("step") in done for op in ops if "step" in op)]
+        if not ready:
+            return None
+        for step_id in ready:
+            done.add(step_id)
+            del remaining[step_id]
+
+    return {
+        "steps": [{"id": step.id, "tool": step.tool, "operands": operands[step.id]}
+                  for step in plan.steps],
+        "final_step": plan.final_step,
+        "results": {},
+        "in_flight": {},
+        "status": "running"
+    }
+
+
+def format_plan(plan: dict) -> str:
+    lines = []
+    for step in plan["steps"]:
+        args = ", ".join(op["step"] if "step" in op else f"{op['value']:.15g}"
+                         for op in step["operands"])
+        lines.append(f"{step['id']} = {step['tool']}({args})")
+    return "📐 Calculation plan:\n" + "\n".join(lines)
+
+
+def calculation_plan_update(response: CalculationPlan) -> AgentState:
+    plan = validate_plan(response)
+    if plan is None:
+        print("📐 No usable calculation plan - falling back to step-by-step reasoning")
+        return {"calculation_plan": {"status": "failed", "steps": []}}
+
+    plan_text = format_plan(plan)
+    print(plan_text)
+    return {
+        "messages": [AIMessage(content=plan_text)],
+        "calculation_plan": plan
+    }
+
+
+def latest_question(state: AgentState) -> str:
+    """The most recent user message"""
+    for msg in reversed(state["messages"]):
+        if isinstance(msg, HumanMessage):
+            return msg.content
+    return state["messages"][0].content
+
+
+def planner_node(state: AgentState) -> AgentState:
+    """Planner node - builds the dependency DAG of tool calls in one LLM call"""
+    question = latest_question(state)
+    response = without_token_stream(llm.with_structured_output(CalculationPlan)).invoke(
+        [SystemMessage(content=build_planner_prompt(question))])
+    return calculation_plan_update(response)
+
+
+async def aplanner_node(state: AgentState) -> AgentState:
+    """Async version of planner_node"""
+    question = latest_question(state)
+    response = await without_token_stream(llm.with_structured_output(CalculationPlan)).ainvoke(
+        [SystemMessage(content=build_planner_prompt(question))])
+    return calculation_plan_update(response)
+
+
+def parse_tool_result(content: str):
+    """Numeric result from a calculator tool message ("The result of a + b is X")"""
+    try:
+        return float(str(content).rsplit(" is ", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def plan_executor_node(state: AgentState) -> AgentState:
+    """Collect finished plan steps and release the next layer of independent ones"""
+    plan = copy.deepcopy(state["calculation_plan"])
+
+    # Results of the layer that just ran
+    tool_messages = {msg.tool_call_id: msg for msg in state["messages"]
+                     if isinstance(msg, ToolMessage)}
+    for call_id, step_id in list(plan["in_flight"].items()):
+        if call_id not in tool_messages:
+            continue
+        del plan["in_flight"][call_id]
+        result = parse_tool_result(tool_messages[call_id].content)
+        if result is None:
+            plan["status"] = "failed"
+            message = (f"📐 Plan step {step_id} failed: {tool_messages[call_id].content} - "
+                       "continuing step by step")
+            print(message)
+            return {"messages": [AIMessage(content=message)], "calculation_plan": plan}
+        plan["results"][step_id] = result
+
+    if plan["in_flight"]:
+        return {"calculation_plan": plan}
+
+    # Next layer: every step whose operands are all known
+    layer = [step for step in plan["steps"]
+             if step["id"] not in plan["results"]
+             and all(op["step"] in plan["results"] for op in step["operands"] if "step" in op)]
+
+    if not layer:
+        plan["status"] = "done"
+        results = "\n".join(f"{step['id']} ({step['tool']}) = {plan['results'][step['id']]:.15g}"
+                            for step in plan["steps"])
+        message = (f"📐 Plan complete - {plan['final_step']} = "
+                   f"{plan['results'][plan['final_step']]:.15g}\n{results}")
+        print(message)
+        return {"messages": [AIMessage(content=message)], "calculation_plan": plan}
+
+    plan_number = sum(isinstance(msg, AIMessage) and msg.content.startswith("📐 Calculation plan")
+                      for msg in state["messages"])
+    tool_calls = []
+    for step in layer:
+        a, b = (plan["results"][op["step"]] if "step" in op else op["value"]
+                for op in step["operands"])
+        call_id = f"call_plan{plan_number}_{step['id']}"
+        tool_calls.append({"name": step["tool"], "args": {"a": a, "b": b}, "id": call_id})
+        plan["in_flight"][call_id] = step["id"]
+
+    print(f"📐 Running plan layer in parallel: {', '.join(step['id'] for step in layer)}")
+    return {
+        "messages": [AIMessage(content="", tool_calls=tool_calls)],
+        "calculation_plan": plan
+    }
+
+
+def route_start(state: AgentState) -> str:
+    """Start with the planner in planning mode"""
+    return "calculation_planner" if CALCULATOR_PLANNING else "mathematician_agent_reasoner"
+
+
+def route_after_planner(state: AgentState) -> str:
+    if state["calculation_plan"]["status"] == "running":
+        return "plan_executor"
+    return "mathematician_agent_reasoner"
+
+
+def route_plan_layer(state: AgentState):
+    """Fan the released layer out to the tool nodes, one Send per tool call"""
+    plan = state["calculation_plan"]
     last_message = state["messages"][-1]
-    if hasattr(last_message, 'tool_calls') and last_message.tool_calls:
-        tool_name = last_message.tool_calls[0].get('name', '')
-        # Route directly to the specific tool node
-        if tool_name == 'addition_tool':
-            return "addition_tool"
-        elif tool_name == 'subtraction_tool':
-            return "subtraction_tool"
-        elif tool_name == 'multiplication_tool':
-            return "multiplication_tool"
-        elif tool_name == 'division_tool':
-            return "division_tool"
-        elif tool_name == 'exponentiation_tool':
-            return "exponentiation_tool"
-    return END
+    if plan["status"] != "running" or not getattr(last_message, "tool_calls", None):
+        return "mathematician_agent_reasoner"
+
+    return send_tool_calls(last_message, TOOL_NODES)
+
+
+def route_after_tool(state: AgentState) -> str:
+    """Tool results go back to plan_executor while a plan is running"""
+    if state.get("calculation_plan", {}).get("status") == "running":
+        return "plan_executor"
+    return "mathematician_agent_reasoner"
+
+
+# Define routing logic - route every tool call to its specific tool node
+def should_continue(state: AgentState):
+    # Independent tool calls in one message run in parallel, one Send per call
+    sends = send_tool_calls(state["messages"][-1], TOOL_NODES)
+    return sends or END
 
 
 # Build the graph
 graph = StateGraph(AgentState)
 
 # Add nodes
-graph.add_node("mathematician_agent_reasoner", reasoner_node)
-graph.add_node("mathematician_agent_executor", executor_node)
+graph.add_node("mathematician_agent_reasoner",
+               dual_node(reasoner_node, areasoner_node))
+graph.add_node("mathematician_agent_executor",
+               dual_node(executor_node, aexecutor_node))
 graph.add_node("addition_tool", addition_node)
 graph.add_node("subtraction_tool", subtraction_node)
 graph.add_node("multiplication_tool", multiplication_node)
 graph.add_node("division_tool", division_node)
 graph.add_node("exponentiation_tool", exponentiation_node)
 
+graph.add_node("calculation_planner",
+               dual_node(planner_node, aplanner_node))
+graph.add_node("plan_executor", dual_node(plan_executor_node))
+
 # Add edges
-graph.add_edge(START, "mathematician_agent_reasoner")
+graph.add_conditional_edges(
+    START, route_start, ["calculation_planner", "mathematician_agent_reasoner"])
+graph.add_conditional_edges(
+    "calculation_planner", route_after_planner, ["plan_executor", "mathematician_agent_reasoner"])
+graph.add_conditional_edges(
+    "plan_executor", route_plan_layer,
+    TOOL_NODES + ["mathematician_agent_reasoner"])
 graph.add_edge("mathematician_agent_reasoner", "mathematician_agent_executor")
-graph.add_conditional_edges("mathematician_agent_executor", should_continue)
+graph.add_conditional_edges(
+    "mathematician_agent_executor", should_continue, TOOL_NODES + [END])
 
-# All tool nodes go back to the reasoner (not executor)
-graph.add_edge("addition_tool", "mathematician_agent_reasoner")
-graph.add_edge("subtraction_tool", "mathematician_agent_reasoner")
-graph.add_edge("multiplication_tool", "mathematician_agent_reasoner")
-graph.add_edge("division_tool", "mathematician_agent_reasoner")
-graph.add_edge("exponentiation_tool", "mathematician_agent_reasoner")
+# Tool nodes go back to the reasoner (not executor), or to plan_executor while a plan runs
+for tool_node_name in TOOL_NODES:
+    graph.add_conditional_edges(
+        tool_node_name, route_after_tool, ["plan_executor", "mathematician_agent_reasoner"])
 
 # Compile the graph
-app = graph.compile()
+# Per-node latency/token/cost metrics (see metrics.py)
+app = instrument_graph(graph.compile(), "phase1")
 
 # Test function
 
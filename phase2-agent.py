@@ -39,7 +39,6 @@ import inspect
 import os
 from typing import Annotated, List
 
-import requests
 from dotenv import load_dotenv
 from langchain_core.messages import (AIMessage, BaseMessage, HumanMessage,
                                      SystemMessage, ToolMessage)
@@ -48,9 +47,21 @@ from langchain_openai import ChatOpenAI
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
+from langgraph.types import Send
 from langsmith import traceable
 from typing_extensions import TypedDict
 
+from conversation_context import (abuild_conversation_context,
+                                  build_conversation_context)
+from fused_reasoning import (FUSED_REASONING, build_fused_tool_prompt,
+                             split_tool_response, take_fused_action)
+from graph_nodes import dual_node, send_tool_calls, without_token_stream
+from llm_cache import with_llm_cache
+from metrics import instrument_graph
+from rate_limiter import openai_http_clients
+from safe_eval import safe_eval
+from search_client import aperplexity_search, perplexity_search
+
 # Load environment variables
 load_dotenv()
 
@@ -60,6 +71,11 @@ load_dotenv()
 class AgentState(TypedDict):
     messages: Annotated[List[HumanMessage | AIMessage |
                              ToolMessage], add_messages]
+    # Rolling summary of turns older than the recent window (see conversation_context.py)
+    conversation_summary: str
+    summarized_message_count: int
+    # Executor action precomputed by the reasoner in fused mode (see fused_reasoning.py)
+    fused_action: AIMessage
 
 # Data Analysis Tool
 
@@ -69,7 +85,7 @@ def data_analysis_tool(expression: str) -> str:
     """
     Perform mathematical calculations and data analysis operations.
     Supports basic arithmetic: addition (+), subtraction (-), multiplication (*), 
-    division (/), exponentiation (**), parentheses for grouping.
+    division (/), exponentiation (** or ^), parentheses for grouping.
 
     Examples:
     - "1200000000 + 800000000 + 600000000" 
@@ -78,14 +94,8 @@ def data_analysis_tool(expression: str) -> str:
     - "2 ** 10"
     """
     try:
-        # Clean the expression - remove any non-mathematical characters except basic operators
-        import re
-
-        # Allow numbers, operators, parentheses, decimal points, and spaces
-        cleaned = re.sub(r'[^0-9+\-*/(). ]', '', expression)
-
-        # Evaluate the mathematical expression safely
-        result = eval(cleaned)
+        # Arithmetic only, with bounded exponents, magnitude and time (see safe_eval.py)
+        result = safe_eval(expression)
 
         return f"Calculation: {expression} = {result}"
     except Exception as e:
@@ -102,35 +112,19 @@ def search_tool(query: str) -> str:
         query: The search query (e.g., "population of New York City", "GDP of Japan", "weather in Paris")
     """
     try:
-        url = "https://api.perplexity.ai/chat/completions"
-
-        payload = {
-            "model": "sonar",
-            "messages": [
-                {
-                    "role": "system",
-                    "content": "You are a helpful research assistant. Provide accurate, up-to-date information based on web search results. Be concise and include relevant details like dates or sources when available."
-                },
-                {
-                    "role": "user",
-                    "content": query
-                }
-            ],
-            "max_tokens": 300,
-            "temperature": 0.1,
-            "stream": False
-        }
+        # Served from the persistent search cache when a fresh entry exists
+        search_info = perplexity_search(query)
 
-        headers = {
-            "Authorization": f"Bearer {os.getenv('PERPLEXITY_API_KEY')}",
-            "Content-Type": "application/json"
-        }
+        return f"Search results for '{query}': {search_info}"
+
+    except Exception as e:
+        return f"Error searching for '{query}': {str(e)}. Please check your PERPLEXITY_API_KEY in .env file."
 
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
 
-        result = response.json()
-        search_info = result['choices'][0]['message']['content']
+async def asearch_tool(query: str) -> str:
+    """Async implementation of search_tool (used by ToolNode under ainvoke)"""
+    try:
+        search_info = await aperplexity_search(query)
 
         return f"Search results for '{query}': {search_info}"
 
@@ -138,9 +132,21 @@ def search_tool(query: str) -> str:
         return f"Error searching for '{query}': {str(e)}. Please check your PERPLEXITY_API_KEY in .env file."
 
 
+search_tool.coroutine = asearch_tool
+
+
 # Reflection Tool
 
 
+def build_reflection_prompt(thoughts: str) -> str:
+    # This is just an LLM call for pure reasoning
+    return f"""You are reflecting on the following thoughts and information:
+
+{thoughts}
+
+Based on this, provide your analysis, insights, or conclusions. Think step by step and be thorough in your reasoning."""
+
+
 @tool
 def reflection_tool(thoughts: str) -> str:
     """
@@ -149,35 +155,33 @@ def reflection_tool(thoughts: str) -> str:
     Args:
         thoughts: Your current thoughts or reasoning that you want to reflect on
     """
-    # This is just an LLM call for pure reasoning
-    reflection_prompt = f"""You are reflecting on the following thoughts and information:
+    try:
+        reflection_response = llm.invoke(
+            [SystemMessage(content=build_reflection_prompt(thoughts))])
+        return f"Reflection: {reflection_response.content}"
+    except Exception as e:
+        return f"Error during reflection: {str(e)}"
 
-{thoughts}
-
-Based on this, provide your analysis, insights, or conclusions. Think step by step and be thorough in your reasoning."""
 
+async def areflection_tool(thoughts: str) -> str:
+    """Async implementation of reflection_tool (used by ToolNode under ainvoke)"""
     try:
-        reflection_response = llm.invoke(
-            [SystemMessage(content=reflection_prompt)])
+        reflection_response = await llm.ainvoke(
+            [SystemMessage(content=build_reflection_prompt(thoughts))])
         return f"Reflection: {reflection_response.content}"
     except Exception as e:
         return f"Error during reflection: {str(e)}"
 
 
+reflection_tool.coroutine = areflection_tool
+
+
 # Conclusion Tool
 
 
-@tool
-def conclusion_tool(findings: str, limitations: str = "") -> str:
-    """
-    Provide your final research conclusion with comprehensive findings.
-    This is the standard way to complete any research task - use this when you're ready to deliver your final answer.
-    Args:
-        findings: What you discovered and analyzed during your research
-        limitations: Any gaps in data or information you couldn't find (optional - leave empty if no significant limitations)
-    """
+def build_conclusion_prompt(findings: str, limitations: str = "") -> str:
     if limitations.strip():
-        conclusion_prompt = f"""You are completing a research task. Provide a comprehensive final answer based on:
+        return f"""You are completing a research task. Provide a comprehensive final answer based on:
 
 FINDINGS:
 {findings}
@@ -194,7 +198,7 @@ Create a helpful response that:
 
 Be thorough, professional, and provide maximum value to the user."""
     else:
-        conclusion_prompt = f"""You are completing a research task. Provide a comprehensive final answer based on:
+        return f"""You are completing a research task. Provide a comprehensive final answer based on:
 
 FINDINGS:
 {findings}
@@ -208,14 +212,37 @@ Create a helpful response that:
 
 Be thorough, professional, and deliver a high-quality research conclusion."""
 
+
+@tool
+def conclusion_tool(findings: str, limitations: str = "") -> str:
+    """
+    Provide your final research conclusion with comprehensive findings.
+    This is the standard way to complete any research task - use this when you're ready to deliver your final answer.
+    Args:
+        findings: What you discovered and analyzed during your research
+        limitations: Any gaps in data or information you couldn't find (optional - leave empty if no significant limitations)
+    """
     try:
         conclusion_response = llm.invoke(
-            [SystemMessage(content=conclusion_prompt)])
+            [SystemMessage(content=build_conclusion_prompt(findings, limitations))])
         return f"CONCLUSION: {conclusion_response.content}"
     except Exception as e:
         return f"Error creating conclusion: {str(e)}"
 
 
+async def aconclusion_tool(findings: str, limitations: str = "") -> str:
+    """Async implementation of conclusion_tool (used by ToolNode under ainvoke)"""
+    try:
+        conclusion_response = await llm.ainvoke(
+            [SystemMessage(content=build_conclusion_prompt(findings, limitations))])
+        return f"CONCLUSION: {conclusion_response.content}"
+    except Exception as e:
+        return f"Error creating conclusion: {str(e)}"
+
+
+conclusion_tool.coroutine = aconclusion_tool
+
+
 # All tools
 analysis_tools = [data_analysis_tool]
 search_tools = [search_tool]
@@ -224,19 +251,29 @@ conclusion_tools = [conclusion_tool]
 all_tools = analysis_tools + search_tools + reflection_tools + conclusion_tools
 
 # Create consolidated tool nodes
+# Graph node name of each tool node (the node is named after its tool)
+TOOL_NODES = [tool.name for tool in all_tools]
+
 data_analysis_tool_node = ToolNode(analysis_tools)
 search_tool_node = ToolNode(search_tools)
 reflection_tool_node = ToolNode(reflection_tools)
 conclusion_tool_node = ToolNode(conclusion_tools)
 
 # Initialize LLM
-llm = ChatOpenAI(model="gpt-4o", temperature=0,
-                 api_key=os.getenv("OPENAI_API_KEY"))
+# Identical prompts are answered from the response cache (see llm_cache.py);
+# CASSETTE_MODE records or replays the model's HTTP traffic (see cassettes.py),
+# calls share the process-wide OpenAI rate limit (see rate_limiter.py), and
+# HEDGE_NODES duplicates slow requests of chosen nodes (see hedging.py)
+llm = with_llm_cache(ChatOpenAI(model="gpt-4o", temperature=0,
+                                api_key=os.getenv("OPENAI_API_KEY"),
+                                # Token usage is reported for streamed calls too
+                                stream_usage=True,
+                                **openai_http_clients()))
 llm_with_tools = llm.bind_tools(all_tools)
 
 
-def coordinator_reasoner_node(state: AgentState) -> AgentState:
-    """Research agent reasoner - analyzes the situation and decides what to do next"""
+def build_reasoning_prompt(conversation: str) -> str:
+    """Coordinator reasoner prompt for the current conversation context"""
 
     # Build tool descriptions for the coordinator
     tool_descriptions = []
@@ -246,11 +283,11 @@ def coordinator_reasoner_node(state: AgentState) -> AgentState:
 
     tools_text = "\n".join(tool_descriptions)
 
-    reasoning_prompt = f"""
+    return f"""
     You are a general research agent designed as an educational demonstration of how agentic systems work.
     Your purpose is to show how agents decompose problems and use tools strategically.
     
-    Current conversation: {[msg.content for msg in state['messages']]}
+    Current conversation: {conversation}
 
     Available tools:
     {tools_text}
@@ -265,7 +302,8 @@ def coordinator_reasoner_node(state: AgentState) -> AgentState:
     
     DEMONSTRATION GUIDELINES:
     - This is an educational demo - show clear step-by-step problem decomposition
-    - Break complex tasks into smaller, focused searches (search for one specific piece of information at a time)
+    - Break complex tasks into smaller, focused searches (each search looks for one specific piece of information)
+    - Searches or calculations that do not depend on each other can be recommended together - they run in parallel
     - ALWAYS use data analysis tools for any mathematical operations, calculations, or data comparisons
     - Don't try to do math in your head or ask other tools to do calculations
     - Make searches specific and targeted rather than broad
@@ -284,48 +322,145 @@ def coordinator_reasoner_node(state: AgentState) -> AgentState:
     Work through the problem systematically. Just provide your reasoning about what to do next.
     """
 
+
+def coordinator_reasoner_node(state: AgentState) -> AgentState:
+    """Research agent reasoner - analyzes the situation and decides what to do next"""
+
+    # Recent messages verbatim + running summary of older turns
+    conversation, context_update = build_conversation_context(state, llm)
+
+    reasoning_prompt = build_reasoning_prompt(conversation)
+
+    if FUSED_REASONING:
+        # One call returns both the reasoning and the executor's tool call
+        fused_response = llm_with_tools.invoke(
+            [SystemMessage(content=build_fused_tool_prompt(reasoning_prompt))])
+        reasoning_msg, action_msg = split_tool_response(fused_response)
+        return {
+            "messages": [reasoning_msg],
+            "fused_action": action_msg,
+            **context_update
+        }
+
     reasoning_response = llm.invoke([SystemMessage(content=reasoning_prompt)])
     reasoning_msg = AIMessage(content=reasoning_response.content)
 
     return {
-        "messages": [reasoning_msg]
+        "messages": [reasoning_msg],
+        **context_update
     }
 
 
-def coordinator_executor_node(state: AgentState) -> AgentState:
-    """Research agent executor - executes the reasoner's decision"""
+async def acoordinator_reasoner_node(state: AgentState) -> AgentState:
+    """Async version of coordinator_reasoner_node"""
+
+    conversation, context_update = await abuild_conversation_context(state, llm)
+
+    reasoning_prompt = build_reasoning_prompt(conversation)
+
+    if FUSED_REASONING:
+        # One call returns both the reasoning and the executor's tool call
+        fused_response = await llm_with_tools.ainvoke(
+            [SystemMessage(content=build_fused_tool_prompt(reasoning_prompt))])
+        reasoning_msg, action_msg = split_tool_response(fused_response)
+        return {
+            "messages": [reasoning_msg],
+            "fused_action": action_msg,
+            **context_update
+        }
+
+    reasoning_response = await llm.ainvoke([SystemMessage(content=reasoning_prompt)])
+    reasoning_msg = AIMessage(content=reasoning_response.content)
+
+    return {
+        "messages": [reasoning_msg],
+        **context_update
+    }
+
 
-    executor_prompt = """You are the executor for a general research agent. Your job is to follow the reasoning and execute the recommended action.
+EXECUTOR_PROMPT = """You are the executor for a general research agent. Your job is to follow the reasoning and execute the recommended action.
 
 Look at the most recent reasoning message and execute the recommended action with the tools you have available.
 
-Follow the reasoner's guidance precisely. Only do one action at a time. Do not use a tool that is not recommended by the reasoner. The reasoner should only be recommending one tool at a time. if it recommends using multiple tools, only use the first tool it recommends. Thank you."""
+Follow the reasoner's guidance precisely. Do not use a tool that is not recommended by the reasoner. If it recommends several independent actions (for example, searches for different facts), make all of those tool calls in this response - they run in parallel. Never combine conclusion_tool with other tool calls. Thank you."""
+
+
+def coordinator_executor_node(state: AgentState) -> AgentState:
+    """Research agent executor - executes the reasoner's decision"""
+
+    # Fused mode: the reasoner already chose the action
+    fused_update = take_fused_action(state)
+    if fused_update:
+        return fused_update
 
     # Combine the executor prompt with the conversation
     messages_with_guidance = [SystemMessage(
-        content=executor_prompt)] + state["messages"]
-    action_response = llm_with_tools.invoke(messages_with_guidance)
+        content=EXECUTOR_PROMPT)] + state["messages"]
+    action_response = without_token_stream(llm_with_tools).invoke(messages_with_guidance)
+
+    return {
+        "messages": [action_response]
+    }
+
+
+async def acoordinator_executor_node(state: AgentState) -> AgentState:
+    """Async version of coordinator_executor_node"""
+
+    # Fused mode: the reasoner already chose the action
+    fused_update = take_fused_action(state)
+    if fused_update:
+        return fused_update
+
+    messages_with_guidance = [SystemMessage(
+        content=EXECUTOR_PROMPT)] + state["messages"]
+    action_response = await without_token_stream(llm_with_tools).ainvoke(messages_with_guidance)
 
     return {
         "messages": [action_response]
     }
 
+
+def split_conclusion_call(message: AIMessage) -> tuple:
+    """
+    The conclusion_tool call to run, and a "skipped" ToolMessage for every other
+    call in `message`, so the thread's history answers each tool call it holds
+    """
+    calls = message.tool_calls
+    conclusion = next(call for call in calls if call["name"] == "conclusion_tool")
+    skipped = [ToolMessage(content="skipped: run concluded", tool_call_id=call["id"],
+                           name=call["name"])
+               for call in calls if call["id"] != conclusion["id"]]
+    return AIMessage(content="", tool_calls=[conclusion]), skipped
+
+
+def conclusion_node(state: AgentState) -> AgentState:
+    """Run conclusion_tool; calls made alongside it are answered as skipped"""
+    conclusion, skipped = split_conclusion_call(state["messages"][-1])
+    result = conclusion_tool_node.invoke({"messages": [conclusion]})
+    return {"messages": result["messages"] + skipped}
+
+
+async def aconclusion_node(state: AgentState) -> AgentState:
+    """Async version of conclusion_node"""
+    conclusion, skipped = split_conclusion_call(state["messages"][-1])
+    result = await conclusion_tool_node.ainvoke({"messages": [conclusion]})
+    return {"messages": result["messages"] + skipped}
+
 # Define routing logic
 
 
-def should_continue(state: AgentState) -> str:
+def should_continue(state: AgentState):
     last_message = state["messages"][-1]
-    if hasattr(last_message, 'tool_calls') and last_message.tool_calls:
-        tool_name = last_message.tool_calls[0].get('name', '')
-        # Route to consolidated tool nodes
-        if tool_name == 'data_analysis_tool':
-            return "data_analysis_tool"
-        elif tool_name == 'search_tool':
-            return "search_tool"
-        elif tool_name == 'reflection_tool':
-            return "reflection_tool"
-        elif tool_name == 'conclusion_tool':
-            return "conclusion_tool"
+    sends = send_tool_calls(last_message, TOOL_NODES)
+
+    # conclusion_tool ends the run, so calls made alongside it are moot;
+    # conclusion_node runs it and answers the others as skipped
+    if any(send.node == "conclusion_tool" for send in sends):
+        return [Send("conclusion_tool", {"messages": [last_message]})]
+
+    # Every other tool call runs in parallel, one Send per call
+    if sends:
+        return sends
 
     # If no tool calls, force the agent to go back to reasoner
     # The only way to END is through conclusion_tool
@@ -336,17 +471,20 @@ def should_continue(state: AgentState) -> str:
 graph = StateGraph(AgentState)
 
 # Add nodes
-graph.add_node("research_agent_reasoner", coordinator_reasoner_node)
-graph.add_node("research_agent_executor", coordinator_executor_node)
+graph.add_node("research_agent_reasoner",
+               dual_node(coordinator_reasoner_node, acoordinator_reasoner_node))
+graph.add_node("research_agent_executor",
+               dual_node(coordinator_executor_node, acoordinator_executor_node))
 graph.add_node("data_analysis_tool", data_analysis_tool_node)
 graph.add_node("search_tool", search_tool_node)
 graph.add_node("reflection_tool", reflection_tool_node)
-graph.add_node("conclusion_tool", conclusion_tool_node)
+graph.add_node("conclusion_tool", dual_node(conclusion_node, aconclusion_node))
 
 # Add edges
 graph.add_edge(START, "research_agent_reasoner")
 graph.add_edge("research_agent_reasoner", "research_agent_executor")
-graph.add_conditional_edges("research_agent_executor", should_continue)
+graph.add_conditional_edges(
+    "research_agent_executor", should_continue, TOOL_NODES + ["research_agent_reasoner"])
 
 # All tool nodes go back to the reasoner EXCEPT conclusion_tool which ends
 graph.add_edge("data_analysis_tool", "research_agent_reasoner")
@@ -355,7 +493,8 @@ graph.add_edge("reflection_tool", "research_agent_reasoner")
 graph.add_edge("conclusion_tool", END)
 
 # Compile the graph
-app = graph.compile()
+# Per-node latency/token/cost metrics (see metrics.py)
+app = instrument_graph(graph.compile(), "phase2")
 
 # Test function
 
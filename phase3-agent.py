@@ -103,52 +103,58 @@ Goal: Main research agent with memory management capabilities
 """
 
 import inspect
-import os
+import re
 from typing import Annotated, List
 
-import requests
 from dotenv import load_dotenv
 from langchain_core.messages import (AIMessage, BaseMessage, HumanMessage,
                                      SystemMessage, ToolMessage)
 from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
+from langgraph.channels import DeltaChannel
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
 from langsmith import traceable
 from typing_extensions import TypedDict
 
+from conversation_context import (abuild_conversation_context,
+                                  build_conversation_context)
+from fused_reasoning import (FUSED_REASONING, FusedDecision,
+                             build_fused_directive_prompt,
+                             split_directive_decision, take_fused_action)
+from graph_nodes import dual_node, without_token_stream
+from metrics import instrument_graph, record_memory_operation
+from model_tiers import ModelTiers
+from research_document import (apply_research_document_deltas,
+                               close_question_delta,
+                               create_empty_research_document,
+                               find_duplicate_finding, find_duplicate_question,
+                               find_open_question, findings_for_question,
+                               get_research_index,
+                               render_relevant_research_document,
+                               render_research_document, resolve_question_id)
+from safe_eval import safe_eval
+from search_cache import normalize_query
+from search_client import SEARCH_MAX_BATCH, asearch_many, search_many
+
 # Load environment variables
 load_dotenv()
 
 # Define our agent's state
 
 
-def create_empty_research_document() -> dict:
-    """Create an empty research document with proper structure"""
-    return {
-        # List of finding objects: {"content": str, "source": str, "confidence": str, "related_questions": List[str], "timestamp": str}
-        "findings": [],
-
-        # List of open question objects: {"id": str, "question": str, "added": str, "priority": str}
-        "open_questions": [],
-
-        # List of fully answered questions: {"id": str, "question": str, "answer": str, "evidence": List[str], "confidence": str, "closed": str}
-        "closed_questions_complete": [],
-
-        # List of partially answered questions: {"id": str, "question": str, "partial_answer": str, "limitations": List[str], "available_evidence": List[str], "confidence": str, "closed": str}
-        "closed_questions_partial": [],
-
-        # List of unsuccessful searches: {"query": str, "source": str, "reason": str, "partial_info": str, "potential_followups": List[str], "related_questions": List[str], "timestamp": str}
-        "unhelpful_searches": []
-    }
-
-
 class AgentState(TypedDict):
     messages: Annotated[List[HumanMessage | AIMessage |
                              ToolMessage], add_messages]
-    # Memory agent's document store - initialized with create_empty_research_document()
-    research_document: dict
+    # Rolling summary of turns older than the recent window (see conversation_context.py)
+    conversation_summary: str
+    summarized_message_count: int
+    # Memory agent's document store - initialized with create_empty_research_document().
+    # Nodes return delta operations (see research_document.py); checkpoints store
+    # those deltas instead of a full copy of the document per step
+    research_document: Annotated[dict, DeltaChannel(apply_research_document_deltas)]
+    # Executor directive precomputed by the reasoner in fused mode (see fused_reasoning.py)
+    fused_action: AIMessage
 
 # Data Analysis Tool - CONVERTED TO NODE-TO-NODE ROUTING
 
@@ -168,8 +174,6 @@ def data_analysis_node(state: AgentState) -> AgentState:
         expression = calc_part.split("\n")[0].strip()
     elif "calculate" in content.lower():
         # Try to extract expression from natural language
-        import re
-
         # Look for mathematical expressions in the content
         math_pattern = r'[\d+\-*/().%\s]+'
         matches = re.findall(math_pattern, content)
@@ -178,14 +182,8 @@ def data_analysis_node(state: AgentState) -> AgentState:
 
     if expression:
         try:
-            # Clean the expression - remove any non-mathematical characters except basic operators
-            import re
-
-            # Allow numbers, operators, parentheses, decimal points, and spaces
-            cleaned = re.sub(r'[^0-9+\-*/(). ]', '', expression)
-
-            # Evaluate the mathematical expression safely
-            result = eval(cleaned)
+            # Arithmetic only, with bounded exponents, magnitude and time (see safe_eval.py)
+            result = safe_eval(expression)
 
             result_message = f"📊 Calculation: {expression} = {result}"
             print(f"   🔢 {result_message}")
@@ -209,69 +207,94 @@ def data_analysis_node(state: AgentState) -> AgentState:
 # Search Tool - CONVERTED TO NODE-TO-NODE ROUTING
 
 
-@traceable
-def search_node(state: AgentState) -> AgentState:
-    """Search the web for information using Perplexity API"""
+def parse_search_queries(content: str) -> list:
+    """
+    Extract search queries from an executor decision. Accepts one query
+    ("SEARCH: query"), several "SEARCH:" lines, or a block of list items:
 
-    # Extract search query from the executor's decision
-    last_message = state["messages"][-1]
+        SEARCH:
+        - Google stock price growth past 5 years
+        - Orlando median home price growth past 5 years
+    """
+    list_item = re.compile(r"^(?:[-*•]|\d+[.)])\s+")
+
+    queries = []
+    in_block = False
+    for line in content.split("\n"):
+        line = line.strip()
+        if "SEARCH:" in line:
+            query = line.split("SEARCH:", 1)[1].strip()
+            if query:
+                queries.append(query)
+            in_block = True
+        elif in_block and list_item.match(line):
+            queries.append(list_item.sub("", line))
+        elif line:
+            # Any other text ends the query block
+            in_block = False
+
+    # Drop wrapping quotes/brackets and repeated queries, keep the order
+    unique = {}
+    for query in queries:
+        query = query.strip(" \"'[]`")
+        if query:
+            unique.setdefault(normalize_query(query), query)
+    return list(unique.values())[:SEARCH_MAX_BATCH]
+
+
+def extract_search_queries(last_message) -> list:
+    """Search queries requested by the executor's decision"""
     content = last_message.content
 
     # Parse the SEARCH section
-    query = ""
     if "SEARCH:" in content:
-        search_part = content.split("SEARCH:")[1].strip()
-        query = search_part.split("\n")[0].strip()
+        return parse_search_queries(content)
     elif hasattr(last_message, 'tool_calls') and last_message.tool_calls:
         # Handle tool call format for backward compatibility
-        tool_args = last_message.tool_calls[0].get('args', {})
-        query = tool_args.get('query', '')
+        queries = [call.get('args', {}).get('query', '')
+                   for call in last_message.tool_calls]
+        return [query for query in queries if query]
+    return []
 
-    if query:
-        try:
-            url = "https://api.perplexity.ai/chat/completions"
-
-            payload = {
-                "model": "sonar",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are a helpful research assistant. Provide accurate, up-to-date information based on web search results. Be concise and include relevant details like dates or sources when available."
-                    },
-                    {
-                        "role": "user",
-                        "content": query
-                    }
-                ],
-                "max_tokens": 300,
-                "temperature": 0.1,
-                "stream": False
-            }
 
-            headers = {
-                "Authorization": f"Bearer {os.getenv('PERPLEXITY_API_KEY')}",
-                "Content-Type": "application/json"
-            }
+def format_search_results(results: list) -> str:
+    """Turn [(query, search_info, error)] into one attributed result message"""
+    if len(results) == 1:
+        query, search_info, error = results[0]
+        if error is None:
+            print(f"   🌐 Searched: {query}")
+            return f"🔍 Search results for '{query}': {search_info}"
+        error_message = f"❌ Error searching for '{query}': {str(error)}"
+        print(f"   🌐 {error_message}")
+        return error_message
 
-            response = requests.post(url, json=payload, headers=headers)
-            response.raise_for_status()
+    # Independent queries ran concurrently, results merged in query order
+    sections = []
+    for i, (query, search_info, error) in enumerate(results, 1):
+        if error is None:
+            sections.append(f"[{i}] '{query}': {search_info}")
+            print(f"   🌐 Searched: {query}")
+        else:
+            sections.append(
+                f"[{i}] ❌ Error searching for '{query}': {str(error)}")
+            print(f"   🌐 ❌ Error searching for '{query}': {str(error)}")
 
-            result = response.json()
-            search_info = result['choices'][0]['message']['content']
+    return f"🔍 Search results for {len(results)} queries:\n" + "\n".join(sections)
 
-            result_message = f"🔍 Search results for '{query}': {search_info}"
-            print(f"   🌐 Searched: {query}")
 
-            return {
-                "messages": [AIMessage(content=result_message)]
-            }
+@traceable
+def search_node(state: AgentState) -> AgentState:
+    """Search the web for one query, or a batch of independent queries concurrently"""
 
-        except Exception as e:
-            error_message = f"❌ Error searching for '{query}': {str(e)}"
-            print(f"   🌐 {error_message}")
-            return {
-                "messages": [AIMessage(content=error_message)]
-            }
+    # Extract search queries from the executor's decision
+    queries = extract_search_queries(state["messages"][-1])
+
+    if queries:
+        # Served from the persistent search cache when a fresh entry exists
+        results = search_many(queries)
+        return {
+            "messages": [AIMessage(content=format_search_results(results))]
+        }
     else:
         error_message = "❌ Could not extract search query from executor decision"
         print(f"   🌐 {error_message}")
@@ -280,14 +303,29 @@ def search_node(state: AgentState) -> AgentState:
         }
 
 
-# Reflection Tool - CONVERTED TO NODE-TO-NODE ROUTING
-
 @traceable
-def reflection_node(state: AgentState) -> AgentState:
-    """Reflect on information and reasoning without external tools"""
+async def asearch_node(state: AgentState) -> AgentState:
+    """Async version of search_node"""
 
-    # Extract reflection request from the executor's decision
-    last_message = state["messages"][-1]
+    queries = extract_search_queries(state["messages"][-1])
+
+    if queries:
+        results = await asearch_many(queries)
+        return {
+            "messages": [AIMessage(content=format_search_results(results))]
+        }
+    else:
+        error_message = "❌ Could not extract search query from executor decision"
+        print(f"   🌐 {error_message}")
+        return {
+            "messages": [AIMessage(content=error_message)]
+        }
+
+
+# Reflection Tool - CONVERTED TO NODE-TO-NODE ROUTING
+
+def extract_reflection_thoughts(last_message) -> str:
+    """Thoughts to reflect on, from the executor's decision"""
     content = last_message.content
 
     # Parse the REFLECTION section
@@ -302,18 +340,29 @@ def reflection_node(state: AgentState) -> AgentState:
         # Handle tool call format for backward compatibility
         tool_args = last_message.tool_calls[0].get('args', {})
         thoughts = tool_args.get('thoughts', '')
+    return thoughts
 
-    if thoughts:
-        # This is just an LLM call for pure reasoning
-        reflection_prompt = f"""You are reflecting on the following thoughts and information:
+
+def build_reflection_prompt(thoughts: str) -> str:
+    # This is just an LLM call for pure reasoning
+    return f"""You are reflecting on the following thoughts and information:
 
     {thoughts}
 
     Based on this, provide your analysis, insights, or conclusions. Think step by step and be thorough in your reasoning."""
 
+
+@traceable
+def reflection_node(state: AgentState) -> AgentState:
+    """Reflect on information and reasoning without external tools"""
+
+    # Extract reflection request from the executor's decision
+    thoughts = extract_reflection_thoughts(state["messages"][-1])
+
+    if thoughts:
         try:
-            reflection_response = llm.invoke(
-                [SystemMessage(content=reflection_prompt)])
+            reflection_response = llm_for("reflection_node").invoke(
+                [SystemMessage(content=build_reflection_prompt(thoughts))])
 
             result_message = f"🤔 Reflection: {reflection_response.content}"
             print(f"   💭 Reflecting on current information...")
@@ -335,14 +384,41 @@ def reflection_node(state: AgentState) -> AgentState:
         }
 
 
-# Conclusion Tool - CONVERTED TO NODE-TO-NODE ROUTING
-
 @traceable
-def conclusion_node(state: AgentState) -> AgentState:
-    """Provide final research conclusion and end the graph"""
+async def areflection_node(state: AgentState) -> AgentState:
+    """Async version of reflection_node"""
 
-    # Extract conclusion request from the executor's decision
-    last_message = state["messages"][-1]
+    thoughts = extract_reflection_thoughts(state["messages"][-1])
+
+    if thoughts:
+        try:
+            reflection_response = await llm_for("reflection_node").ainvoke(
+                [SystemMessage(content=build_reflection_prompt(thoughts))])
+
+            result_message = f"🤔 Reflection: {reflection_response.content}"
+            print(f"   💭 Reflecting on current information...")
+
+            return {
+                "messages": [AIMessage(content=result_message)]
+            }
+        except Exception as e:
+            error_message = f"❌ Error during reflection: {str(e)}"
+            print(f"   💭 {error_message}")
+            return {
+                "messages": [AIMessage(content=error_message)]
+            }
+    else:
+        error_message = "❌ Could not extract reflection thoughts from executor decision"
+        print(f"   💭 {error_message}")
+        return {
+            "messages": [AIMessage(content=error_message)]
+        }
+
+
+# Conclusion Tool - CONVERTED TO NODE-TO-NODE ROUTING
+
+def extract_conclusion_request(last_message) -> tuple:
+    """(findings, limitations) from the executor's decision"""
     content = last_message.content
 
     # Parse the CONCLUSION section
@@ -371,9 +447,12 @@ def conclusion_node(state: AgentState) -> AgentState:
         # Use all available context as findings
         findings = "Based on our research and analysis from the conversation"
 
-    if findings:
-        if limitations.strip():
-            conclusion_prompt = f"""You are completing a research task. Provide a comprehensive final answer based on:
+    return findings, limitations
+
+
+def build_conclusion_prompt(findings: str, limitations: str) -> str:
+    if limitations.strip():
+        return f"""You are completing a research task. Provide a comprehensive final answer based on:
 
     FINDINGS:
     {findings}
@@ -389,8 +468,8 @@ def conclusion_node(state: AgentState) -> AgentState:
     5. Summarizes the overall insights from your research
 
     Be thorough, professional, and provide maximum value to the user."""
-        else:
-            conclusion_prompt = f"""You are completing a research task. Provide a comprehensive final answer based on:
+    else:
+        return f"""You are completing a research task. Provide a comprehensive final answer based on:
 
     FINDINGS:
     {findings}
@@ -404,9 +483,49 @@ def conclusion_node(state: AgentState) -> AgentState:
 
     Be thorough, professional, and deliver a high-quality research conclusion."""
 
+
+@traceable
+def conclusion_node(state: AgentState) -> AgentState:
+    """Provide final research conclusion and end the graph"""
+
+    # Extract conclusion request from the executor's decision
+    findings, limitations = extract_conclusion_request(state["messages"][-1])
+
+    if findings:
+        try:
+            conclusion_response = llm_for("conclusion_node").invoke(
+                [SystemMessage(content=build_conclusion_prompt(findings, limitations))])
+
+            result_message = f"🎯 CONCLUSION: {conclusion_response.content}"
+            print(f"   ✅ Research completed - delivering final conclusion")
+
+            return {
+                "messages": [AIMessage(content=result_message)]
+            }
+        except Exception as e:
+            error_message = f"❌ Error creating conclusion: {str(e)}"
+            print(f"   ✅ {error_message}")
+            return {
+                "messages": [AIMessage(content=error_message)]
+            }
+    else:
+        error_message = "❌ Could not extract conclusion findings from executor decision"
+        print(f"   ✅ {error_message}")
+        return {
+            "messages": [AIMessage(content=error_message)]
+        }
+
+
+@traceable
+async def aconclusion_node(state: AgentState) -> AgentState:
+    """Async version of conclusion_node"""
+
+    findings, limitations = extract_conclusion_request(state["messages"][-1])
+
+    if findings:
         try:
-            conclusion_response = llm.invoke(
-                [SystemMessage(content=conclusion_prompt)])
+            conclusion_response = await llm_for("conclusion_node").ainvoke(
+                [SystemMessage(content=build_conclusion_prompt(findings, limitations))])
 
             result_message = f"🎯 CONCLUSION: {conclusion_response.content}"
             print(f"   ✅ Research completed - delivering final conclusion")
@@ -428,8 +547,18 @@ def conclusion_node(state: AgentState) -> AgentState:
         }
 
 
-llm = ChatOpenAI(model="gpt-4o", temperature=0,
-                 api_key=os.getenv("OPENAI_API_KEY"))
+# Each node's model comes from its tier in model_tiers.json (see model_tiers.py):
+# a small model for the executors, the large one for reasoning and conclusions.
+# Identical prompts are answered from the response cache (see llm_cache.py);
+# CASSETTE_MODE records or replays the model's HTTP traffic (see cassettes.py),
+# calls share the process-wide OpenAI rate limit (see rate_limiter.py), and
+# HEDGE_NODES duplicates slow requests of chosen nodes (see hedging.py)
+model_tiers = ModelTiers.load()
+
+
+def llm_for(node: str):
+    """The shared chat model of `node`'s tier, built on first use"""
+    return model_tiers.model(node)
 
 
 # ============================================================================
@@ -456,9 +585,8 @@ def initialization_node(state: AgentState) -> AgentState:
 # MEMORY AGENT NODES
 # ============================================================================
 
-@traceable
-def memory_agent_reasoner_node(state: AgentState) -> AgentState:
-    """Memory agent reasoner - decides what memory operations to perform"""
+def build_memory_reasoning_prompt(state: AgentState, conversation: str) -> str:
+    """Memory agent reasoner prompt for the current state"""
 
     # Available memory operations (using node-to-node routing)
     memory_tools_text = """
@@ -471,13 +599,13 @@ def memory_agent_reasoner_node(state: AgentState) -> AgentState:
     - CONCLUDE_MEMORY_PROCESSING: Finish memory processing and return to orchestrator
     """
 
-    # Get full research document
-    doc = state.get("research_document", {})
+    # Compact outline of the research document (re-rendered only after changes)
+    doc = render_research_document(state.get("research_document", {}))
 
-    reasoning_prompt = f"""
+    return f"""
     You are the Memory Agent's reasoner. Your job is to analyze memory requests and decide what memory operations to perform.
     
-    Current conversation: {[msg.content for msg in state['messages']]}
+    Current conversation: {conversation}
     Current research document: {doc}
 
     Available memory operations:
@@ -487,27 +615,78 @@ def memory_agent_reasoner_node(state: AgentState) -> AgentState:
     1. Analyze the request to understand what memory operations are needed
     2. Break down complex requests into specific tool calls
     3. For questions, assess priority: HIGH (core research goal), MEDIUM (supporting info), LOW (nice-to-have)
-    4. You CAN recommend multiple tool calls in one response
+    4. You CAN recommend multiple tool calls in one response - they are applied together in one step
     5. Be specific about each operation needed
     
     Decide what memory operations to perform. Be specific about each tool call needed.
     When adding questions, consider their importance to the overall research goal.
     """
 
-    reasoning_response = llm.invoke(
-        [SystemMessage(content=reasoning_prompt)])
+
+@traceable
+def memory_agent_reasoner_node(state: AgentState) -> AgentState:
+    """Memory agent reasoner - decides what memory operations to perform"""
+    llm = llm_for("memory_agent_reasoner")
+
+    # Recent messages verbatim + running summary of older turns
+    conversation, context_update = build_conversation_context(state, llm)
+
+    reasoning_prompt = build_memory_reasoning_prompt(state, conversation)
+
+    if FUSED_REASONING:
+        # One structured call returns both the reasoning and the executor's directive
+        decision = without_token_stream(llm.with_structured_output(FusedDecision)).invoke(
+            [SystemMessage(content=build_fused_directive_prompt(
+                reasoning_prompt, MEMORY_EXECUTOR_PROMPT))])
+        reasoning_msg, action_msg = split_directive_decision(decision)
+        print(f"🧠 Memory Agent Reasoning: {reasoning_msg.content}")
+        return {
+            "messages": [reasoning_msg],
+            "fused_action": action_msg,
+            **context_update
+        }
+
+    reasoning_response = llm.invoke([SystemMessage(content=reasoning_prompt)])
     print(f"🧠 Memory Agent Reasoning: {reasoning_response.content}")
 
     return {
-        "messages": [AIMessage(content=reasoning_response.content)]
+        "messages": [AIMessage(content=reasoning_response.content)],
+        **context_update
     }
 
 
 @traceable
-def memory_agent_executor_node(state: AgentState) -> AgentState:
-    """Memory agent executor - decides which memory operation to execute"""
+async def amemory_agent_reasoner_node(state: AgentState) -> AgentState:
+    """Async version of memory_agent_reasoner_node"""
+    llm = llm_for("memory_agent_reasoner")
+
+    conversation, context_update = await abuild_conversation_context(state, llm)
+
+    reasoning_prompt = build_memory_reasoning_prompt(state, conversation)
+
+    if FUSED_REASONING:
+        # One structured call returns both the reasoning and the executor's directive
+        decision = await without_token_stream(llm.with_structured_output(FusedDecision)).ainvoke(
+            [SystemMessage(content=build_fused_directive_prompt(
+                reasoning_prompt, MEMORY_EXECUTOR_PROMPT))])
+        reasoning_msg, action_msg = split_directive_decision(decision)
+        print(f"🧠 Memory Agent Reasoning: {reasoning_msg.content}")
+        return {
+            "messages": [reasoning_msg],
+            "fused_action": action_msg,
+            **context_update
+        }
 
-    executor_prompt = """You are the Memory Agent's executor. Your job is to decide which memory operation to execute based on the reasoner's analysis.
+    reasoning_response = await llm.ainvoke([SystemMessage(content=reasoning_prompt)])
+    print(f"🧠 Memory Agent Reasoning: {reasoning_response.content}")
+
+    return {
+        "messages": [AIMessage(content=reasoning_response.content)],
+        **context_update
+    }
+
+
+MEMORY_EXECUTOR_PROMPT = """You are the Memory Agent's executor. Your job is to decide which memory operation to execute based on the reasoner's analysis.
 
 Look at the most recent reasoning message and decide what memory operation to perform.
 
@@ -525,6 +704,12 @@ OPERATION: [operation_name]
 DETAILS: [what you want to do]
 Priority: [high/medium/low] (for questions only)
 
+When the reasoner recommends several operations, perform them all in one response
+by repeating the OPERATION/DETAILS block once per operation. ADD_OPEN_QUESTION,
+ADD_FINDING, LOG_UNHELPFUL_SEARCH and CLOSE_QUESTION_* operations can be batched;
+a batch is applied all-or-nothing. End the batch with CONCLUDE_MEMORY_PROCESSING
+if nothing else is left to do. MEMORY_REFLECTION must be requested on its own.
+
 Examples:
 OPERATION: ADD_OPEN_QUESTION  
 DETAILS: What are the top 3 highest grossing video games?
@@ -561,12 +746,64 @@ DETAILS: Focus: patterns
 Analyze current research state for patterns, gaps, and next steps
 
 OPERATION: CONCLUDE_MEMORY_PROCESSING
-DETAILS: Finished processing search results and updating research document"""
+DETAILS: Finished processing search results and updating research document
+
+Batch example (three operations, then conclude):
+OPERATION: ADD_OPEN_QUESTION
+DETAILS: What is the population of Orlando?
+Priority: high
+
+OPERATION: ADD_OPEN_QUESTION
+DETAILS: What is the land area of Orlando?
+Priority: medium
+
+OPERATION: ADD_FINDING
+DETAILS: Content: Orlando population is about 320,000 (2023)
+Source: search_tool
+Confidence: high
+Related_questions: What is the population of Orlando?
+
+OPERATION: CONCLUDE_MEMORY_PROCESSING
+DETAILS: Logged questions and stored the population finding"""
+
+
+@traceable
+def memory_agent_executor_node(state: AgentState) -> AgentState:
+    """Memory agent executor - decides which memory operation to execute"""
+
+    # Fused mode: the reasoner already chose the directive
+    fused_update = take_fused_action(state)
+    if fused_update:
+        print(f"🔧 Memory Agent Executor Decision: {fused_update['messages'][0].content}")
+        return fused_update
 
     # Combine the executor prompt with the conversation
     messages_with_guidance = [SystemMessage(
-        content=executor_prompt)] + state["messages"]
-    action_response = llm.invoke(messages_with_guidance)
+        content=MEMORY_EXECUTOR_PROMPT)] + state["messages"]
+    executor_llm = without_token_stream(llm_for("memory_agent_executor"))
+    action_response = executor_llm.invoke(messages_with_guidance)
+
+    print(f"🔧 Memory Agent Executor Decision: {action_response.content}")
+
+    return {
+        "messages": [action_response]
+    }
+
+
+@traceable
+async def amemory_agent_executor_node(state: AgentState) -> AgentState:
+    """Async version of memory_agent_executor_node"""
+
+    # Fused mode: the reasoner already chose the directive
+    fused_update = take_fused_action(state)
+    if fused_update:
+        print(f"🔧 Memory Agent Executor Decision: {fused_update['messages'][0].content}")
+        return fused_update
+
+    messages_with_guidance = [SystemMessage(
+        content=MEMORY_EXECUTOR_PROMPT)] + state["messages"]
+    executor_llm = without_token_stream(llm_for("memory_agent_executor"))
+    action_response = await executor_llm.ainvoke(messages_with_guidance)
 
     print(f"🔧 Memory Agent Executor Decision: {action_response.content}")
 
@@ -581,6 +818,10 @@ def memory_operation_router(state: AgentState) -> str:
     last_message = state["messages"][-1]
     content = last_message.content.lower()
 
+    # Several OPERATION: blocks in one decision are applied together
+    if len(parse_memory_operations(last_message.content)) > 1:
+        return "apply_memory_batch"
+
     if "add_open_question" in content:
         return "add_open_question_node"
     elif "log_unhelpful_search" in content:
@@ -602,24 +843,28 @@ def memory_operation_router(state: AgentState) -> str:
 
 
 # ============================================================================
-# MEMORY OPERATION NODES
+# MEMORY OPERATIONS
 # ============================================================================
+# Each apply_* function parses one operation's DETAILS text and applies it to
+# a research document, returning (ok, result_message). They never touch graph
+# state, so the single-operation nodes and apply_memory_batch share them.
 
-@traceable
-def add_open_question_node(state: AgentState) -> AgentState:
-    """Add an open question to the research document"""
+def extract_operation_details(content: str) -> str:
+    """Return the text after DETAILS: in an executor decision ("" if missing)"""
+    if "DETAILS:" in content:
+        return content.split("DETAILS:")[1].strip()
+    return ""
 
-    # Extract the question from the executor's decision
-    last_message = state["messages"][-1]
-    content = last_message.content
+
+def apply_add_open_question(doc: dict, details: str) -> tuple:
+    """Add an open question to the research document"""
 
     # Parse the DETAILS section
     question = ""
     priority = "medium"  # Default fallback
 
-    if "DETAILS:" in content:
-        details_part = content.split("DETAILS:")[1].strip()
-        lines = details_part.split("\n")
+    if details:
+        lines = details.split("\n")
         question = lines[0].strip()
 
         # Look for priority in subsequent lines
@@ -628,44 +873,39 @@ def add_open_question_node(state: AgentState) -> AgentState:
                 priority = line.split(":", 1)[1].strip().lower()
                 break
 
-    if question:
-        # Create structured question object with unique ID
-        import uuid
-        from datetime import datetime
-        question_obj = {
-            # Short unique ID like "q_a1b2c3d4"
-            "id": f"q_{str(uuid.uuid4())[:8]}",
-            "question": question,
-            "added": datetime.now().isoformat(),
-            "priority": priority
-        }
-
-        # Add to research document
-        open_questions = state["research_document"]["open_questions"]
-        open_questions.append(question_obj)
-
-        result_message = f"✅ Added open question: '{question}'"
-        print(f"   📝 {result_message}")
+    if not question:
+        return False, "❌ Could not extract question from executor decision", []
+
+    # A rewording of a question already asked is merged into it
+    duplicate_id = find_duplicate_question(doc, question)
+    if duplicate_id is not None:
+        status = get_research_index(doc).status[duplicate_id]
+        if status != "open":
+            return True, f"✅ Question already answered ({status}) as {duplicate_id}: '{question}'", []
+        return True, f"✅ Question already open as {duplicate_id}: '{question}'", [
+            {"op": "merge_question", "id": duplicate_id, "priority": priority}]
+
+    # Create structured question object with unique ID
+    import hashlib
+    from datetime import datetime
+    # Short ID like "q_a1b2c3d4", derived from the question and how many came
+    # before it so reruns produce identical prompts (and LLM cache hits)
+    question_count = sum(len(doc[key]) for key in (
+        "open_questions", "closed_questions_complete", "closed_questions_partial"))
+    question_obj = {
+        "id": "q_" + hashlib.sha1(f"{question_count}:{question}".encode()).hexdigest()[:8],
+        "question": question,
+        "added": datetime.now().isoformat(),
+        "priority": priority
+    }
 
-        return {
-            "messages": [AIMessage(content=result_message)]
-        }
-    else:
-        error_message = "❌ Could not extract question from executor decision"
-        print(f"   📝 {error_message}")
-        return {
-            "messages": [AIMessage(content=error_message)]
-        }
+    return True, f"✅ Added open question: '{question}'", [
+        {"op": "add_open_question", "question": question_obj}]
 
 
-@traceable
-def log_unhelpful_search_node(state: AgentState) -> AgentState:
+def apply_log_unhelpful_search(doc: dict, details: str) -> tuple:
     """Log an unhelpful search to track unsuccessful queries"""
 
-    # Extract the search details from the executor's decision
-    last_message = state["messages"][-1]
-    content = last_message.content
-
     # Parse the DETAILS section
     query = ""
     reason = ""
@@ -673,126 +913,112 @@ def log_unhelpful_search_node(state: AgentState) -> AgentState:
     potential_followups = []
     related_questions = []
 
-    if "DETAILS:" in content:
-        details_part = content.split("DETAILS:")[1].strip()
-        lines = details_part.split("\n")
-
-        current_field = None
-        for line in lines:
-            line = line.strip()
-            if line.lower().startswith("query:"):
-                query = line.split(":", 1)[1].strip()
-            elif line.lower().startswith("reason:"):
-                reason = line.split(":", 1)[1].strip()
-            elif line.lower().startswith("partial_info:"):
-                partial_info = line.split(":", 1)[1].strip()
-            elif line.lower().startswith("potential_followups:"):
-                followups_text = line.split(":", 1)[1].strip()
-                potential_followups = [
-                    f.strip() for f in followups_text.split(",") if f.strip()]
-            elif line.lower().startswith("related_questions:"):
-                questions_text = line.split(":", 1)[1].strip()
-                related_questions = [
-                    q.strip() for q in questions_text.split(",") if q.strip()]
-
-    if query and reason:
-        # Create structured unhelpful search object
-        from datetime import datetime
-        search_obj = {
-            "query": query,
-            "source": "search_tool",  # Default source
-            "reason": reason,
-            "partial_info": partial_info,
-            "potential_followups": potential_followups,
-            "related_questions": related_questions,
-            "timestamp": datetime.now().isoformat()
-        }
+    for line in details.split("\n"):
+        line = line.strip()
+        if line.lower().startswith("query:"):
+            query = line.split(":", 1)[1].strip()
+        elif line.lower().startswith("reason:"):
+            reason = line.split(":", 1)[1].strip()
+        elif line.lower().startswith("partial_info:"):
+            partial_info = line.split(":", 1)[1].strip()
+        elif line.lower().startswith("potential_followups:"):
+            followups_text = line.split(":", 1)[1].strip()
+            potential_followups = [
+                f.strip() for f in followups_text.split(",") if f.strip()]
+        elif line.lower().startswith("related_questions:"):
+            questions_text = line.split(":", 1)[1].strip()
+            related_questions = [
+                q.strip() for q in questions_text.split(",") if q.strip()]
+
+    if not (query and reason):
+        return False, "❌ Could not extract query and reason from executor decision", []
+
+    # Create structured unhelpful search object
+    from datetime import datetime
+    search_obj = {
+        "query": query,
+        "source": "search_tool",  # Default source
+        "reason": reason,
+        "partial_info": partial_info,
+        "potential_followups": potential_followups,
+        "related_questions": related_questions,
+        "timestamp": datetime.now().isoformat()
+    }
 
-        # Add to research document
-        unhelpful_searches = state["research_document"]["unhelpful_searches"]
-        unhelpful_searches.append(search_obj)
+    return True, f"✅ Logged unhelpful search: '{query}'", [
+        {"op": "log_unhelpful_search", "search": search_obj}]
 
-        result_message = f"✅ Logged unhelpful search: '{query}'"
-        print(f"   📝 {result_message}")
 
-        return {
-            "messages": [AIMessage(content=result_message)]
-        }
-    else:
-        error_message = "❌ Could not extract query and reason from executor decision"
-        print(f"   📝 {error_message}")
-        return {
-            "messages": [AIMessage(content=error_message)]
-        }
-
-
-@traceable
-def add_finding_node(state: AgentState) -> AgentState:
+def apply_add_finding(doc: dict, details: str) -> tuple:
     """Add a finding to the research document"""
 
-    # Extract the finding details from the executor's decision
-    last_message = state["messages"][-1]
-    content = last_message.content
-
     # Parse the DETAILS section
     finding_content = ""
     source = "search_tool"  # Default source
     confidence = "medium"   # Default confidence
     related_questions = []
 
-    if "DETAILS:" in content:
-        details_part = content.split("DETAILS:")[1].strip()
-        lines = details_part.split("\n")
+    for line in details.split("\n"):
+        line = line.strip()
+        if line.lower().startswith("content:"):
+            finding_content = line.split(":", 1)[1].strip()
+        elif line.lower().startswith("source:"):
+            source = line.split(":", 1)[1].strip()
+        elif line.lower().startswith("confidence:"):
+            confidence = line.split(":", 1)[1].strip().lower()
+        elif line.lower().startswith("related_questions:"):
+            questions_text = line.split(":", 1)[1].strip()
+            related_questions = [
+                q.strip() for q in questions_text.split(",") if q.strip()]
+
+    if not finding_content:
+        return False, "❌ Could not extract finding content from executor decision", []
+
+    # Create structured finding object
+    from datetime import datetime
+    finding_obj = {
+        "content": finding_content,
+        "source": source,
+        "confidence": confidence,
+        "related_questions": related_questions,
+        "timestamp": datetime.now().isoformat()
+    }
 
-        for line in lines:
-            line = line.strip()
-            if line.lower().startswith("content:"):
-                finding_content = line.split(":", 1)[1].strip()
-            elif line.lower().startswith("source:"):
-                source = line.split(":", 1)[1].strip()
-            elif line.lower().startswith("confidence:"):
-                confidence = line.split(":", 1)[1].strip().lower()
-            elif line.lower().startswith("related_questions:"):
-                questions_text = line.split(":", 1)[1].strip()
-                related_questions = [
-                    q.strip() for q in questions_text.split(",") if q.strip()]
-
-    if finding_content:
-        # Create structured finding object
-        from datetime import datetime
-        finding_obj = {
-            "content": finding_content,
-            "source": source,
-            "confidence": confidence,
-            "related_questions": related_questions,
-            "timestamp": datetime.now().isoformat()
-        }
+    # A finding restating one already recorded is merged into it
+    position = find_duplicate_finding(doc, finding_content)
+    if position is not None:
+        return True, f"✅ Merged duplicate finding into finding {position + 1}: '{finding_content[:50]}...'", [
+            {"op": "merge_finding", "index": position, "finding": finding_obj}]
 
-        # Add to research document
-        findings = state["research_document"]["findings"]
-        findings.append(finding_obj)
+    return True, f"✅ Added finding: '{finding_content[:50]}...'", [
+        {"op": "add_finding", "finding": finding_obj}]
 
-        result_message = f"✅ Added finding: '{finding_content[:50]}...'"
-        print(f"   📝 {result_message}")
 
-        return {
-            "messages": [AIMessage(content=result_message)]
-        }
-    else:
-        error_message = "❌ Could not extract finding content from executor decision"
-        print(f"   📝 {error_message}")
-        return {
-            "messages": [AIMessage(content=error_message)]
-        }
+def question_not_found_message(doc: dict, question_id: str) -> str:
+    """Explain a failed close so the next executor turn can correct the id"""
+    closed_id = resolve_question_id(doc, question_id)
+    if closed_id is not None:
+        return f"❌ Question {closed_id} is already closed"
+    open_ids = ", ".join(q["id"] for q in doc["open_questions"]) or "none"
+    return f"❌ Could not find open question with ID: {question_id} (open questions: {open_ids})"
 
 
-@traceable
-def close_question_complete_node(state: AgentState) -> AgentState:
-    """Move an open question to closed_questions_complete with full answer"""
+def pin_question_id(doc: dict, details: str) -> str:
+    """Replace the question_id in operation details with the open question it resolves to"""
+    def pin(match):
+        question_id = resolve_question_id(doc, match.group(2), status="open")
+        return match.group(1) + (question_id or match.group(2))
+
+    return re.sub(r"^([ \t]*question_id:[ \t]*)(.*?)[ \t]*$", pin, details,
+                  flags=re.MULTILINE | re.IGNORECASE)
 
-    # Extract the question details from the executor's decision
-    last_message = state["messages"][-1]
-    content = last_message.content
+
+def resolved_note(question_id: str, question: dict) -> str:
+    return "" if question["id"] == question_id else f" ({question_id} -> {question['id']})"
+
+
+def apply_close_question_complete(doc: dict, details: str) -> tuple:
+    """Move an open question to closed_questions_complete with full answer"""
 
     # Parse the DETAILS section
     question_id = ""
@@ -800,77 +1026,51 @@ def close_question_complete_node(state: AgentState) -> AgentState:
     evidence = []
     confidence = "medium"  # Default confidence
 
-    if "DETAILS:" in content:
-        details_part = content.split("DETAILS:")[1].strip()
-        lines = details_part.split("\n")
-
-        for line in lines:
-            line = line.strip()
-            if line.lower().startswith("question_id:"):
-                question_id = line.split(":", 1)[1].strip()
-            elif line.lower().startswith("answer:"):
-                answer = line.split(":", 1)[1].strip()
-            elif line.lower().startswith("evidence:"):
-                evidence_text = line.split(":", 1)[1].strip()
-                evidence = [e.strip()
-                            for e in evidence_text.split(",") if e.strip()]
-            elif line.lower().startswith("confidence:"):
-                confidence = line.split(":", 1)[1].strip().lower()
-
-    if question_id and answer:
-        # Find and remove the question from open_questions
-        open_questions = state["research_document"]["open_questions"]
-        question_to_move = None
-
-        for i, q in enumerate(open_questions):
-            if q.get("id") == question_id:
-                question_to_move = open_questions.pop(i)
-                break
-
-        if question_to_move:
-            # Create closed question object
-            from datetime import datetime
-            closed_question_obj = {
-                "id": question_id,
-                "question": question_to_move["question"],
-                "answer": answer,
-                "evidence": evidence,
-                "confidence": confidence,
-                "closed": datetime.now().isoformat()
-            }
+    for line in details.split("\n"):
+        line = line.strip()
+        if line.lower().startswith("question_id:"):
+            question_id = line.split(":", 1)[1].strip()
+        elif line.lower().startswith("answer:"):
+            answer = line.split(":", 1)[1].strip()
+        elif line.lower().startswith("evidence:"):
+            evidence_text = line.split(":", 1)[1].strip()
+            evidence = [e.strip()
+                        for e in evidence_text.split(",") if e.strip()]
+        elif line.lower().startswith("confidence:"):
+            confidence = line.split(":", 1)[1].strip().lower()
+
+    if not (question_id and answer):
+        return False, "❌ Could not extract question_id and answer from executor decision", []
+
+    # Find the question in open_questions (id or text, fuzzily)
+    question_to_move = find_open_question(doc, question_id)
+    if not question_to_move:
+        return False, question_not_found_message(doc, question_id), []
+
+    # Findings linked to the question stand in for evidence the executor left out
+    if not evidence:
+        evidence = [f["content"] for f in findings_for_question(doc, question_to_move["id"])]
+
+    # Create closed question object
+    from datetime import datetime
+    closed_question_obj = {
+        "id": question_to_move["id"],
+        "question": question_to_move["question"],
+        "answer": answer,
+        "evidence": evidence,
+        "confidence": confidence,
+        "closed": datetime.now().isoformat()
+    }
 
-            # Add to closed_questions_complete
-            closed_questions = state["research_document"]["closed_questions_complete"]
-            closed_questions.append(closed_question_obj)
+    # Move it to closed_questions_complete
+    return True, (f"✅ Closed question completely: '{question_to_move['question'][:50]}...'"
+                  f"{resolved_note(question_id, question_to_move)}"), [
+        close_question_delta("closed_questions_complete", closed_question_obj)]
 
-            result_message = f"✅ Closed question completely: '{question_to_move['question'][:50]}...'"
-            print(f"   📝 {result_message}")
 
-            return {
-                "messages": [AIMessage(content=result_message)]
-            }
-        else:
-            error_message = f"❌ Could not find open question with ID: {question_id}"
-            print(f"   📝 {error_message}")
-            return {
-                "messages": [AIMessage(content=error_message)]
-            }
-    else:
-        error_message = "❌ Could not extract question_id and answer from executor decision"
-        print(f"   📝 {error_message}")
-        return {
-            "messages": [AIMessage(content=error_message)]
-        }
-
-
-@traceable
-def close_question_partial_node(state: AgentState) -> AgentState:
+def apply_close_question_partial(doc: dict, details: str) -> tuple:
     """Move an open question to closed_questions_partial with partial answer"""
 
-    # Extract the question details from the executor's decision
-    last_message = state["messages"][-1]
-    content = last_message.content
-
     # Parse the DETAILS section
     question_id = ""
     partial_answer = ""
@@ -878,80 +1078,194 @@ def close_question_partial_node(state: AgentState) -> AgentState:
     available_evidence = []
     confidence = "medium"  # Default confidence
 
-    if "DETAILS:" in content:
-        details_part = content.split("DETAILS:")[1].strip()
-        lines = details_part.split("\n")
+    for line in details.split("\n"):
+        line = line.strip()
+        if line.lower().startswith("question_id:"):
+            question_id = line.split(":", 1)[1].strip()
+        elif line.lower().startswith("partial_answer:"):
+            partial_answer = line.split(":", 1)[1].strip()
+        elif line.lower().startswith("limitations:"):
+            limitations_text = line.split(":", 1)[1].strip()
+            limitations = [l.strip()
+                           for l in limitations_text.split(",") if l.strip()]
+        elif line.lower().startswith("available_evidence:"):
+            evidence_text = line.split(":", 1)[1].strip()
+            available_evidence = [
+                e.strip() for e in evidence_text.split(",") if e.strip()]
+        elif line.lower().startswith("confidence:"):
+            confidence = line.split(":", 1)[1].strip().lower()
+
+    if not (question_id and partial_answer):
+        return False, "❌ Could not extract question_id and partial_answer from executor decision", []
+
+    # Find the question in open_questions (id or text, fuzzily)
+    question_to_move = find_open_question(doc, question_id)
+    if not question_to_move:
+        return False, question_not_found_message(doc, question_id), []
+
+    if not available_evidence:
+        available_evidence = [f["content"]
+                              for f in findings_for_question(doc, question_to_move["id"])]
+
+    # Create closed partial question object
+    from datetime import datetime
+    closed_question_obj = {
+        "id": question_to_move["id"],
+        "question": question_to_move["question"],
+        "partial_answer": partial_answer,
+        "limitations": limitations,
+        "available_evidence": available_evidence,
+        "confidence": confidence,
+        "closed": datetime.now().isoformat()
+    }
 
-        for line in lines:
-            line = line.strip()
-            if line.lower().startswith("question_id:"):
-                question_id = line.split(":", 1)[1].strip()
-            elif line.lower().startswith("partial_answer:"):
-                partial_answer = line.split(":", 1)[1].strip()
-            elif line.lower().startswith("limitations:"):
-                limitations_text = line.split(":", 1)[1].strip()
-                limitations = [l.strip()
-                               for l in limitations_text.split(",") if l.strip()]
-            elif line.lower().startswith("available_evidence:"):
-                evidence_text = line.split(":", 1)[1].strip()
-                available_evidence = [
-                    e.strip() for e in evidence_text.split(",") if e.strip()]
-            elif line.lower().startswith("confidence:"):
-                confidence = line.split(":", 1)[1].strip().lower()
-
-    if question_id and partial_answer:
-        # Find and remove the question from open_questions
-        open_questions = state["research_document"]["open_questions"]
-        question_to_move = None
-
-        for i, q in enumerate(open_questions):
-            if q.get("id") == question_id:
-                question_to_move = open_questions.pop(i)
-                break
+    # Move it to closed_questions_partial
+    return True, (f"✅ Closed question partially: '{question_to_move['question'][:50]}...'"
+                  f"{resolved_note(question_id, question_to_move)}"), [
+        close_question_delta("closed_questions_partial", closed_question_obj)]
 
-        if question_to_move:
-            # Create closed partial question object
-            from datetime import datetime
-            closed_question_obj = {
-                "id": question_id,
-                "question": question_to_move["question"],
-                "partial_answer": partial_answer,
-                "limitations": limitations,
-                "available_evidence": available_evidence,
-                "confidence": confidence,
-                "closed": datetime.now().isoformat()
-            }
 
-            # Add to closed_questions_partial
-            closed_questions = state["research_document"]["closed_questions_partial"]
-            closed_questions.append(closed_question_obj)
+# Operations that only edit the research document and can be batched. Each
+# returns (ok, result_message, deltas) and leaves the document it reads unchanged
+MEMORY_OPERATIONS = {
+    "ADD_OPEN_QUESTION": apply_add_open_question,
+    "LOG_UNHELPFUL_SEARCH": apply_log_unhelpful_search,
+    "ADD_FINDING": apply_add_finding,
+    "CLOSE_QUESTION_COMPLETE": apply_close_question_complete,
+    "CLOSE_QUESTION_PARTIAL": apply_close_question_partial
+}
 
-            result_message = f"✅ Closed question partially: '{question_to_move['question'][:50]}...'"
-            print(f"   📝 {result_message}")
 
-            return {
-                "messages": [AIMessage(content=result_message)]
-            }
+def parse_memory_operations(content: str) -> list:
+    """
+    Split an executor decision into [(OPERATION_NAME, details), ...].
+
+    One OPERATION: block per operation; blocks may be numbered or bulleted.
+    """
+    blocks = re.split(r"^[ \t]*(?:[-*]|\d+[.)])?[ \t]*OPERATION:[ \t]*",
+                      content, flags=re.MULTILINE | re.IGNORECASE)
+    operations = []
+    for block in blocks[1:]:
+        name_match = re.match(r"\w+", block)
+        if name_match:
+            operations.append((name_match.group(0).upper(),
+                               extract_operation_details(block)))
+    return operations
+
+
+def apply_memory_operation(state: AgentState, apply_operation) -> AgentState:
+    """Run one apply_* function against the research document and return its deltas"""
+    details = extract_operation_details(state["messages"][-1].content)
+
+    ok, result_message, deltas = apply_operation(state["research_document"], details)
+    record_memory_operation(apply_operation.__name__.removeprefix("apply_").upper(), ok)
+    print(f"   📝 {result_message}")
+
+    update = {"messages": [AIMessage(content=result_message)]}
+    if ok:
+        update["research_document"] = deltas
+    return update
+
+
+# ============================================================================
+# MEMORY OPERATION NODES
+# ============================================================================
+
+@traceable
+def add_open_question_node(state: AgentState) -> AgentState:
+    """Add an open question to the research document"""
+    return apply_memory_operation(state, apply_add_open_question)
+
+
+@traceable
+def log_unhelpful_search_node(state: AgentState) -> AgentState:
+    """Log an unhelpful search to track unsuccessful queries"""
+    return apply_memory_operation(state, apply_log_unhelpful_search)
+
+
+@traceable
+def add_finding_node(state: AgentState) -> AgentState:
+    """Add a finding to the research document"""
+    return apply_memory_operation(state, apply_add_finding)
+
+
+@traceable
+def close_question_complete_node(state: AgentState) -> AgentState:
+    """Move an open question to closed_questions_complete with full answer"""
+    return apply_memory_operation(state, apply_close_question_complete)
+
+
+@traceable
+def close_question_partial_node(state: AgentState) -> AgentState:
+    """Move an open question to closed_questions_partial with partial answer"""
+    return apply_memory_operation(state, apply_close_question_partial)
+
+
+@traceable
+def apply_memory_batch_node(state: AgentState) -> AgentState:
+    """
+    Apply several memory operations from one executor decision in a single step.
+
+    The batch is atomic: each operation is checked against the document as the
+    earlier ones left it, and their deltas are returned together as one update
+    only if every one succeeds. A trailing CONCLUDE_MEMORY_PROCESSING is
+    honored by memory_batch_router.
+    """
+    operations = [op for op in parse_memory_operations(state["messages"][-1].content)
+                  if op[0] != "CONCLUDE_MEMORY_PROCESSING"]
+
+    working_doc = state["research_document"]
+    # "q2" means the 2nd open question of the outline the executor saw, not of
+    # the document after the batch's earlier closes
+    operations = [(name, pin_question_id(working_doc, details)) for name, details in operations]
+    results = []
+    batch_deltas = []
+    for index, (name, details) in enumerate(operations, 1):
+        apply_operation = MEMORY_OPERATIONS.get(name)
+        if apply_operation is None:
+            ok, result_message, deltas = (
+                False, f"❌ {name} cannot be batched - request it on its own", [])
         else:
-            error_message = f"❌ Could not find open question with ID: {question_id}"
+            ok, result_message, deltas = apply_operation(working_doc, details)
+            # Later operations may refer to what earlier ones added
+            working_doc = apply_research_document_deltas(working_doc, [deltas])
+            batch_deltas.extend(deltas)
+        record_memory_operation(name, ok)
+        results.append(f"{index}. {result_message}")
+
+        if not ok:
+            error_message = (f"❌ Memory batch rejected at operation {index}/{len(operations)} - "
+                             f"no changes applied\n" + "\n".join(results))
             print(f"   📝 {error_message}")
+            record_memory_operation("BATCH", False)
             return {
                 "messages": [AIMessage(content=error_message)]
             }
-    else:
-        error_message = "❌ Could not extract question_id and partial_answer from executor decision"
-        print(f"   📝 {error_message}")
-        return {
-            "messages": [AIMessage(content=error_message)]
-        }
 
+    record_memory_operation("BATCH", True)
+    result_message = f"✅ Applied {len(operations)} memory operations:\n" + "\n".join(results)
+    print(f"   📝 {result_message}")
 
-@traceable
-def memory_reflection_node(state: AgentState) -> AgentState:
-    """Analyze patterns across research document and generate insights"""
+    return {
+        "research_document": batch_deltas,
+        "messages": [AIMessage(content=result_message)]
+    }
 
-    # Extract reflection request from the executor's decision
+
+def memory_batch_router(state: AgentState) -> str:
+    """After a batch, conclude if the executor asked to, otherwise keep processing"""
     last_message = state["messages"][-1]
+    batch_message = state["messages"][-2]
+    concluded = any(name == "CONCLUDE_MEMORY_PROCESSING"
+                    for name, _ in parse_memory_operations(batch_message.content))
+
+    if concluded and last_message.content.startswith("✅"):
+        return "conclude_memory_processing_node"
+    return "memory_agent_reasoner"
+
+
+def extract_reflection_focus(last_message) -> str:
+    """Parse the reflection focus from the executor's DETAILS section"""
     content = last_message.content
 
     # Parse the DETAILS section for reflection focus
@@ -967,11 +1281,16 @@ def memory_reflection_node(state: AgentState) -> AgentState:
                 reflection_focus = line.split(":", 1)[1].strip().lower()
                 break
 
+    return reflection_focus
+
+
+def build_memory_reflection_prompt(state: AgentState, reflection_focus: str) -> str:
+    """Memory reflection prompt over the current research document"""
+
     # Get current research document for analysis
-    doc = state.get("research_document", {})
+    doc = render_research_document(state.get("research_document", {}))
 
-    # Build reflection prompt
-    reflection_prompt = f"""
+    return f"""
     You are the Memory Agent's reflection system. Analyze the current research document and provide insights.
     
     Current Research Document: {doc}
@@ -988,9 +1307,35 @@ def memory_reflection_node(state: AgentState) -> AgentState:
     Provide a concise but insightful analysis focusing on actionable observations.
     """
 
+
+@traceable
+def memory_reflection_node(state: AgentState) -> AgentState:
+    """Analyze patterns across research document and generate insights"""
+
+    reflection_focus = extract_reflection_focus(state["messages"][-1])
+
     # Generate reflection insights
-    reflection_response = llm.invoke(
-        [SystemMessage(content=reflection_prompt)])
+    reflection_response = llm_for("memory_reflection_node").invoke(
+        [SystemMessage(content=build_memory_reflection_prompt(state, reflection_focus))])
+    insights = reflection_response.content
+
+    result_message = f"🧠 Memory Reflection Complete: Generated insights on research patterns and gaps"
+    print(f"   📝 {result_message}")
+    print(f"   🔍 Insights: {insights[:100]}...")  # Show first 100 chars
+
+    return {
+        "messages": [AIMessage(content=f"{result_message}\n\nInsights:\n{insights}")]
+    }
+
+
+@traceable
+async def amemory_reflection_node(state: AgentState) -> AgentState:
+    """Async version of memory_reflection_node"""
+
+    reflection_focus = extract_reflection_focus(state["messages"][-1])
+
+    reflection_response = await llm_for("memory_reflection_node").ainvoke(
+        [SystemMessage(content=build_memory_reflection_prompt(state, reflection_focus))])
     insights = reflection_response.content
 
     result_message = f"🧠 Memory Reflection Complete: Generated insights on research patterns and gaps"
@@ -1018,8 +1363,17 @@ def conclude_memory_processing_node(state: AgentState) -> AgentState:
 # ORCHESTRATOR AGENT NODES
 # ============================================================================
 
-def orchestrator_reasoner_node(state: AgentState) -> AgentState:
-    """Main research orchestrator reasoner - analyzes the situation and decides what to do next"""
+def relevance_query(state: AgentState) -> str:
+    """The user's latest question and the latest message, to rank research document items by"""
+    messages = state.get("messages", [])
+    latest_question = next((str(m.content) for m in reversed(messages)
+                            if isinstance(m, HumanMessage)), "")
+    latest = str(messages[-1].content) if messages else ""
+    return f"{latest_question} {latest if latest != latest_question else ''}"
+
+
+def build_orchestrator_reasoning_prompt(state: AgentState, conversation: str) -> str:
+    """Orchestrator reasoner prompt for the current state"""
 
     # Available operations for the orchestrator (using node-to-node routing)
     tools_text = """
@@ -1031,14 +1385,16 @@ def orchestrator_reasoner_node(state: AgentState) -> AgentState:
     - CONCLUSION: Complete research and provide final summary
     """
 
-    # Get full research document
-    doc = state.get("research_document", {})
+    # The research document items most relevant to the open questions and the
+    # latest message, within RETRIEVAL_TOKEN_BUDGET (the whole outline if it fits)
+    doc = render_relevant_research_document(state.get("research_document", {}),
+                                            relevance_query(state))
 
-    reasoning_prompt = f"""
+    return f"""
     You are a general research agent designed as an educational demonstration of how agentic systems work.
     Your purpose is to show how agents decompose problems and use tools strategically.
     
-    Current conversation: {[msg.content for msg in state['messages']]}
+    Current conversation: {conversation}
     Current research document: {doc}
 
     Available tools:
@@ -1054,7 +1410,8 @@ def orchestrator_reasoner_node(state: AgentState) -> AgentState:
     
     DEMONSTRATION GUIDELINES:
     - This is an educational demo - show clear step-by-step problem decomposition
-    - Break complex tasks into smaller, focused searches (search for one specific piece of information at a time)
+    - Break complex tasks into smaller, focused searches (each query looks for one specific piece of information)
+    - When you need several independent facts, recommend one SEARCH with a list of queries - they run in parallel
     - ALWAYS use data analysis tools for any mathematical operations, calculations, or data comparisons
     - Don't try to do math in your head or ask other tools to do calculations
     - Make searches specific and targeted rather than broad
@@ -1079,18 +1436,67 @@ def orchestrator_reasoner_node(state: AgentState) -> AgentState:
     Work through the problem systematically. Just provide your reasoning about what to do next.
     """
 
+
+def orchestrator_reasoner_node(state: AgentState) -> AgentState:
+    """Main research orchestrator reasoner - analyzes the situation and decides what to do next"""
+    llm = llm_for("orchestrator_reasoner")
+
+    # Recent messages verbatim + running summary of older turns
+    conversation, context_update = build_conversation_context(state, llm)
+
+    reasoning_prompt = build_orchestrator_reasoning_prompt(state, conversation)
+
+    if FUSED_REASONING:
+        # One structured call returns both the reasoning and the executor's directive
+        decision = without_token_stream(llm.with_structured_output(FusedDecision)).invoke(
+            [SystemMessage(content=build_fused_directive_prompt(
+                reasoning_prompt, ORCHESTRATOR_EXECUTOR_PROMPT))])
+        reasoning_msg, action_msg = split_directive_decision(decision)
+        return {
+            "messages": [reasoning_msg],
+            "fused_action": action_msg,
+            **context_update
+        }
+
     reasoning_response = llm.invoke([SystemMessage(content=reasoning_prompt)])
     reasoning_msg = AIMessage(content=reasoning_response.content)
 
     return {
-        "messages": [reasoning_msg]
+        "messages": [reasoning_msg],
+        **context_update
     }
 
 
-def orchestrator_executor_node(state: AgentState) -> AgentState:
-    """Main research orchestrator executor - executes the reasoner's decision"""
+async def aorchestrator_reasoner_node(state: AgentState) -> AgentState:
+    """Async version of orchestrator_reasoner_node"""
+    llm = llm_for("orchestrator_reasoner")
+
+    conversation, context_update = await abuild_conversation_context(state, llm)
 
-    executor_prompt = """You are the executor for a general research agent. Your job is to follow the reasoning and execute the recommended action.
+    reasoning_prompt = build_orchestrator_reasoning_prompt(state, conversation)
+
+    if FUSED_REASONING:
+        # One structured call returns both the reasoning and the executor's directive
+        decision = await without_token_stream(llm.with_structured_output(FusedDecision)).ainvoke(
+            [SystemMessage(content=build_fused_directive_prompt(
+                reasoning_prompt, ORCHESTRATOR_EXECUTOR_PROMPT))])
+        reasoning_msg, action_msg = split_directive_decision(decision)
+        return {
+            "messages": [reasoning_msg],
+            "fused_action": action_msg,
+            **context_update
+        }
+
+    reasoning_response = await llm.ainvoke([SystemMessage(content=reasoning_prompt)])
+    reasoning_msg = AIMessage(content=reasoning_response.content)
+
+    return {
+        "messages": [reasoning_msg],
+        **context_update
+    }
+
+
+ORCHESTRATOR_EXECUTOR_PROMPT = """You are the executor for a general research agent. Your job is to follow the reasoning and execute the recommended action.
 
 Look at the most recent reasoning message and decide what to do:
 
@@ -1106,6 +1512,11 @@ Look at the most recent reasoning message and decide what to do:
 3. If the reasoner recommends SEARCH (web research, finding information), respond with:
    "SEARCH: [search query]"
 
+   If the reasoner needs several independent facts, put one query per line (they run in parallel):
+   "SEARCH:
+   - [first search query]
+   - [second search query]"
+
 4. If the reasoner recommends REFLECTION (internal thinking, analysis), respond with:
    "REFLECTION: [thoughts to reflect on]"
 
@@ -1120,14 +1531,45 @@ Examples:
 - "ROUTING: MEMORY_MANAGEMENT - Need to log research questions about video game revenue"
 - "ROUTING: DATA_ANALYSIS - CALCULATION: 1200000000 + 800000000 + 600000000"
 - "ROUTING: SEARCH - SEARCH: top grossing video games 2024"
+- "ROUTING: SEARCH - SEARCH:
+   - Google stock price growth past 5 years
+   - Microsoft stock price growth past 5 years"
 - "ROUTING: REFLECTION - REFLECTION: I have revenue data for three games, need to analyze what this tells us"
 - "ROUTING: CONCLUSION - CONCLUSION: Found total revenue of $2.6B across top 3 games with detailed breakdown"
 - [No more tool calls needed - all routing is direct!]"""
 
+
+def orchestrator_executor_node(state: AgentState) -> AgentState:
+    """Main research orchestrator executor - executes the reasoner's decision"""
+
+    # Fused mode: the reasoner already chose the directive
+    fused_update = take_fused_action(state)
+    if fused_update:
+        return fused_update
+
     # Combine the executor prompt with the conversation
     messages_with_guidance = [SystemMessage(
-        content=executor_prompt)] + state["messages"]
-    action_response = llm.invoke(messages_with_guidance)
+        content=ORCHESTRATOR_EXECUTOR_PROMPT)] + state["messages"]
+    executor_llm = without_token_stream(llm_for("orchestrator_executor"))
+    action_response = executor_llm.invoke(messages_with_guidance)
+
+    return {
+        "messages": [action_response]
+    }
+
+
+async def aorchestrator_executor_node(state: AgentState) -> AgentState:
+    """Async version of orchestrator_executor_node"""
+
+    # Fused mode: the reasoner already chose the directive
+    fused_update = take_fused_action(state)
+    if fused_update:
+        return fused_update
+
+    messages_with_guidance = [SystemMessage(
+        content=ORCHESTRATOR_EXECUTOR_PROMPT)] + state["messages"]
+    executor_llm = without_token_stream(llm_for("orchestrator_executor"))
+    action_response = await executor_llm.ainvoke(messages_with_guidance)
 
     return {
         "messages": [action_response]
@@ -1177,30 +1619,39 @@ def orchestrator_router(state: AgentState) -> str:
 graph = StateGraph(AgentState)
 
 # Add initialization node
-graph.add_node("initialization", initialization_node)
+graph.add_node("initialization", dual_node(initialization_node))
 
 # Add orchestrator nodes
-graph.add_node("orchestrator_reasoner", orchestrator_reasoner_node)
-graph.add_node("orchestrator_executor", orchestrator_executor_node)
-graph.add_node("data_analysis_node", data_analysis_node)
-graph.add_node("search_node", search_node)
-graph.add_node("reflection_node", reflection_node)
-graph.add_node("conclusion_node", conclusion_node)
+graph.add_node("orchestrator_reasoner",
+               dual_node(orchestrator_reasoner_node, aorchestrator_reasoner_node))
+graph.add_node("orchestrator_executor",
+               dual_node(orchestrator_executor_node, aorchestrator_executor_node))
+graph.add_node("data_analysis_node", dual_node(data_analysis_node))
+graph.add_node("search_node", dual_node(search_node, asearch_node))
+graph.add_node("reflection_node", dual_node(reflection_node, areflection_node))
+graph.add_node("conclusion_node", dual_node(conclusion_node, aconclusion_node))
 # trigger_memory_subagent_tool node removed - using direct routing
 
 # Add memory agent nodes
-graph.add_node("memory_agent_reasoner", memory_agent_reasoner_node)
-graph.add_node("memory_agent_executor", memory_agent_executor_node)
+graph.add_node("memory_agent_reasoner",
+               dual_node(memory_agent_reasoner_node, amemory_agent_reasoner_node))
+graph.add_node("memory_agent_executor",
+               dual_node(memory_agent_executor_node, amemory_agent_executor_node))
 
 # Add memory operation nodes
-graph.add_node("add_open_question_node", add_open_question_node)
-graph.add_node("log_unhelpful_search_node", log_unhelpful_search_node)
-graph.add_node("add_finding_node", add_finding_node)
-graph.add_node("close_question_complete_node", close_question_complete_node)
-graph.add_node("close_question_partial_node", close_question_partial_node)
-graph.add_node("memory_reflection_node", memory_reflection_node)
+graph.add_node("add_open_question_node", dual_node(add_open_question_node))
+graph.add_node("log_unhelpful_search_node",
+               dual_node(log_unhelpful_search_node))
+graph.add_node("add_finding_node", dual_node(add_finding_node))
+graph.add_node("close_question_complete_node",
+               dual_node(close_question_complete_node))
+graph.add_node("close_question_partial_node",
+               dual_node(close_question_partial_node))
+graph.add_node("apply_memory_batch", dual_node(apply_memory_batch_node))
+graph.add_node("memory_reflection_node",
+               dual_node(memory_reflection_node, amemory_reflection_node))
 graph.add_node("conclude_memory_processing_node",
-               conclude_memory_processing_node)
+               dual_node(conclude_memory_processing_node))
 
 # Add initialization edges
 graph.add_edge(START, "initialization")
@@ -1226,6 +1677,7 @@ graph.add_conditional_edges("memory_agent_executor", memory_operation_router, {
     "close_question_complete_node": "close_question_complete_node",
     "close_question_partial_node": "close_question_partial_node",
     "memory_reflection_node": "memory_reflection_node",
+    "apply_memory_batch": "apply_memory_batch",
     "conclude_memory_processing_node": "conclude_memory_processing_node",
     "orchestrator_reasoner": "orchestrator_reasoner"
 })
@@ -1236,6 +1688,11 @@ graph.add_edge("add_finding_node", "memory_agent_reasoner")
 graph.add_edge("close_question_complete_node", "memory_agent_reasoner")
 graph.add_edge("close_question_partial_node", "memory_agent_reasoner")
 graph.add_edge("memory_reflection_node", "memory_agent_reasoner")
+# A batch can end with CONCLUDE_MEMORY_PROCESSING to skip another reasoner turn
+graph.add_conditional_edges("apply_memory_batch", memory_batch_router, {
+    "conclude_memory_processing_node": "conclude_memory_processing_node",
+    "memory_agent_reasoner": "memory_agent_reasoner"
+})
 # Conclude goes back to orchestrator (EXIT from memory processing)
 graph.add_edge("conclude_memory_processing_node", "orchestrator_reasoner")
 
@@ -1246,7 +1703,8 @@ graph.add_edge("reflection_node", "orchestrator_reasoner")
 graph.add_edge("conclusion_node", END)
 
 # Compile the graph
-app = graph.compile()
+# Per-node latency/token/cost metrics (see metrics.py)
+app = instrument_graph(graph.compile(), "phase3")
 
 # Test function
 
@@ -0,0 +1,343 @@
+"""
+Rate Limiter - Process-wide request and token budgets per model/search provider
+Goal: Concurrent runs share one budget per provider instead of each tripping 429s
+
+One RateLimiter per provider ("openai", "perplexity"), shared by every node of
+every graph in the process, sync and async alike:
+- Two token buckets: requests per minute and tokens per minute
+  (<PROVIDER>_RPM / <PROVIDER>_TPM, 0 = no limit). Each bucket holds
+  RATE_LIMIT_BURST_SECONDS of budget, so a burst cannot spend a whole
+  minute's budget at once
+- A call reserves one request and its estimated tokens (prompt characters / 4
+  plus the completion allowance) and waits until both buckets cover it; the
+  estimate is settled against the reported usage afterwards. Reservations
+  queue in order, so a large call is not starved by small ones
+- Adaptive backoff: a 429 pauses the provider (Retry-After, or exponential
+  backoff on consecutive throttles) and cuts its effective rate by a quarter;
+  each successful call wins back a little of the rate. After a pause the
+  buckets restart empty, so the queue does not burst into the next 429
+- Time spent waiting and throttles are recorded in metrics.py
+  (agent_rate_limit_wait_seconds, agent_rate_limit_throttles_total)
+
+OpenAI traffic is limited at the HTTP layer: openai_http_clients() gives
+ChatOpenAI httpx clients whose transport reserves before each request (the
+OpenAI SDK's own retries and hedged requests included). search_client.py
+reserves before every Perplexity attempt. Limiting is opt-in:
+RATE_LIMIT_ENABLED=true turns it on, with the budgets set for your account.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+from cassettes import CASSETTE_MODE, AsyncCassetteTransport, CassetteTransport, get_cassette
+from hedging import AsyncHedgedTransport, HedgedTransport, get_hedge_policy
+from metrics import record_rate_limit_wait, record_throttle
+
+# Load environment variables
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "false").lower() not in ("0", "false", "no")
+RATE_LIMIT_BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", "10"))
+RATE_LIMIT_BACKOFF_BASE = float(os.getenv("RATE_LIMIT_BACKOFF_BASE", "1"))
+RATE_LIMIT_BACKOFF_MAX = float(os.getenv("RATE_LIMIT_BACKOFF_MAX", "60"))
+
+# Budgets are unset (0) until configured for the account, e.g. OpenAI usage
+# tier 1 for gpt-4o is OPENAI_RPM=500 OPENAI_TPM=30000 and Perplexity's sonar
+# limit PERPLEXITY_RPM=50. Without budgets the limiter only backs off on 429s
+PROVIDER_LIMITS = {
+    "openai": (int(os.getenv("OPENAI_RPM", "0")), int(os.getenv("OPENAI_TPM", "0"))),
+    "perplexity": (int(os.getenv("PERPLEXITY_RPM", "0")), int(os.getenv("PERPLEXITY_TPM", "0")))
+}
+
+# Completion tokens reserved for a request that does not say (max_tokens)
+DEFAULT_COMPLETION_TOKENS = 500
+
+# A 429 multiplies a provider's rate by RATE_BACKOFF_FACTOR (down to
+# MIN_RATE_SCALE of the configured rate); every successful call wins back
+# RATE_RECOVERY_STEP of it
+RATE_BACKOFF_FACTOR = 0.75
+MIN_RATE_SCALE = 0.1
+RATE_RECOVERY_STEP = 0.05
+
+
+def estimate_request_tokens(payload: dict) -> int:
+    """Prompt characters / 4 plus the completion allowance of a chat completions payload"""
+    chars = sum(len(str(message.get("content", ""))) for message in payload.get("messages", []))
+    chars += len(json.dumps(payload.get("tools", ""))) if payload.get("tools") else 0
+    completion = (payload.get("max_completion_tokens") or payload.get("max_tokens")
+                  or DEFAULT_COMPLETION_TOKENS)
+    return chars // 4 + completion
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute token buckets with adaptive backoff"""
+
+    def __init__(self, name: str, rpm: int, tpm: int,
+                 burst_seconds: float = RATE_LIMIT_BURST_SECONDS,
+                 backoff_base: float = RATE_LIMIT_BACKOFF_BASE,
+                 backoff_max: float = RATE_LIMIT_BACKOFF_MAX):
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.burst_seconds = burst_seconds
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_scale = 1.0
+        self.paused_until = 0.0
+        self.paused_seconds = 0.0
+        self.consecutive_throttles = 0
+        self._requests = self._capacity(rpm)
+        self._tokens = self._capacity(tpm)
+        # Buckets refill from here on; a pause moves it into the future
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.throttles = 0
+
+    def _capacity(self, per_minute: int) -> float:
+        return max(1.0, per_minute * self.burst_seconds / 60) if per_minute else 0.0
+
+    def _refill(self, now: float):
+        # Called with the lock held
+        if now <= self._refilled_at:
+            return
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        if self.rpm:
+            self._requests = min(self._capacity(self.rpm),
+                                 self._requests + elapsed * self.rpm * self.rate_scale / 60)
+        if self.tpm:
+            self._tokens = min(self._capacity(self.tpm),
+                               self._tokens + elapsed * self.tpm * self.rate_scale / 60)
+
+    def _reserve(self, tokens: int) -> tuple:
+        """Take one request and `tokens` from the buckets: (seconds to wait, pause total)"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            debt = 0.0
+            if self.rpm:
+                self._requests -= 1
+                if self._requests < 0:
+                    debt = -self._requests * 60 / (self.rpm * self.rate_scale)
+            if self.tpm and tokens:
+                self._tokens -= tokens
+                if self._tokens < 0:
+                    debt = max(debt, -self._tokens * 60 / (self.tpm * self.rate_scale))
+            return max(0.0, self._refilled_at - now) + debt, self.paused_seconds
+
+    def _remaining(self, deadline: float, paused_seconds: float) -> float:
+        # A 429 while the call was queued pushes it back by the length of the pause
+        return deadline + self.paused_seconds - paused_seconds - time.monotonic()
+
+    def _record_wait(self, seconds: float) -> float:
+        if seconds > 0:
+            with self._lock:
+                self.waits += 1
+                self.wait_seconds += seconds
+        record_rate_limit_wait(self.name, seconds)
+        return seconds
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until the call may be sent; returns the seconds waited"""
+        start = time.monotonic()
+        wait, paused_seconds = self._reserve(tokens)
+        if wait <= 0:
+            return self._record_wait(0.0)
+        deadline = start + wait
+        while wait > 0:
+            time.sleep(wait)
+            wait = self._remaining(deadline, paused_seconds)
+        return self._record_wait(time.monotonic() - start)
+
+    async def aacquire(self, tokens: int = 0) -> float:
+        """Async version of acquire()"""
+        start = time.monotonic()
+        wait, paused_seconds = self._reserve(tokens)
+        if wait <= 0:
+            return self._record_wait(0.0)
+        deadline = start + wait
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self._remaining(deadline, paused_seconds)
+        return self._record_wait(time.monotonic() - start)
+
+    def settle(self, estimated: int, actual: int):
+        """Correct a reservation of `estimated` tokens to the `actual` usage reported"""
+        if self.tpm and actual:
+            with self._lock:
+                self._tokens += estimated - actual
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_throttles = 0
+            self.rate_scale = min(1.0, self.rate_scale + RATE_RECOVERY_STEP)
+
+    def record_throttle(self, retry_after: str = None):
+        """The provider answered 429: pause every caller and slow the rate down"""
+        with self._lock:
+            now = time.monotonic()
+            self.throttles += 1
+            # 429s for calls already in flight when the pause began are one signal
+            if now >= self.paused_until:
+                self._back_off(now, retry_after)
+        record_throttle(self.name)
+
+    def _back_off(self, now: float, retry_after: str = None):
+        # Called with the lock held
+        delay = min(self.backoff_max, self.backoff_base * 2 ** self.consecutive_throttles)
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        self.consecutive_throttles += 1
+        self._refill(now)
+        self.rate_scale = max(MIN_RATE_SCALE, self.rate_scale * RATE_BACKOFF_FACTOR)
+        # No burst after the pause: the buckets restart empty, nothing refills
+        # during it, and every queued call moves back by it
+        self._requests = min(self._requests, 0.0)
+        self._tokens = min(self._tokens, 0.0)
+        self._refilled_at += delay
+        self.paused_until = now + delay
+        self.paused_seconds += delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"provider": self.name, "rpm": self.rpm, "tpm": self.tpm,
+                    "rate_scale": round(self.rate_scale, 3), "waits": self.waits,
+                    "wait_seconds": round(self.wait_seconds, 3), "throttles": self.throttles}
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str):
+    """Return the process-wide limiter of a provider, or None when RATE_LIMIT_ENABLED is off"""
+    if not RATE_LIMIT_ENABLED:
+        return None
+    with _limiters_lock:
+        if provider not in _limiters:
+            rpm, tpm = PROVIDER_LIMITS[provider]
+            _limiters[provider] = RateLimiter(provider, rpm, tpm)
+        return _limiters[provider]
+
+
+def _request_tokens(request: httpx.Request) -> int:
+    try:
+        return estimate_request_tokens(json.loads(request.content or b"{}"))
+    except ValueError:
+        return 0
+
+
+def _settle(limiter: RateLimiter, estimated: int, response: httpx.Response):
+    """Throttle on 429, otherwise settle the token estimate against the reported usage"""
+    if response.status_code == 429:
+        limiter.record_throttle(response.headers.get("retry-after"))
+        return
+    limiter.record_success()
+    if "json" in response.headers.get("content-type", ""):
+        try:
+            usage = json.loads(response.content).get("usage") or {}
+        except ValueError:
+            return
+        limiter.settle(estimated, usage.get("total_tokens", 0))
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """httpx transport that reserves budget with a RateLimiter before each request"""
+
+    def __init__(self, limiter: RateLimiter, transport: httpx.BaseTransport = None):
+        self.limiter = limiter
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        estimated = _request_tokens(request)
+        self.limiter.acquire(estimated)
+        response = self._transport.handle_request(request)
+        # Streamed responses have no usage to settle until they are read
+        if "json" in response.headers.get("content-type", ""):
+            response.read()
+        _settle(self.limiter, estimated, response)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async twin of RateLimitedTransport"""
+
+    def __init__(self, limiter: RateLimiter, transport: httpx.AsyncBaseTransport = None):
+        self.limiter = limiter
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        estimated = _request_tokens(request)
+        await self.limiter.aacquire(estimated)
+        response = await self._transport.handle_async_request(request)
+        if "json" in response.headers.get("content-type", ""):
+            await response.aread()
+        _settle(self.limiter, estimated, response)
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def openai_http_clients() -> dict:
+    """
+    ChatOpenAI keyword arguments routing its traffic through the shared OpenAI
+    limiter, the hedged nodes' policy (hedging.py) and, with CASSETTE_MODE
+    set, the cassette ({} when all are off). Replayed traffic never reaches
+    OpenAI, so it is neither limited nor hedged
+    """
+    replay = CASSETTE_MODE == "replay"
+    limiter = get_rate_limiter("openai") if not replay else None
+    hedge = get_hedge_policy() if not replay else None
+    cassette = get_cassette()
+    if limiter is None and hedge is None and cassette is None:
+        return {}
+    transport = CassetteTransport(cassette) if cassette is not None else None
+    async_transport = AsyncCassetteTransport(cassette) if cassette is not None else None
+    if limiter is not None:
+        transport = RateLimitedTransport(limiter, transport)
+        async_transport = AsyncRateLimitedTransport(limiter, async_transport)
+    # Outermost, so both copies of a hedged request are rate limited
+    if hedge is not None:
+        transport = HedgedTransport(hedge, transport)
+        async_transport = AsyncHedgedTransport(hedge, async_transport)
+    return {
+        "http_client": httpx.Client(transport=transport),
+        "http_async_client": httpx.AsyncClient(transport=async_transport)
+    }
+
+
+def test_rate_limiter():
+    """Check that a burst is spread out and that a 429 pauses and slows the provider"""
+    limiter = RateLimiter("test", rpm=120, tpm=0, burst_seconds=1)
+    print("🧪 Testing rate limiter (120 RPM, 1s burst)")
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    print(f"   ⏱️  6 requests took {time.monotonic() - start:.2f}s (expected ~2s)")
+
+    limiter.backoff_base = 0.5
+    limiter.record_throttle()
+    start = time.monotonic()
+    limiter.acquire()
+    print(f"   🛑 after a 429: waited {time.monotonic() - start:.2f}s, "
+          f"rate scale {limiter.rate_scale}")
+    print(f"   📊 {limiter.stats()}")
+
+
+if __name__ == "__main__":
+    test_rate_limiter()
@@ -0,0 +1,688 @@
+"""
+Research Document - Shared structure and prompt renderer for the phase 3 memory agent
+Goal: Give reasoner prompts a dense, token-efficient view of the research document
+
+The research document is a plain dict (see create_empty_research_document) so it
+serializes cleanly into LangGraph checkpoints. Every change to it goes through
+mark_research_document_changed(), which bumps the document's version counter.
+render_research_document() is memoized on that counter, so the outline is only
+rebuilt after a real change.
+
+Questions and findings are looked up through a ResearchDocumentIndex (question
+id -> question, normalized question text -> id, question id -> linked findings)
+that is built once per document and kept current by add_open_question(),
+add_finding(), pop_open_question() and add_closed_question().
+resolve_question_id() maps the slightly wrong ids the LLM sometimes writes
+("q1", "A1B2C3D4", the question text) to the real one. The index lives beside
+the document, so the document itself keeps its plain JSON shape.
+
+Phase 3 nodes do not edit the document in state; they return delta operations
+that apply_research_document_deltas() folds into a new document (see DELTA
+UPDATES below). A question or finding that nearly duplicates one already in
+the document (similarity.py, DEDUP_THRESHOLD) is merged into it instead of
+being appended again.
+"""
+
+import difflib
+import re
+import threading
+from collections import OrderedDict
+
+from retrieval import (CHARS_PER_TOKEN, RETRIEVAL_ENABLED,
+                       RETRIEVAL_TOKEN_BUDGET, BM25Index)
+from similarity import DEDUP_ENABLED, NearDuplicateIndex
+
+# Longest single line the renderer will emit for one item
+MAX_LINE_CHARS = 300
+
+# Number of rendered documents kept in the memo
+RENDER_CACHE_SIZE = 128
+
+# Number of document indexes kept
+INDEX_CACHE_SIZE = 128
+
+# Lowest similarity at which question text resolves to a question
+QUESTION_MATCH_THRESHOLD = 0.85
+
+# Ranks used when merging duplicates: the higher confidence/priority wins
+LEVEL_RANK = {"low": 0, "medium": 1, "high": 2}
+
+# Sections holding questions, and the status each one gives a question
+QUESTION_SECTIONS = {
+    "open_questions": "open",
+    "closed_questions_complete": "complete",
+    "closed_questions_partial": "partial"
+}
+
+
+def create_empty_research_document() -> dict:
+    """Create an empty research document with proper structure"""
+    return {
+        # Bumped by mark_research_document_changed() on every memory operation
+        "version": 0,
+
+        # List of finding objects: {"content": str, "source": str, "confidence": str, "related_questions": List[str], "timestamp": str}
+        "findings": [],
+
+        # List of open question objects: {"id": str, "question": str, "added": str, "priority": str}
+        "open_questions": [],
+
+        # List of fully answered questions: {"id": str, "question": str, "answer": str, "evidence": List[str], "confidence": str, "closed": str}
+        "closed_questions_complete": [],
+
+        # List of partially answered questions: {"id": str, "question": str, "partial_answer": str, "limitations": List[str], "available_evidence": List[str], "confidence": str, "closed": str}
+        "closed_questions_partial": [],
+
+        # List of unsuccessful searches: {"query": str, "source": str, "reason": str, "partial_info": str, "potential_followups": List[str], "related_questions": List[str], "timestamp": str}
+        "unhelpful_searches": []
+    }
+
+
+def mark_research_document_changed(doc: dict) -> int:
+    """Bump the document version after a memory operation changed it"""
+    doc["version"] = doc.get("version", 0) + 1
+    return doc["version"]
+
+
+# ============================================================================
+# QUESTION INDEX
+# ============================================================================
+
+def normalize_question_text(text: str) -> str:
+    """Fold case, punctuation and whitespace so equivalent question texts match"""
+    return " ".join(re.sub(r"[^\w\s]", " ", str(text).lower()).split())
+
+
+def _closed_question_text(question: dict) -> str:
+    return " ".join(str(question.get(field, ""))
+                    for field in ("question", "answer", "partial_answer"))
+
+
+def _normalize_id(question_id: str) -> str:
+    """ "Q_A1B2C3D4", "`q_a1b2c3d4`", "a1b2c3d4" -> "a1b2c3d4" """
+    text = str(question_id).strip().strip("`'\"[]()<>{}.,;").lower()
+    return text[2:] if text.startswith("q_") else text
+
+
+class ResearchDocumentIndex:
+    """Lookup tables over one research document's questions and findings"""
+
+    def __init__(self, doc: dict):
+        self.doc = doc
+        self.questions = {}           # id -> question object
+        self.status = {}              # id -> "open" | "complete" | "partial"
+        self.by_text = {}             # normalized question text -> id
+        self.by_short_id = {}         # id without "q_", lowercased -> id
+        self.findings = {}            # id -> [finding objects linked to it]
+        self.finding_count = 0
+        # Near-duplicate indexes, built on the first duplicate check
+        self._question_texts = None   # question id -> question text
+        self._finding_texts = None    # position in findings -> finding content
+        # BM25 over findings ("F", position) and closed questions ("Q", id),
+        # built on the first relevance query
+        self._relevance = None
+        for section, status in QUESTION_SECTIONS.items():
+            for question in doc.get(section, []):
+                self.add_question(question, status)
+        for finding in doc.get("findings", []):
+            self.add_finding(finding)
+
+    def is_current(self) -> bool:
+        """False if the document was changed without going through the index"""
+        return (self.finding_count == len(self.doc.get("findings", []))
+                and len(self.questions) == sum(len(self.doc.get(section, []))
+                                               for section in QUESTION_SECTIONS))
+
+    def add_question(self, question: dict, status: str):
+        question_id = question.get("id")
+        if not question_id:
+            return
+        self.questions[question_id] = question
+        self.status[question_id] = status
+        self.by_short_id[_normalize_id(question_id)] = question_id
+        self.by_text.setdefault(normalize_question_text(question.get("question", "")),
+                                question_id)
+        self.findings.setdefault(question_id, [])
+        if self._question_texts is not None:
+            self._question_texts.add(question_id, question.get("question", ""))
+        if self._relevance is not None and status != "open":
+            self._relevance.add(("Q", question_id), _closed_question_text(question))
+
+    def replace_question(self, question: dict):
+        """Point the index at a new object for an indexed question (same id and text)"""
+        self.questions[question["id"]] = question
+
+    def add_finding(self, finding: dict):
+        self.finding_count += 1
+        self._link_finding(finding)
+        if self._finding_texts is not None:
+            self._finding_texts.add(self.finding_count - 1, finding.get("content", ""))
+        if self._relevance is not None:
+            self._relevance.add(("F", self.finding_count - 1), finding.get("content", ""))
+
+    def _link_finding(self, finding: dict):
+        linked = set()
+        for reference in finding.get("related_questions", []):
+            question_id = self.resolve(reference)
+            if question_id and question_id not in linked:
+                linked.add(question_id)
+                self.findings[question_id].append(finding)
+
+    def replace_finding(self, position: int, finding: dict):
+        """Re-link the finding at `position` after it was replaced by `finding`"""
+        old = self.doc["findings"][position]
+        for linked in self.findings.values():
+            if any(f is old for f in linked):
+                linked[:] = [f for f in linked if f is not old]
+        self._link_finding(finding)
+        if self._finding_texts is not None:
+            self._finding_texts.add(position, finding.get("content", ""))
+        if self._relevance is not None:
+            self._relevance.add(("F", position), finding.get("content", ""))
+
+    def duplicate_question(self, text: str):
+        """Id of an indexed question whose text nearly duplicates `text`, or None"""
+        if self._question_texts is None:
+            self._question_texts = NearDuplicateIndex()
+            for question_id, question in self.questions.items():
+                self._question_texts.add(question_id, question.get("question", ""))
+        exact = self.by_text.get(normalize_question_text(text))
+        if exact is not None:
+            return exact
+        return self._question_texts.find(text)[0]
+
+    def duplicate_finding(self, content: str):
+        """Position of a finding whose content nearly duplicates `content`, or None"""
+        if self._finding_texts is None:
+            self._finding_texts = NearDuplicateIndex()
+            for position, finding in enumerate(self.doc.get("findings", [])):
+                self._finding_texts.add(position, finding.get("content", ""))
+        return self._finding_texts.find(content)[0]
+
+    def relevance(self) -> BM25Index:
+        """BM25 index over the findings and closed questions"""
+        if self._relevance is None:
+            self._relevance = BM25Index()
+            for position, finding in enumerate(self.doc.get("findings", [])):
+                self._relevance.add(("F", position), finding.get("content", ""))
+            for question_id, question in self.questions.items():
+                if self.status[question_id] != "open":
+                    self._relevance.add(("Q", question_id), _closed_question_text(question))
+        return self._relevance
+
+    def remove_question(self, question_id: str):
+        question = self.questions.pop(question_id)
+        del self.status[question_id]
+        if self._question_texts is not None:
+            self._question_texts.remove(question_id)
+        if self._relevance is not None:
+            self._relevance.remove(("Q", question_id))
+        self.by_short_id.pop(_normalize_id(question_id), None)
+        text = normalize_question_text(question.get("question", ""))
+        if self.by_text.get(text) == question_id:
+            del self.by_text[text]
+
+    def resolve(self, reference: str, status: str = None):
+        """
+        Id of the question `reference` points to, or None.
+
+        Tried in order: the exact id; the id ignoring case, quotes and the
+        "q_" prefix; a unique id prefix; "q3"/"3" as the 3rd question of the
+        section; the question text, exactly (normalized) and then the closest
+        text above QUESTION_MATCH_THRESHOLD. With `status`, only questions
+        with that status are considered.
+        """
+        def allowed(question_id):
+            return question_id is not None and (status is None or self.status[question_id] == status)
+
+        reference = str(reference or "").strip()
+        if not reference:
+            return None
+        if reference in self.questions and allowed(reference):
+            return reference
+
+        short_id = _normalize_id(reference)
+        if allowed(self.by_short_id.get(short_id)):
+            return self.by_short_id[short_id]
+        if len(short_id) >= 4 and re.fullmatch(r"[0-9a-f]+", short_id):
+            matches = [qid for short, qid in self.by_short_id.items()
+                       if short.startswith(short_id) and allowed(qid)]
+            if len(matches) == 1:
+                return matches[0]
+
+        ordinal = re.fullmatch(r"(?:q(?:uestion)?[\s_#-]*)?(\d{1,3})", short_id)
+        if ordinal:
+            section = [qid for qid in self.questions if allowed(qid)]
+            position = int(ordinal.group(1))
+            if 1 <= position <= len(section):
+                return section[position - 1]
+
+        text = normalize_question_text(reference)
+        if allowed(self.by_text.get(text)):
+            return self.by_text[text]
+        best_id, best_ratio = None, QUESTION_MATCH_THRESHOLD
+        for question_id, question in self.questions.items():
+            if not allowed(question_id):
+                continue
+            ratio = difflib.SequenceMatcher(
+                None, text, normalize_question_text(question.get("question", ""))).ratio()
+            if ratio >= best_ratio:
+                best_id, best_ratio = question_id, ratio
+        return best_id
+
+
+# id(doc) -> index. The index holds a reference to its document, so the id
+# cannot be reused by another object while the entry is cached.
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def get_research_index(doc: dict) -> ResearchDocumentIndex:
+    """Return the index of a research document, building it on first use"""
+    key = id(doc)
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None and index.doc is doc and index.is_current():
+            _index_cache.move_to_end(key)
+            return index
+
+    index = ResearchDocumentIndex(doc)
+
+    with _index_cache_lock:
+        _index_cache[key] = index
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def resolve_question_id(doc: dict, reference: str, status: str = None):
+    """Real id of the question an LLM-written id or question text refers to (None if none)"""
+    return get_research_index(doc).resolve(reference, status)
+
+
+def add_open_question(doc: dict, question: dict):
+    """Append an open question object and index it"""
+    index = get_research_index(doc)
+    doc["open_questions"].append(question)
+    index.add_question(question, "open")
+
+
+def add_finding(doc: dict, finding: dict):
+    """Append a finding object and link it to the questions it relates to"""
+    index = get_research_index(doc)
+    doc["findings"].append(finding)
+    index.add_finding(finding)
+
+
+def find_open_question(doc: dict, reference: str):
+    """The open question `reference` resolves to (None if not found)"""
+    index = get_research_index(doc)
+    question_id = index.resolve(reference, status="open")
+    return None if question_id is None else index.questions[question_id]
+
+
+def pop_open_question(doc: dict, reference: str):
+    """Remove and return the open question `reference` resolves to (None if not found)"""
+    question = find_open_question(doc, reference)
+    if question is None:
+        return None
+    get_research_index(doc).remove_question(question["id"])
+    # The lookup is a dict hit; removing from the list keeps the JSON shape
+    open_questions = doc["open_questions"]
+    del open_questions[next(i for i, q in enumerate(open_questions) if q is question)]
+    return question
+
+
+def add_closed_question(doc: dict, section: str, question: dict):
+    """Append a closed question object to closed_questions_complete/_partial and index it"""
+    index = get_research_index(doc)
+    doc[section].append(question)
+    # Findings linked while it was open stay linked under the same id
+    index.add_question(question, QUESTION_SECTIONS[section])
+
+
+def findings_for_question(doc: dict, question_id: str) -> list:
+    """Findings whose related_questions point at this question"""
+    return list(get_research_index(doc).findings.get(question_id, []))
+
+
+def find_duplicate_question(doc: dict, text: str):
+    """Id of an open or closed question that nearly duplicates `text` (None if none)"""
+    if not DEDUP_ENABLED:
+        return None
+    return get_research_index(doc).duplicate_question(text)
+
+
+def find_duplicate_finding(doc: dict, content: str):
+    """Position in doc["findings"] of a finding that nearly duplicates `content` (None if none)"""
+    if not DEDUP_ENABLED:
+        return None
+    return get_research_index(doc).duplicate_finding(content)
+
+
+def merge_findings(existing: dict, duplicate: dict) -> dict:
+    """
+    One finding standing for both: the existing content and source, the union
+    of related_questions and the higher of the two confidences
+    """
+    related = list(existing.get("related_questions", []))
+    related += [q for q in duplicate.get("related_questions", []) if q not in related]
+    confidence = max(existing.get("confidence", "medium"), duplicate.get("confidence", "medium"),
+                     key=lambda level: LEVEL_RANK.get(level, -1))
+    return {**existing, "related_questions": related, "confidence": confidence}
+
+
+# ============================================================================
+# DELTA UPDATES
+# ============================================================================
+# Graph nodes never edit the document in state. They return a list of delta
+# operations, and apply_research_document_deltas() - the reducer of phase 3's
+# research_document channel - folds them into a new document:
+#   {"op": "add_open_question", "question": {...}}
+#   {"op": "add_finding", "finding": {...}}
+#   {"op": "log_unhelpful_search", "search": {...}}
+#   {"op": "close_question", "id": "q_...", "section": "closed_questions_complete", "question": {...}}
+#   {"op": "merge_finding", "index": 3, "finding": {...}}
+#   {"op": "merge_question", "id": "q_...", "priority": "high"}
+# The merge operations record a near-duplicate (find_duplicate_finding(),
+# find_duplicate_question()) against the entry it duplicates instead of
+# appending it again.
+# A write that is a whole document (create_empty_research_document()) replaces
+# the current one. Declared with LangGraph's DeltaChannel, checkpoints store
+# only these writes, not a copy of the document per step.
+
+# Sections each delta operation appends to or removes from
+DELTA_SECTIONS = {
+    "add_open_question": ("open_questions",),
+    "add_finding": ("findings",),
+    "log_unhelpful_search": ("unhelpful_searches",),
+    "close_question": ("open_questions",),
+    "merge_finding": ("findings",),
+    "merge_question": ("open_questions",)
+}
+
+
+def close_question_delta(section: str, question: dict) -> dict:
+    """Delta that moves open question question["id"] to section as `question`"""
+    return {"op": "close_question", "id": question["id"], "section": section,
+            "question": question}
+
+
+def _handover_index(old: dict, new: dict):
+    """Move old's index to new instead of rebuilding it; old is superseded by new"""
+    with _index_cache_lock:
+        index = _index_cache.get(id(old))
+        if index is None or index.doc is not old or not index.is_current():
+            return
+        del _index_cache[id(old)]
+        index.doc = new
+        _index_cache[id(new)] = index
+
+
+def _apply_delta(doc: dict, delta: dict):
+    """Apply one delta operation to a document whose touched sections are private copies"""
+    op = delta.get("op")
+    if op == "add_open_question":
+        if delta["question"]["id"] not in get_research_index(doc).questions:
+            add_open_question(doc, delta["question"])
+    elif op == "add_finding":
+        add_finding(doc, delta["finding"])
+    elif op == "log_unhelpful_search":
+        doc["unhelpful_searches"].append(delta["search"])
+    elif op == "close_question":
+        # A parallel branch may already have closed it; closing twice is a no-op
+        if pop_open_question(doc, delta["id"]) is not None:
+            add_closed_question(doc, delta["section"], delta["question"])
+    elif op == "merge_finding":
+        position = delta["index"]
+        merged = merge_findings(doc["findings"][position], delta["finding"])
+        get_research_index(doc).replace_finding(position, merged)
+        doc["findings"][position] = merged
+    elif op == "merge_question":
+        # Only open questions are re-prioritized; a closed one stays as it was
+        question = find_open_question(doc, delta["id"])
+        if question is not None and (LEVEL_RANK.get(delta["priority"], -1)
+                                     > LEVEL_RANK.get(question.get("priority"), -1)):
+            merged = {**question, "priority": delta["priority"]}
+            get_research_index(doc).replace_question(merged)
+            open_questions = doc["open_questions"]
+            open_questions[next(i for i, q in enumerate(open_questions) if q is question)] = merged
+    else:
+        raise ValueError(f"Unknown research document delta: {op!r}")
+
+
+def apply_research_document_deltas(doc: dict, writes: list) -> dict:
+    """
+    Reducer for the research_document channel: fold writes into a new document.
+
+    Each write is the list of delta operations one node returned (or a single
+    operation, or a whole document). The current document is never modified:
+    the sections a write touches are copied before it is applied, and each
+    write bumps the version once. Folding writes one at a time gives the same
+    result as folding them all at once, as DeltaChannel requires.
+    """
+    for write in writes:
+        if isinstance(write, dict) and "op" not in write:
+            doc = write
+            continue
+        deltas = [write] if isinstance(write, dict) else list(write or [])
+        if not deltas:
+            continue
+
+        new = dict(doc) if doc else create_empty_research_document()
+        sections = {section for delta in deltas
+                    for section in DELTA_SECTIONS.get(delta.get("op"), ())}
+        sections.update(delta["section"] for delta in deltas if delta.get("op") == "close_question")
+        for section in sections:
+            new[section] = list(new.get(section, []))
+        if doc:
+            _handover_index(doc, new)
+
+        for delta in deltas:
+            _apply_delta(new, delta)
+        mark_research_document_changed(new)
+        doc = new
+    return doc
+
+
+# ============================================================================
+# PROMPT RENDERER
+# ============================================================================
+
+# id(doc) -> (doc, version, rendered). Holding a reference to the document keeps
+# its id from being reused by another object while the entry is cached.
+_render_cache = OrderedDict()
+_render_cache_lock = threading.Lock()
+
+
+def _one_line(text, limit: int = MAX_LINE_CHARS) -> str:
+    """Collapse whitespace and cap the length of a rendered value"""
+    text = " ".join(str(text).split())
+    if len(text) > limit:
+        return text[:limit - 3] + "..."
+    return text
+
+
+def _join(items) -> str:
+    return "; ".join(_one_line(item, 120) for item in items if item)
+
+
+def _question_line(q: dict) -> str:
+    return f"- {q.get('id', '?')} [{q.get('priority', 'medium')}] {_one_line(q.get('question', ''))}"
+
+
+def _finding_line(number: int, f: dict) -> str:
+    line = f"- F{number} [{f.get('confidence', 'medium')}] {_one_line(f.get('content', ''))}"
+    if f.get("source"):
+        line += f" ({f['source']})"
+    if f.get("related_questions"):
+        line += f" -> {_join(f['related_questions'])}"
+    return line
+
+
+def _answered_line(q: dict) -> str:
+    return f"- {q.get('id', '?')} [{q.get('confidence', 'medium')}] {_one_line(q.get('question', ''), 150)} => {_one_line(q.get('answer', ''))}"
+
+
+def _partial_line(q: dict) -> str:
+    line = f"- {q.get('id', '?')} [{q.get('confidence', 'medium')}] {_one_line(q.get('question', ''), 150)} => {_one_line(q.get('partial_answer', ''))}"
+    if q.get("limitations"):
+        line += f" | limits: {_join(q['limitations'])}"
+    return line
+
+
+def _unhelpful_line(s: dict) -> str:
+    line = f"- \"{_one_line(s.get('query', ''), 150)}\": {_one_line(s.get('reason', ''), 150)}"
+    if s.get("potential_followups"):
+        line += f" | try: {_join(s['potential_followups'])}"
+    return line
+
+
+def _render(doc: dict) -> str:
+    """Render the document as a compact outline - no timestamps, no empty fields"""
+    lines = []
+
+    open_questions = doc.get("open_questions", [])
+    if open_questions:
+        lines.append(f"OPEN QUESTIONS ({len(open_questions)}):")
+        lines.extend(_question_line(q) for q in open_questions)
+    else:
+        lines.append("OPEN QUESTIONS: none")
+
+    findings = doc.get("findings", [])
+    if findings:
+        lines.append(f"FINDINGS ({len(findings)}):")
+        lines.extend(_finding_line(i, f) for i, f in enumerate(findings, 1))
+
+    closed_complete = doc.get("closed_questions_complete", [])
+    if closed_complete:
+        lines.append(f"ANSWERED ({len(closed_complete)}):")
+        lines.extend(_answered_line(q) for q in closed_complete)
+
+    closed_partial = doc.get("closed_questions_partial", [])
+    if closed_partial:
+        lines.append(f"PARTIALLY ANSWERED ({len(closed_partial)}):")
+        lines.extend(_partial_line(q) for q in closed_partial)
+
+    unhelpful = doc.get("unhelpful_searches", [])
+    if unhelpful:
+        lines.append(f"UNHELPFUL SEARCHES ({len(unhelpful)}):")
+        lines.extend(_unhelpful_line(s) for s in unhelpful)
+
+    return "\n".join(lines)
+
+
+def render_research_document(doc: dict) -> str:
+    """Return the compact outline for a research document, re-rendering only after a change"""
+    if not doc:
+        return "(research document is empty)"
+
+    key = id(doc)
+    version = doc.get("version", 0)
+
+    with _render_cache_lock:
+        cached = _render_cache.get(key)
+        if cached is not None and cached[0] is doc and cached[1] == version:
+            _render_cache.move_to_end(key)
+            return cached[2]
+
+    rendered = _render(doc)
+
+    with _render_cache_lock:
+        _render_cache[key] = (doc, version, rendered)
+        _render_cache.move_to_end(key)
+        while len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+
+    return rendered
+
+
+# ============================================================================
+# RELEVANCE-RANKED RENDERER
+# ============================================================================
+
+# Unhelpful searches kept in a ranked outline, most recent last
+RECENT_UNHELPFUL_SEARCHES = 3
+
+
+def render_relevant_research_document(doc: dict, query: str = "",
+                                      token_budget: int = RETRIEVAL_TOKEN_BUDGET) -> str:
+    """
+    Outline of the research document limited to about `token_budget` tokens.
+
+    A document that fits is rendered whole (render_research_document). A
+    larger one keeps every open question and the last few unhelpful searches,
+    then fills the budget with the findings and closed questions that rank
+    highest for the open questions plus `query` (BM25, see retrieval.py):
+    findings linked to an open question first, then by score, then newest
+    first. Kept items stay in document order under their usual numbers.
+    """
+    rendered = render_research_document(doc)
+    if not doc or not RETRIEVAL_ENABLED or len(rendered) <= token_budget * CHARS_PER_TOKEN:
+        return rendered
+
+    index = get_research_index(doc)
+    open_questions = doc.get("open_questions", [])
+    findings = doc.get("findings", [])
+    closed = {section: doc.get(section, []) for section in
+              ("closed_questions_complete", "closed_questions_partial")}
+    unhelpful = doc.get("unhelpful_searches", [])[-RECENT_UNHELPFUL_SEARCHES:]
+
+    lines = []
+    if open_questions:
+        lines.append(f"OPEN QUESTIONS ({len(open_questions)}):")
+        lines.extend(_question_line(q) for q in open_questions)
+    else:
+        lines.append("OPEN QUESTIONS: none")
+    unhelpful_lines = [_unhelpful_line(s) for s in unhelpful]
+    # What is left for findings and closed questions, less room for section headers
+    budget = (token_budget * CHARS_PER_TOKEN - sum(len(line) + 1 for line in lines + unhelpful_lines)
+              - 200)
+
+    # Rank findings and closed questions
+    position_of = {id(f): position for position, f in enumerate(findings)}
+    linked = {position_of[id(f)] for q in open_questions
+              for f in index.findings.get(q.get("id"), []) if id(f) in position_of}
+    query = " ".join([query] + [q.get("question", "") for q in open_questions])
+    scores = index.relevance().scores(query)
+    recency = {("F", position): position for position in range(len(findings))}
+    recency.update((("Q", q.get("id")), order) for order, q in enumerate(
+        closed["closed_questions_complete"] + closed["closed_questions_partial"]))
+    ranked = sorted(recency, key=lambda key: (key[0] == "F" and key[1] in linked,
+                                              scores.get(key, 0.0), recency[key]),
+                    reverse=True)
+
+    # Best first until the next item does not fit
+    kept = set()
+    for kind, key in ranked:
+        if kind == "F":
+            line = _finding_line(key + 1, findings[key])
+        else:
+            q = index.questions[key]
+            line = _answered_line(q) if index.status[key] == "complete" else _partial_line(q)
+        if len(line) + 1 > budget:
+            break
+        kept.add((kind, key))
+        budget -= len(line) + 1
+
+    shown = [(i, f) for i, f in enumerate(findings) if ("F", i) in kept]
+    if findings:
+        lines.append(f"FINDINGS ({len(shown)} of {len(findings)}, most relevant):")
+        lines.extend(_finding_line(i + 1, f) for i, f in shown)
+    for section, title, render_line in (
+            ("closed_questions_complete", "ANSWERED", _answered_line),
+            ("closed_questions_partial", "PARTIALLY ANSWERED", _partial_line)):
+        questions = [q for q in closed[section] if ("Q", q.get("id")) in kept]
+        if closed[section]:
+            lines.append(f"{title} ({len(questions)} of {len(closed[section])}, most relevant):")
+            lines.extend(render_line(q) for q in questions)
+    if unhelpful:
+        total = len(doc.get("unhelpful_searches", []))
+        lines.append(f"UNHELPFUL SEARCHES ({len(unhelpful)} of {total}, most recent):")
+        lines.extend(unhelpful_lines)
+
+    omitted = len(recency) - len(kept)
+    if omitted:
+        lines.append(f"({omitted} less relevant findings and answers not shown)")
+    return "\n".join(lines)
@@ -0,0 +1,128 @@
+"""
+Retrieval - Local BM25 ranking of research document items
+Goal: Keep the orchestrator prompt bounded however long the research runs
+
+BM25Index is an inverted index (term -> {item key: term frequency}) that is
+updated one item at a time, so the research document index keeps it current
+as the memory nodes add findings and close questions, without a rebuild.
+Document frequencies and the average length are read at query time.
+
+render_relevant_research_document() (research_document.py) uses it to give the
+orchestrator reasoner the open questions plus the findings and answered
+questions most relevant to them and to the latest message, within
+RETRIEVAL_TOKEN_BUDGET. RETRIEVAL_ENABLED=false renders the whole document.
+"""
+
+import math
+import os
+import re
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+RETRIEVAL_ENABLED = os.getenv("RETRIEVAL_ENABLED", "true").lower() not in ("0", "false", "no")
+# Estimated tokens of research document in the orchestrator prompt (~4 chars/token)
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "1500"))
+CHARS_PER_TOKEN = 4
+
+# Standard BM25 parameters: term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset("""
+a an and are as at be by can did do does for from had has have how i in is it its
+me my of on or s so t than that the their them then there these they this to was we
+were what when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lowercased word and number tokens, stopwords dropped"""
+    text = re.sub(r"(?<=\d),(?=\d{3})", "", str(text).lower())
+    return [token for token in re.findall(r"\d+(?:\.\d+)?|[^\W\d_]+", text)
+            if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Incrementally maintained BM25 index over short texts, keyed by the caller's ids"""
+
+    def __init__(self):
+        self.postings = {}    # term -> {key: term frequency}
+        self.lengths = {}     # key -> number of tokens
+        self.terms = {}       # key -> distinct terms, for removal
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, key, text: str):
+        self.remove(key)
+        tokens = tokenize(text)
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for term, count in counts.items():
+            self.postings.setdefault(term, {})[key] = count
+        self.lengths[key] = len(tokens)
+        self.terms[key] = tuple(counts)
+        self.total_length += len(tokens)
+
+    def remove(self, key):
+        if key not in self.lengths:
+            return
+        for term in self.terms.pop(key):
+            postings = self.postings[term]
+            del postings[key]
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(key)
+
+    def scores(self, query: str) -> dict:
+        """key -> BM25 score for every item sharing a term with the query"""
+        if not self.lengths:
+            return {}
+        count = len(self.lengths)
+        average_length = self.total_length / count or 1
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, frequency in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[key] / average_length)
+                scores[key] = scores.get(key, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return scores
+
+    def search(self, query: str, k: int = None) -> list:
+        """[(key, score)] best first"""
+        ranked = sorted(self.scores(query).items(), key=lambda item: -item[1])
+        return ranked if k is None else ranked[:k]
+
+
+def test_bm25():
+    """Rank a few findings against a question"""
+    index = BM25Index()
+    findings = [
+        "Orlando's population is about 320,000 (2023 estimate)",
+        "Orlando covers 119 square miles of land",
+        "Tampa's population is about 400,000",
+        "Miami has a tropical monsoon climate"
+    ]
+    for position, finding in enumerate(findings):
+        index.add(position, finding)
+
+    print("🧪 Testing BM25 ranking")
+    ranked = index.search("What is the population density of Orlando?")
+    for position, score in ranked:
+        print(f"   {score:.2f} {findings[position]}")
+    index.remove(0)
+    ok = ranked[0][0] == 0 and 3 not in dict(ranked) and 0 not in dict(index.search("population"))
+    print("✅ Ranking as expected" if ok else "❌ Unexpected ranking")
+    return ok
+
+
+if __name__ == "__main__":
+    test_bm25()
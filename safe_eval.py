@@ -0,0 +1,213 @@
+"""
+Safe Eval - Bounded arithmetic evaluator for the data analysis tools
+Goal: A calculation can never stall the process, whatever the LLM sends
+
+Replaces eval() in phase2's data_analysis_tool and phase3's data_analysis_node.
+- Expressions are parsed to an AST and only arithmetic is allowed: int/float
+  literals, + - * / // ** (^ is accepted as **), unary +/- and parentheses.
+  Names, calls, attributes, comparisons, etc. are rejected before evaluation
+- Every operation is bounded: exponents are limited to SAFE_EVAL_MAX_EXPONENT,
+  powers whose result would exceed SAFE_EVAL_MAX_MAGNITUDE are refused before
+  they are computed, every intermediate result is checked against the same
+  magnitude, and evaluation stops after SAFE_EVAL_TIMEOUT seconds
+- Parsed and validated expressions are cached (SAFE_EVAL_CACHE_SIZE)
+
+So `9**9**9**9` fails in microseconds instead of pinning a CPU core.
+"""
+
+import ast
+import math
+import operator
+import os
+import re
+import time
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SAFE_EVAL_MAX_LENGTH = int(os.getenv("SAFE_EVAL_MAX_LENGTH", "500"))
+SAFE_EVAL_MAX_EXPONENT = float(os.getenv("SAFE_EVAL_MAX_EXPONENT", "1000"))
+SAFE_EVAL_MAX_MAGNITUDE = float(os.getenv("SAFE_EVAL_MAX_MAGNITUDE", "1e100"))
+SAFE_EVAL_TIMEOUT = float(os.getenv("SAFE_EVAL_TIMEOUT", "0.1"))
+SAFE_EVAL_CACHE_SIZE = int(os.getenv("SAFE_EVAL_CACHE_SIZE", "1024"))
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: operator.pow
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg
+}
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that are not plain arithmetic or exceed a limit"""
+
+
+def clean_expression(expression: str) -> str:
+    """Normalize LLM-written arithmetic: ^ means power; units, commas and words go"""
+    cleaned = expression.replace("^", "**")
+    # Keep scientific notation (1.5e9) but no other letters
+    cleaned = re.sub(r"(?<=\d)[eE](?=[+-]?\d)", "e", cleaned)
+    # Allow numbers, operators, parentheses, decimal points, and spaces
+    return re.sub(r"[^0-9+\-*/(). e]|(?<!\d)e|e(?![+-]?\d)", "", cleaned).strip()
+
+
+def _check_magnitude(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ExpressionError("result is not a finite number")
+    if abs(value) > SAFE_EVAL_MAX_MAGNITUDE:
+        raise ExpressionError(
+            f"result exceeds the maximum magnitude of {SAFE_EVAL_MAX_MAGNITUDE:g}")
+    return value
+
+
+def _check_power(base, exponent):
+    """Refuse a power before computing it if it would be too large"""
+    if abs(exponent) > SAFE_EVAL_MAX_EXPONENT:
+        raise ExpressionError(
+            f"exponent {exponent:g} exceeds the maximum of {SAFE_EVAL_MAX_EXPONENT:g}")
+    if base == 0 or exponent <= 0 or abs(base) == 1:
+        return
+    # log10(|base| ** exponent) without computing the power
+    if exponent * math.log10(abs(base)) > math.log10(SAFE_EVAL_MAX_MAGNITUDE):
+        raise ExpressionError(
+            f"result exceeds the maximum magnitude of {SAFE_EVAL_MAX_MAGNITUDE:g}")
+
+
+def _validate(node):
+    """Reject any AST node that is not plain arithmetic"""
+    if isinstance(node, ast.Expression):
+        _validate(node.body)
+    elif isinstance(node, ast.BinOp):
+        if type(node.op) not in BINARY_OPERATORS:
+            raise ExpressionError(f"operator {type(node.op).__name__} is not allowed")
+        _validate(node.left)
+        _validate(node.right)
+    elif isinstance(node, ast.UnaryOp):
+        if type(node.op) not in UNARY_OPERATORS:
+            raise ExpressionError(f"operator {type(node.op).__name__} is not allowed")
+        _validate(node.operand)
+    elif isinstance(node, ast.Constant):
+        if type(node.value) not in (int, float):
+            raise ExpressionError(f"{node.value!r} is not a number")
+        _check_magnitude(node.value)
+    else:
+        raise ExpressionError(f"{type(node).__name__} is not allowed in a calculation")
+
+
+@lru_cache(maxsize=SAFE_EVAL_CACHE_SIZE)
+def compile_expression(cleaned: str) -> ast.Expression:
+    """Parse and validate a cleaned expression (cached)"""
+    if not cleaned:
+        raise ExpressionError("empty expression")
+    if len(cleaned) > SAFE_EVAL_MAX_LENGTH:
+        raise ExpressionError(
+            f"expression is longer than {SAFE_EVAL_MAX_LENGTH} characters")
+    try:
+        tree = ast.parse(cleaned, mode="eval")
+    except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+        raise ExpressionError(f"invalid expression: {e}") from None
+    _validate(tree)
+    return tree
+
+
+def _evaluate(node, deadline: float):
+    if time.perf_counter() > deadline:
+        raise ExpressionError(f"evaluation took longer than {SAFE_EVAL_TIMEOUT:g}s")
+
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.UnaryOp):
+        return UNARY_OPERATORS[type(node.op)](_evaluate(node.operand, deadline))
+
+    left = _evaluate(node.left, deadline)
+    right = _evaluate(node.right, deadline)
+    if isinstance(node.op, ast.Pow):
+        _check_power(left, right)
+    try:
+        result = BINARY_OPERATORS[type(node.op)](left, right)
+    except ZeroDivisionError:
+        raise ExpressionError("division by zero") from None
+    except OverflowError:
+        raise ExpressionError("result is too large") from None
+    if isinstance(result, complex):
+        raise ExpressionError("result is not a real number")
+    return _check_magnitude(result)
+
+
+def safe_eval(expression: str):
+    """Evaluate an arithmetic expression within the configured limits"""
+    tree = compile_expression(clean_expression(expression))
+    try:
+        return _evaluate(tree.body, time.perf_counter() + SAFE_EVAL_TIMEOUT)
+    except RecursionError:
+        raise ExpressionError("expression is nested too deeply") from None
+
+
+def test_safe_eval():
+    """Check normal arithmetic and pathological inputs against the limits"""
+    expected = {
+        "8.3 / 0.87": 8.3 / 0.87,
+        "(1000 * 1.05^3)": 1000 * 1.05 ** 3,
+        "1,200,000,000 + 800000000 + 600000000": 2600000000,
+        "2 ** 10": 1024,
+        "-(3 - 5) * 4": 8,
+        "7 // 2 + 1.5e9 / 1E9": 4.5,
+        "Revenue: $1,200 * 3 units": 3600,
+        "2 ** -2": 0.25,
+        "1e3 * 2": 2000.0
+    }
+    rejected = [
+        "9**9**9**9",
+        "10 ** 10 ** 10",
+        "2 ** 100000",
+        "(10 ** 99) * (10 ** 99)",
+        "1e308 * 10",
+        "9" * 400,
+        "1 / 0",
+        "(-8) ** 0.5",
+        "__import__('os').system('echo hi')",
+        "(" * 300 + "1" + ")" * 300,
+        "1 +" * 300 + "1",
+        "",
+        "1 < 2"
+    ]
+
+    print("🧪 Testing safe_eval")
+    failures = 0
+    for expression, value in expected.items():
+        result = safe_eval(expression)
+        ok = math.isclose(result, value)
+        failures += not ok
+        print(f"   {'✅' if ok else '❌'} {expression} = {result}")
+
+    for expression in rejected:
+        start = time.perf_counter()
+        try:
+            result = safe_eval(expression)
+            ok = False
+            outcome = f"evaluated to {result!r}"
+        except ExpressionError as e:
+            ok = True
+            outcome = f"rejected: {e}"
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        failures += not ok
+        print(f"   {'✅' if ok else '❌'} {expression[:40]!r} {outcome} ({elapsed_ms:.2f} ms)")
+
+    print(f"📊 {compile_expression.cache_info()}")
+    print("✅ All checks passed" if not failures else f"❌ {failures} checks failed")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    test_safe_eval()
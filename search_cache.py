@@ -0,0 +1,153 @@
+"""
+Search Cache - Persistent, TTL-based cache for Perplexity search results
+Goal: Stop paying a full search round-trip for queries we have already answered
+
+Entries live in a small SQLite file so they survive restarts and are shared by
+every graph thread (and every process pointing at the same file).
+- Keys are normalized queries: case, whitespace, punctuation, articles and
+  filler words are folded, so "Please tell me the population of New York City"
+  and "population of new york city" share one entry. Question words and
+  prepositions are kept - "When was X born?" and "Where was X born?" differ
+- Every entry has its own expiry (SEARCH_CACHE_TTL seconds by default)
+- The cache is size-bounded; least recently used entries are evicted first
+- Hit/miss/eviction counters are kept per process (see stats())
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", ".search_cache.sqlite3")
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 60 * 60)))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000"))
+SEARCH_CACHE_ENABLED = os.getenv(
+    "SEARCH_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# Articles and filler that never change what a query asks
+STOPWORDS = frozenset("a an the please search".split())
+FILLER_PHRASES = re.compile(r"\b(?:tell me|look up)\b")
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, punctuation, whitespace, articles and filler words into a cache key"""
+    text = re.sub(r"['\u2019]", "", query.lower())
+    words = re.sub(r"[^\w$%.\s]|(?<!\d)\.|\.(?!\d)", " ", text).split()
+    words = FILLER_PHRASES.sub(" ", " ".join(words)).split() or words
+    kept = [w for w in words if w not in STOPWORDS]
+    # A query made only of stopwords still needs a usable key
+    return " ".join(kept or words)
+
+
+class SearchCache:
+    """SQLite-backed search result cache with per-entry TTL and LRU eviction"""
+
+    def __init__(self, path: str = SEARCH_CACHE_PATH, ttl: float = SEARCH_CACHE_TTL,
+                 max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS search_cache (
+                    key TEXT PRIMARY KEY,
+                    query TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    expires REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS search_cache_lru ON search_cache (last_access)")
+
+    def get(self, query: str):
+        """Return the cached result for a query, or None on a miss or expired entry"""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT result, expires FROM search_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute(
+                        "DELETE FROM search_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, query: str, result: str, ttl: float = None):
+        """Store a result; ttl overrides the cache default for this entry"""
+        key = normalize_query(query)
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, query, result, now, expires, now))
+            self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones above max_entries"""
+        self._conn.execute(
+            "DELETE FROM search_cache WHERE expires <= ?", (time.time(),))
+        (count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM search_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute("""
+                DELETE FROM search_cache WHERE key IN (
+                    SELECT key FROM search_cache ORDER BY last_access LIMIT ?
+                )""", (overflow,))
+            self.evictions += overflow
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM search_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute(
+                "SELECT COUNT(*) FROM search_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_search_cache():
+    """Return the process-wide search cache, or None when SEARCH_CACHE_ENABLED is off"""
+    global _default_cache
+    if not SEARCH_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SearchCache()
+        return _default_cache
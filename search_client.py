@@ -0,0 +1,502 @@
+"""
+Search Client - Shared Perplexity search used by the phase 2 and phase 3 agents
+Goal: Fast, bounded and resilient search calls from every graph
+
+- One pooled requests.Session (keep-alive) shared by all graph threads
+- Connect/read timeouts on every request, so a slow response can't hang a thread
+- Exponential backoff with full jitter on 429/5xx and connection errors,
+  honouring Retry-After when the provider sends it
+- A circuit breaker that fails fast after repeated failed searches and lets a
+  single probe through once the cool-down has passed
+- search_many() fans a batch of queries out on a bounded thread pool
+- AsyncSearchClient / aperplexity_search() / asearch_many() are the httpx-based
+  async equivalents used by the async graph nodes; both clients share one breaker
+- Results are served from the persistent search cache (search_cache.py) when a
+  fresh entry exists. Only successful searches are cached.
+- Every attempt first waits for the process-wide Perplexity rate limit
+  (rate_limiter.py), and a 429 pauses and slows down every caller, not just
+  the one that got it
+- Every search's latency, source (cache/api) and outcome goes to metrics.py
+- With CASSETTE_MODE set, searches are recorded to or replayed from a cassette
+  (cassettes.py)
+
+Set PERPLEXITY_API_URL to point the agents at a stub server for offline runs
+(see stub_perplexity_server.py).
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from cassettes import (CASSETTE_MODE, AsyncCassetteTransport, CassetteAdapter,
+                       get_cassette)
+from metrics import record_search
+from rate_limiter import RateLimiter, estimate_request_tokens, get_rate_limiter
+from search_cache import get_search_cache
+
+# Load environment variables
+load_dotenv()
+
+PERPLEXITY_API_URL = os.getenv(
+    "PERPLEXITY_API_URL", "https://api.perplexity.ai/chat/completions")
+
+SEARCH_CONNECT_TIMEOUT = float(os.getenv("SEARCH_CONNECT_TIMEOUT", "5"))
+SEARCH_READ_TIMEOUT = float(os.getenv("SEARCH_READ_TIMEOUT", "30"))
+SEARCH_MAX_RETRIES = int(os.getenv("SEARCH_MAX_RETRIES", "3"))
+SEARCH_BACKOFF_BASE = float(os.getenv("SEARCH_BACKOFF_BASE", "0.5"))
+SEARCH_BACKOFF_MAX = float(os.getenv("SEARCH_BACKOFF_MAX", "8"))
+SEARCH_POOL_SIZE = int(os.getenv("SEARCH_POOL_SIZE", "16"))
+SEARCH_CIRCUIT_FAILURES = int(os.getenv("SEARCH_CIRCUIT_FAILURES", "5"))
+SEARCH_CIRCUIT_RESET = float(os.getenv("SEARCH_CIRCUIT_RESET", "30"))
+SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "4"))
+SEARCH_MAX_BATCH = int(os.getenv("SEARCH_MAX_BATCH", "8"))
+
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+SEARCH_SYSTEM_PROMPT = "You are a helpful research assistant. Provide accurate, up-to-date information based on web search results. Be concise and include relevant details like dates or sources when available."
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker: closed -> open -> half-open -> closed"""
+
+    def __init__(self, failure_threshold: int = SEARCH_CIRCUIT_FAILURES,
+                 reset_timeout: float = SEARCH_CIRCUIT_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through right now"""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            # Let exactly one probe through to test the provider. A probe that
+            # never reported back (e.g. a cancelled task) is replaced after a
+            # further reset_timeout.
+            if state == "half_open" and (
+                    not self._probe_in_flight or
+                    time.monotonic() - self._probe_started >= self.reset_timeout):
+                self._probe_in_flight = True
+                self._probe_started = time.monotonic()
+                return
+            retry_in = max(0.0, self.reset_timeout -
+                           (time.monotonic() - self.opened_at))
+            raise CircuitOpenError(
+                f"search circuit open after {self.failures} consecutive failures, retry in {retry_in:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def build_search_payload(query: str) -> dict:
+    return {
+        "model": "sonar",
+        "messages": [
+            {
+                "role": "system",
+                "content": SEARCH_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": query
+            }
+        ],
+        "max_tokens": 300,
+        "temperature": 0.1,
+        "stream": False
+    }
+
+
+class BaseSearchClient:
+    """Configuration, retry policy and breaker shared by the sync and async clients"""
+
+    def __init__(self, url: str = PERPLEXITY_API_URL,
+                 connect_timeout: float = SEARCH_CONNECT_TIMEOUT,
+                 read_timeout: float = SEARCH_READ_TIMEOUT,
+                 max_retries: int = SEARCH_MAX_RETRIES,
+                 backoff_base: float = SEARCH_BACKOFF_BASE,
+                 backoff_max: float = SEARCH_BACKOFF_MAX,
+                 pool_size: int = SEARCH_POOL_SIZE,
+                 breaker: CircuitBreaker = None,
+                 rate_limiter=None):
+        self.url = url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.breaker = breaker or CircuitBreaker()
+        # Replayed searches never reach Perplexity, so they are not limited
+        if rate_limiter is None and CASSETTE_MODE != "replay":
+            rate_limiter = get_rate_limiter("perplexity")
+        self.rate_limiter = rate_limiter
+
+    def _headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {os.getenv('PERPLEXITY_API_KEY')}",
+            "Content-Type": "application/json"
+        }
+
+    def backoff_delay(self, attempt: int, retry_after: str = None) -> float:
+        """Full-jitter exponential backoff, or the provider's Retry-After if larger"""
+        delay = random.uniform(
+            0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    def _rate_limit_feedback(self, estimated: int, status_code: int, retry_after: str = None,
+                             result: dict = None):
+        """Tell the rate limiter how an attempt went: throttled, or the tokens it used"""
+        if self.rate_limiter is None:
+            return
+        if status_code == 429:
+            self.rate_limiter.record_throttle(retry_after)
+        elif result is not None:
+            self.rate_limiter.record_success()
+            self.rate_limiter.settle(estimated, (result.get("usage") or {}).get("total_tokens", 0))
+
+
+class SearchClient(BaseSearchClient):
+    """Pooled, timeout-bounded Perplexity client with retries and circuit breaking"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = requests.Session()
+        cassette = get_cassette()
+        if cassette is not None:
+            adapter = CassetteAdapter(cassette, pool_connections=1, pool_maxsize=self.pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def search(self, query: str) -> str:
+        """Search the web with Perplexity and return the answer text (raises on failure)"""
+        self.breaker.before_call()
+
+        payload = build_search_payload(query)
+        estimated = estimate_request_tokens(payload)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(estimated)
+            try:
+                response = self.session.post(
+                    self.url, json=payload, headers=self._headers(),
+                    timeout=(self.connect_timeout, self.read_timeout))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    try:
+                        response.raise_for_status()
+                    except requests.HTTPError:
+                        # Client errors (bad key, bad request) are not provider
+                        # outages, so they don't count towards the breaker
+                        self.breaker.record_success()
+                        raise
+                    self.breaker.record_success()
+                    result = response.json()
+                    self._rate_limit_feedback(estimated, response.status_code, result=result)
+                    return result['choices'][0]['message']['content']
+                error = requests.HTTPError(
+                    f"{response.status_code} from search provider", response=response)
+                retry_after = response.headers.get("Retry-After")
+                self._rate_limit_feedback(estimated, response.status_code, retry_after)
+
+            if attempt < self.max_retries:
+                time.sleep(self.backoff_delay(attempt, retry_after))
+
+        self.breaker.record_failure()
+        raise error
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncSearchClient(BaseSearchClient):
+    """Async (httpx) twin of SearchClient with the same timeouts, retries and breaker"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # httpx connection pools are bound to the event loop that created them
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            cassette = get_cassette()
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=self.pool_size,
+                                    max_keepalive_connections=self.pool_size),
+                transport=AsyncCassetteTransport(cassette) if cassette is not None else None)
+            self._clients[loop] = client
+        return client
+
+    async def search(self, query: str) -> str:
+        """Search the web with Perplexity and return the answer text (raises on failure)"""
+        self.breaker.before_call()
+
+        client = self._client()
+        payload = build_search_payload(query)
+        estimated = estimate_request_tokens(payload)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            if self.rate_limiter is not None:
+                await self.rate_limiter.aacquire(estimated)
+            try:
+                response = await client.post(
+                    self.url, json=payload, headers=self._headers())
+            except httpx.TransportError as e:
+                error = e
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    try:
+                        response.raise_for_status()
+                    except httpx.HTTPStatusError:
+                        # Client errors don't count towards the breaker (see SearchClient)
+                        self.breaker.record_success()
+                        raise
+                    self.breaker.record_success()
+                    result = response.json()
+                    self._rate_limit_feedback(estimated, response.status_code, result=result)
+                    return result['choices'][0]['message']['content']
+                error = httpx.HTTPStatusError(
+                    f"{response.status_code} from search provider",
+                    request=response.request, response=response)
+                retry_after = response.headers.get("Retry-After")
+                self._rate_limit_feedback(estimated, response.status_code, retry_after)
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff_delay(attempt, retry_after))
+
+        self.breaker.record_failure()
+        raise error
+
+    async def aclose(self):
+        """Close the connection pool of the running event loop"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+# One breaker for both clients - they talk to the same provider
+search_breaker = CircuitBreaker()
+
+_default_client = None
+_default_async_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_search_client() -> SearchClient:
+    """Return the process-wide search client (shared connection pool and breaker)"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = SearchClient(breaker=search_breaker)
+        return _default_client
+
+
+def get_async_search_client() -> AsyncSearchClient:
+    """Return the process-wide async search client (shares the breaker with the sync one)"""
+    global _default_async_client
+    with _default_client_lock:
+        if _default_async_client is None:
+            _default_async_client = AsyncSearchClient(breaker=search_breaker)
+        return _default_async_client
+
+
+def perplexity_search(query: str) -> str:
+    """Search the web with Perplexity and return the answer text (raises on failure)"""
+    start = time.perf_counter()
+    cache = get_search_cache()
+    if cache is not None:
+        cached = cache.get(query)
+        if cached is not None:
+            record_search(time.perf_counter() - start, "cache", "ok")
+            return cached
+
+    try:
+        search_info = get_search_client().search(query)
+    except Exception:
+        record_search(time.perf_counter() - start, "api", "error")
+        raise
+    record_search(time.perf_counter() - start, "api", "ok")
+
+    if cache is not None:
+        cache.put(query, search_info)
+
+    return search_info
+
+
+async def aperplexity_search(query: str) -> str:
+    """Async version of perplexity_search()"""
+    start = time.perf_counter()
+    # Cache lookups are local SQLite reads - fast enough to run on the loop
+    cache = get_search_cache()
+    if cache is not None:
+        cached = cache.get(query)
+        if cached is not None:
+            record_search(time.perf_counter() - start, "cache", "ok")
+            return cached
+
+    try:
+        search_info = await get_async_search_client().search(query)
+    except Exception:
+        record_search(time.perf_counter() - start, "api", "error")
+        raise
+    record_search(time.perf_counter() - start, "api", "ok")
+
+    if cache is not None:
+        cache.put(query, search_info)
+
+    return search_info
+
+
+def search_many(queries: list, max_concurrency: int = SEARCH_MAX_CONCURRENCY) -> list:
+    """
+    Run several searches concurrently (at most max_concurrency in flight).
+
+    Returns [(query, answer_text, error)] in the order of queries; exactly one
+    of answer_text / error is None for each entry.
+    """
+    def run(query):
+        try:
+            return query, perplexity_search(query), None
+        except Exception as e:
+            return query, None, e
+
+    if len(queries) <= 1:
+        return [run(query) for query in queries]
+
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(queries))) as pool:
+        return list(pool.map(run, queries))
+
+
+async def asearch_many(queries: list, max_concurrency: int = SEARCH_MAX_CONCURRENCY) -> list:
+    """Async version of search_many() - same result format and concurrency cap"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(query):
+        async with semaphore:
+            try:
+                return query, await aperplexity_search(query), None
+            except Exception as e:
+                return query, None, e
+
+    return list(await asyncio.gather(*(run(query) for query in queries)))
+
+
+def test_search_client():
+    """Exercise caching, retries, timeouts and circuit breaking against the stub server"""
+    import search_cache
+    from stub_perplexity_server import StubPerplexityServer
+
+    global _default_client, _default_async_client
+    search_cache._default_cache = search_cache.SearchCache(":memory:")
+
+    # A fast limiter with a short backoff, so the demo doesn't wait on the real budget
+    limiter = RateLimiter("perplexity", rpm=600, tpm=0, backoff_base=0.05)
+
+    with StubPerplexityServer() as server:
+        _default_client = SearchClient(
+            url=server.url, read_timeout=0.5, backoff_base=0.05,
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout=1), rate_limiter=limiter)
+
+        print("1️⃣  Cache")
+        for query in ["population of New York City",
+                      "Please tell me the population of New York City"]:
+            print(f"   🔍 {query} -> {perplexity_search(query)}")
+        print(f"   📊 {get_search_cache().stats()}")
+
+        print("2️⃣  Retry on 429 / 503")
+        server.failures = [429, 503]
+        print(f"   🔍 {_default_client.search('GDP of Japan')}")
+        print(f"   🚦 Rate limiter: {limiter.stats()}")
+
+        print("3️⃣  Read timeout")
+        server.delay = 1.0
+        start = time.monotonic()
+        try:
+            _default_client.search("slow query")
+        except Exception as e:
+            print(f"   ⏱️  {type(e).__name__} after {time.monotonic() - start:.1f}s")
+        server.delay = 0
+
+        print("4️⃣  Circuit breaker")
+        server.failures = [500] * 20
+        for i in range(3):
+            try:
+                _default_client.search(f"failing query {i}")
+            except Exception as e:
+                print(f"   ❌ {type(e).__name__}: {e}")
+        print(f"   🔌 Breaker state: {_default_client.breaker.state}")
+        server.failures = []
+        time.sleep(1.1)
+        print(f"   🔍 After cool-down: {_default_client.search('recovery probe')}")
+        print(f"   🔌 Breaker state: {_default_client.breaker.state}")
+
+        print("5️⃣  Concurrent batch")
+        server.delay = 0.3
+        start = time.monotonic()
+        results = search_many([f"batch query {i}" for i in range(4)])
+        print(f"   🔍 {len(results)} results in {time.monotonic() - start:.1f}s")
+        server.delay = 0
+
+        print("6️⃣  Async client")
+        _default_async_client = AsyncSearchClient(url=server.url, rate_limiter=limiter)
+        server.delay = 0.3
+        start = time.monotonic()
+        results = asyncio.run(asearch_many([f"async query {i}" for i in range(4)]))
+        print(f"   🔍 {len(results)} results in {time.monotonic() - start:.1f}s")
+        server.delay = 0
+
+        print(f"\n🌐 Stub server requests: {server.request_count}")
+
+
+if __name__ == "__main__":
+    test_search_client()
@@ -0,0 +1,178 @@
+"""
+Similarity - Local near-duplicate detection for research document text
+Goal: A finding or question the memory agent records twice is merged, not
+pasted into every later reasoner prompt twice
+
+No network and no model calls:
+- Text is normalized (case, punctuation, whitespace) and cut into overlapping
+  character shingles (DEDUP_SHINGLE_SIZE), hashed with CRC32
+- Each text gets a MinHash signature of DEDUP_NUM_HASHES 16-bit values, cut
+  from BLAKE2b digests of every shingle so the per-shingle work happens in C;
+  its bands are bucketed (locality-sensitive hashing), so candidate
+  duplicates are found without comparing against every stored text
+- A candidate is a duplicate when the exact Jaccard similarity of the two
+  shingle sets reaches DEDUP_THRESHOLD and both texts contain the same
+  numbers - "population 320,000" and "population 307,000" are kept apart -
+  and the same negations (not/no/never/n't/without), so "X is the county
+  seat" and "X is not the county seat" are too
+
+DEDUP_ENABLED=false turns merging off (see research_document.py).
+"""
+
+import hashlib
+import os
+import re
+import struct
+import zlib
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() not in ("0", "false", "no")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "4"))
+# Rounded up to whole 512-bit digests (32 values each)
+DEDUP_NUM_HASHES = int(os.getenv("DEDUP_NUM_HASHES", "64"))
+
+# Signature rows per LSH band: 16 bands of 4 make texts at Jaccard 0.8 collide
+# in some band with probability ~0.998, and texts at 0.3 only ~0.12
+LSH_ROWS_PER_BAND = 4
+
+# Texts whose signatures are kept, so checking a text and then adding it hashes it once
+SIGNATURE_CACHE_SIZE = 1024
+
+_DIGESTS = [bytes([digest]) for digest in range(-(-DEDUP_NUM_HASHES // 32))]
+_DIGEST_VALUES = struct.Struct("<32H")
+
+
+def normalize_text(text: str) -> str:
+    """Fold case, punctuation and whitespace; keep digits and decimal points"""
+    text = re.sub(r"(?<=\d),(?=\d{3})", "", str(text).lower())
+    return " ".join(re.sub(r"[^\w\s.]|(?<!\d)\.|\.(?!\d)", " ", text).split())
+
+
+def numbers_in(text: str) -> frozenset:
+    return frozenset(re.findall(r"\d+(?:\.\d+)?", normalize_text(text)))
+
+
+def negations_in(text: str) -> frozenset:
+    """Negation words of a text; "isn't" and "cannot" count as not"""
+    words = re.findall(r"\b(?:not|no|never|without|cannot)\b|n['\u2019]t\b", str(text).lower())
+    return frozenset("not" if word in ("cannot", "n't", "n\u2019t") else word for word in words)
+
+
+def shingles(text: str, size: int = DEDUP_SHINGLE_SIZE) -> frozenset:
+    """Hashed character shingles of the normalized text"""
+    text = normalize_text(text)
+    if len(text) <= size:
+        return frozenset([zlib.crc32(text.encode())])
+    return frozenset(zlib.crc32(text[i:i + size].encode())
+                     for i in range(len(text) - size + 1))
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def minhash(shingle_set: frozenset) -> tuple:
+    rows = []
+    for shingle in shingle_set:
+        key = shingle.to_bytes(4, "little")
+        row = ()
+        for person in _DIGESTS:
+            row += _DIGEST_VALUES.unpack(hashlib.blake2b(key, digest_size=64, person=person).digest())
+        rows.append(row)
+    return tuple(map(min, zip(*rows)))
+
+
+@lru_cache(maxsize=SIGNATURE_CACHE_SIZE)
+def _signature(text: str) -> tuple:
+    """(shingles, numbers, negations, LSH band keys) of a text"""
+    shingle_set = shingles(text)
+    signature = minhash(shingle_set)
+    bands = [(band, hash(signature[band * LSH_ROWS_PER_BAND:(band + 1) * LSH_ROWS_PER_BAND]))
+             for band in range(len(signature) // LSH_ROWS_PER_BAND)]
+    return shingle_set, numbers_in(text), negations_in(text), bands
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index over short texts, keyed by the caller's ids"""
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self.entries = {}     # key -> (shingles, numbers, negations, band keys)
+        self.buckets = {}     # (band, band hash) -> {keys}
+
+    def add(self, key, text: str):
+        self.remove(key)
+        self.entries[key] = _signature(text)
+        for band in self.entries[key][3]:
+            self.buckets.setdefault(band, set()).add(key)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for band in entry[3]:
+            self.buckets[band].discard(key)
+            if not self.buckets[band]:
+                del self.buckets[band]
+
+    def find(self, text: str, keys=None) -> tuple:
+        """(key, similarity) of the closest stored near-duplicate of text, or (None, 0.0)"""
+        shingle_set, numbers, negations, bands = _signature(text)
+        candidates = set()
+        for band in bands:
+            candidates.update(self.buckets.get(band, ()))
+
+        best_key, best_score = None, 0.0
+        for key in candidates:
+            if keys is not None and key not in keys:
+                continue
+            stored_shingles, stored_numbers, stored_negations, _ = self.entries[key]
+            # A different number or an added "not" makes it a different claim
+            if stored_numbers != numbers or stored_negations != negations:
+                continue
+            score = jaccard(shingle_set, stored_shingles)
+            if score >= self.threshold and score > best_score:
+                best_key, best_score = key, score
+        return best_key, best_score
+
+
+def test_near_duplicates():
+    """Check that rewordings match and different facts do not"""
+    pairs = [
+        ("Orlando's population is about 320,000 (2023 estimate)",
+         "Orlando population is about 320000 (2023 estimate).", True),
+        ("What is the land area of Orlando in square miles?",
+         "What is the land area of Orlando, in square miles", True),
+        ("Orlando's population is about 320,000 (2023 estimate)",
+         "Orlando's population is about 307,000 (2023 estimate)", False),
+        ("What is the population of Orlando?",
+         "What is the population of Tampa?", False),
+        ("GOOG closed at 170.5 on Friday", "MSFT closed at 170.5 on Friday", False),
+        ("Orlando is the county seat of Orange County",
+         "Orlando is not the county seat of Orange County", False)
+    ]
+
+    print("🧪 Testing near-duplicate detection")
+    failures = 0
+    for first, second, expected in pairs:
+        index = NearDuplicateIndex()
+        index.add("first", first)
+        key, score = index.find(second)
+        ok = (key is not None) == expected
+        failures += not ok
+        similarity = jaccard(shingles(first), shingles(second))
+        print(f"   {'✅' if ok else '❌'} {similarity:.2f} {first!r} ~ {second!r}")
+    print("✅ All checks passed" if not failures else f"❌ {failures} checks failed")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    test_near_duplicates()
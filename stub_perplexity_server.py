@@ -0,0 +1,126 @@
+"""
+Stub Perplexity Server - Local stand-in for https://api.perplexity.ai/chat/completions
+Goal: Exercise the search path offline (no API key, no network)
+
+Answers every chat completion request with a canned response and counts the
+requests it receives. Failure modes for exercising the search client:
+- failures: status codes returned (in order) before answering normally
+- delay: seconds to wait before responding (read timeouts)
+
+Point the agents at it with:
+    PERPLEXITY_API_URL=http://127.0.0.1:<port>/chat/completions
+
+Usage:
+    python stub_perplexity_server.py [port]
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubPerplexityServer:
+    """In-process HTTP server answering Perplexity-style chat completion requests"""
+
+    def __init__(self, port: int = 0, responses: dict = None,
+                 failures: list = None, delay: float = 0):
+        # Optional exact-query -> answer overrides for canned responses
+        self.responses = responses or {}
+        self.failures = list(failures or [])
+        self.delay = delay
+        self.request_count = 0
+        self.queries = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/chat/completions"
+
+    def answer(self, query: str) -> str:
+        return self.responses.get(query, f"Stub search result for: {query}")
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                query = payload.get("messages", [{}])[-1].get("content", "")
+                with server._lock:
+                    server.request_count += 1
+                    server.queries.append(query)
+                    status = server.failures.pop(0) if server.failures else 200
+
+                if server.delay:
+                    time.sleep(server.delay)
+
+                if status != 200:
+                    body = json.dumps(
+                        {"error": {"message": f"stub failure {status}"}}).encode()
+                    self.send_response(status)
+                    if status == 429:
+                        self.send_header("Retry-After", "0")
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                body = json.dumps({
+                    "model": payload.get("model", "sonar"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": server.answer(query)},
+                        "finish_reason": "stop"
+                    }]
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client gave up (e.g. read timeout) before we answered
+                    pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server = StubPerplexityServer(port=port)
+    print(f"🧪 Stub Perplexity server listening on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()